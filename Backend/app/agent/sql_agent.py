@@ -1,4 +1,5 @@
 from typing import Any
+import asyncio
 import os
 from langgraph.graph import StateGraph, END
 from langgraph.types import Command
@@ -102,7 +103,9 @@ async def execute_sql(state: SQLAgentState, config):
     database_url = REDDIT_DATABASE_URL if db_used == "reddit" else CHAN_DATABASE_URL
 
     try:
-        result = run_sql(database_url, sql)
+        # Generated SQL stays on the sync pool: its connections are never
+        # committed, so anything but a SELECT is rolled back on return.
+        result = await asyncio.to_thread(run_sql, database_url, sql)
     except Exception as e:
         result = f"SQL Error: {str(e)}"
 
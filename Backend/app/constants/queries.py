@@ -1,13 +1,29 @@
 # 4CHAN
-SELECT_BOARD_COUNT = "SELECT count(distinct(board_code)) FROM boards"
 
-SELECT_CHAN_DAILY_POST_COUNT = """
-SELECT 
-    DATE(created_at) AS day, 
-    COUNT(*) AS posts 
-FROM posts 
-WHERE 1=1
+# Post-type classification (Question/News/Meme/Opinion), evaluated once per
+# thread by the post-type job and stored in chan_post_types. Expects the
+# posts columns comment, filename and ext unqualified.
+CHAN_POST_TYPE_CASE = """
+CASE
+    WHEN LOWER(COALESCE(comment, '')) ~ '\\?$'
+      OR LOWER(COALESCE(comment, '')) LIKE ANY (ARRAY[
+          '%%why%%', '%%how%%', '%%what do you think%%', '%%is it true%%', '%%should i%%'
+      ])
+    THEN 'Question'
+    WHEN LOWER(COALESCE(comment, '')) LIKE ANY (ARRAY[
+        '%%news%%', '%%breaking%%', '%%report%%', '%%journalist%%', '%%update%%',
+        '%%press%%', '%%headline%%', '%%alert%%', '%%source:%%'
+    ])
+    THEN 'News'
+    WHEN (filename IS NOT NULL AND ext IN ('.jpg', '.png', '.gif', '.jpeg'))
+      OR LOWER(COALESCE(comment, '')) LIKE ANY (ARRAY[
+          '%%meme%%', '%%dank%%', '%%lol%%', '%%funny%%', '%%cope%%', '%%cringe%%', '%%based%%'
+      ])
+    THEN 'Meme'
+    ELSE 'Opinion'
+END
 """
+SELECT_BOARD_COUNT = "SELECT count(distinct(board_code)) FROM boards"
 
 # Summary statistics query
 SELECT_CHAN_SUMMARY_STATS = """
@@ -18,46 +34,164 @@ SELECT
 FROM posts;
 """
 
+# Activity rollups (chan_activity_hourly / chan_posts_daily) are maintained
+# by the chan_activity job. Readers add the posts ingested after the job's
+# watermark (the "tail") from the raw table, read in the same snapshot as
+# the rollup, so results are exact without waiting for the next run.
+CHAN_POST_TYPES_JOB = "chan_post_types"
+CHAN_ACTIVITY_JOB = "chan_activity"
+CHAN_COUNTRY_JOB = "chan_countries"
+CHAN_THREAD_STATS_JOB = "chan_thread_stats"
+CHAN_THREAD_LIFECYCLE_JOB = "chan_thread_lifecycle"
+
+# Exposes a chan job's (created_at, board_name, post_no) watermark as "wm"
+_CHAN_WATERMARK_CTE = """wm AS (
+    SELECT
+        (w->>0)::timestamp AS created_at,
+        w->>1 AS board_name,
+        (w->>2)::bigint AS post_no
+    FROM (
+        SELECT COALESCE(
+            (SELECT watermark FROM job_watermarks WHERE job_name = '{job}'),
+            '["-infinity", "", -1]'::jsonb
+        ) AS w
+    ) s
+)"""
+
+CHAN_ACTIVITY_WATERMARK_CTE = _CHAN_WATERMARK_CTE.format(job=CHAN_ACTIVITY_JOB)
+CHAN_COUNTRY_WATERMARK_CTE = _CHAN_WATERMARK_CTE.format(job=CHAN_COUNTRY_JOB)
+CHAN_THREAD_STATS_WATERMARK_CTE = _CHAN_WATERMARK_CTE.format(job=CHAN_THREAD_STATS_JOB)
+# As "wm_types" / "wm_lifecycle", for queries that also read another job's
+# watermark
+CHAN_POST_TYPES_WATERMARK_CTE = _CHAN_WATERMARK_CTE.format(
+    job=CHAN_POST_TYPES_JOB
+).replace("wm AS", "wm_types AS", 1)
+CHAN_THREAD_LIFECYCLE_WATERMARK_CTE = _CHAN_WATERMARK_CTE.format(
+    job=CHAN_THREAD_LIFECYCLE_JOB
+).replace("wm AS", "wm_lifecycle AS", 1)
+
+# The crawler stamps posts.created_at when it inserts a row, but the row
+# only becomes visible when its transaction commits, so the chan jobs stop
+# short of the most recent posts rather than move their watermark past rows
+# of a transaction still in flight. The readers' raw tails (everything past
+# the watermark) cover that margin.
+CHAN_SETTLE_DELAY = "interval '5 minutes'"
+CHAN_INGEST_SETTLED = f"created_at < now() - {CHAN_SETTLE_DELAY}"
+
+# Exact distinct counts for the approximate summary, read from rollups and
+# their raw tails instead of all posts: boards from chan_posts_daily, posts
+# (distinct board/post number pairs) from chan_thread_lifecycle, which
+# counts each thread's opening post and each reply once. A tail post counts
+# unless it was already crawled at or before the lifecycle watermark.
+SELECT_CHAN_SUMMARY_DISTINCT_COUNTS = f"""
+WITH {CHAN_ACTIVITY_WATERMARK_CTE},
+{CHAN_THREAD_LIFECYCLE_WATERMARK_CTE},
+boards AS (
+    SELECT board_name FROM chan_posts_daily
+    UNION
+    SELECT p.board_name
+    FROM posts p, wm
+    WHERE (p.created_at, p.board_name, p.post_no) > (wm.created_at, wm.board_name, wm.post_no)
+),
+tail_posts AS (
+    SELECT DISTINCT p.board_name, p.post_no
+    FROM posts p, wm_lifecycle w
+    WHERE (p.created_at, p.board_name, p.post_no) > (w.created_at, w.board_name, w.post_no)
+        AND NOT EXISTS (
+            SELECT 1
+            FROM posts e
+            WHERE e.board_name = p.board_name
+                AND e.resto = p.resto
+                AND e.post_time = p.post_time
+                AND e.post_no = p.post_no
+                AND (e.created_at, e.board_name, e.post_no)
+                    <= (w.created_at, w.board_name, w.post_no)
+        )
+)
+SELECT
+    (SELECT COUNT(thread_time) + COALESCE(SUM(reply_count), 0) FROM chan_thread_lifecycle)
+        + (SELECT COUNT(*) FROM tail_posts) AS total_posts,
+    (SELECT COUNT(*) FROM boards) AS unique_boards
+"""
+
+# Threads per (hour_start, post_type) for one board: the rollup plus the raw
+# tail. Params: (board_name, start, end) twice, once for each side, with raw
+# epoch bounds (see app.utils.dates.day_bounds).
+CHAN_ACTIVITY_HOURLY_CTE = f"""hourly AS (
+    SELECT hour_start, post_type, post_count
+    FROM chan_activity_hourly
+    WHERE board_name = %s
+        AND hour_start >= %s
+        AND hour_start < %s
+    UNION ALL
+    SELECT p.post_time - p.post_time %% 3600, {CHAN_POST_TYPE_CASE}, 1
+    FROM posts p, wm
+    WHERE p.board_name = %s
+        AND p.resto = 0
+        AND p.post_time >= %s
+        AND p.post_time < %s
+        AND (p.created_at, p.board_name, p.post_no) > (wm.created_at, wm.board_name, wm.post_no)
+)"""
+
+# Daily post counts (all posts, by created_at day). {rollup_filter} and
+# {tail_filter} carry the optional board/date filters for each side.
+SELECT_CHAN_DAILY_POST_COUNT = f"""
+WITH {CHAN_ACTIVITY_WATERMARK_CTE},
+daily AS (
+    SELECT day, post_count
+    FROM chan_posts_daily
+    WHERE 1=1 {{rollup_filter}}
+    UNION ALL
+    SELECT DATE(p.created_at), 1
+    FROM posts p, wm
+    WHERE (p.created_at, p.board_name, p.post_no) > (wm.created_at, wm.board_name, wm.post_no)
+        {{tail_filter}}
+)
+SELECT day, SUM(post_count)::bigint AS posts
+FROM daily
+GROUP BY day
+ORDER BY day
+"""
+
 # Activity Explorer - Daily Activity (Graph 1A)
-SELECT_DAILY_ACTIVITY = """
+# Params as for CHAN_ACTIVITY_HOURLY_CTE; days are bucketed in UTC.
+SELECT_DAILY_ACTIVITY = f"""
+WITH {CHAN_ACTIVITY_WATERMARK_CTE},
+{CHAN_ACTIVITY_HOURLY_CTE}
 SELECT 
-    DATE(to_timestamp(post_time)) as post_date,
-    CASE 
-        WHEN COALESCE(comment, '') ILIKE '%%?%%' THEN 'question'
-        WHEN COALESCE(comment, '') ILIKE '%%news%%' OR COALESCE(comment, '') ILIKE '%%breaking%%' THEN 'news'
-        WHEN filename IS NOT NULL AND ext IN ('.jpg', '.png', '.gif') THEN 'meme'
-        ELSE 'opinion'
-    END as post_type,
-    COUNT(*) as post_count
-FROM posts
-WHERE board_name = %s
-    AND to_timestamp(post_time) >= %s::timestamp
-    AND to_timestamp(post_time) < (%s::timestamp + interval '1 day')
-    AND resto = 0
+    DATE(to_timestamp(hour_start) AT TIME ZONE 'UTC') as post_date,
+    post_type,
+    SUM(post_count)::bigint as post_count
+FROM hourly
 GROUP BY post_date, post_type
 ORDER BY post_date, post_type
 """
 
 # Activity Explorer - Hourly Activity (Graph 1B)
-SELECT_HOURLY_ACTIVITY = """
+# Params as for CHAN_ACTIVITY_HOURLY_CTE, with the bounds of a single day.
+SELECT_HOURLY_ACTIVITY = f"""
+WITH {CHAN_ACTIVITY_WATERMARK_CTE},
+{CHAN_ACTIVITY_HOURLY_CTE}
 SELECT 
-    DATE(to_timestamp(post_time)) as post_date,
-    EXTRACT(HOUR FROM to_timestamp(post_time)) as hour,
-    CASE 
-        WHEN COALESCE(comment, '') ILIKE '%%?%%' THEN 'question'
-        WHEN COALESCE(comment, '') ILIKE '%%news%%' OR COALESCE(comment, '') ILIKE '%%breaking%%' THEN 'news'
-        WHEN filename IS NOT NULL AND ext IN ('.jpg', '.png', '.gif') THEN 'meme'
-        ELSE 'opinion'
-    END as post_type,
-    COUNT(*) as post_count
-FROM posts
-WHERE board_name = %s
-    AND DATE(to_timestamp(post_time)) = %s::date
-    AND resto = 0
+    DATE(to_timestamp(hour_start) AT TIME ZONE 'UTC') as post_date,
+    EXTRACT(HOUR FROM to_timestamp(hour_start) AT TIME ZONE 'UTC') as hour,
+    post_type,
+    SUM(post_count)::bigint as post_count
+FROM hourly
 GROUP BY post_date, hour, post_type
 ORDER BY hour, post_type
 """
 
+# Activity heatmap: threads per UTC hour and post type over a date range,
+# shaped into a day x hour x post_type matrix by the route.
+SELECT_CHAN_ACTIVITY_HEATMAP = f"""
+WITH {CHAN_ACTIVITY_WATERMARK_CTE},
+{CHAN_ACTIVITY_HOURLY_CTE}
+SELECT hour_start, post_type, SUM(post_count)::bigint AS post_count
+FROM hourly
+GROUP BY hour_start, post_type
+"""
+
 # Get list of boards
 SELECT_ALL_BOARDS = """
 SELECT board_code, board_title, meta_description, ws_board
@@ -66,20 +200,79 @@ ORDER BY board_code
 """
 
 # Country Statistics
-SELECT_CHAN_COUNTRY_STATS = """
+# Served from the chan_country_daily counters plus the raw tail. {rollup_filter}
+# and {tail_filter} carry the optional board/date filters for each side; the
+# last param is the number of countries to return. Percentages are shares
+# of all matching posts, not just the top N.
+SELECT_CHAN_COUNTRY_STATS = f"""
+WITH {CHAN_COUNTRY_WATERMARK_CTE},
+counts AS (
+    SELECT country_name, country, post_count
+    FROM chan_country_daily
+    WHERE 1=1 {{rollup_filter}}
+    UNION ALL
+    SELECT COALESCE(p.country_name, ''), COALESCE(p.country, ''), 1
+    FROM posts p, wm
+    WHERE (p.created_at, p.board_name, p.post_no) > (wm.created_at, wm.board_name, wm.post_no)
+        {{tail_filter}}
+),
+totals AS (
+    SELECT country_name, country, SUM(post_count) AS count
+    FROM counts
+    GROUP BY country_name, country
+)
 SELECT 
     country_name AS name,
-    COUNT(*) AS count,
-    ROUND((COUNT(*) * 100.0 / SUM(COUNT(*)) OVER ()), 2) AS percent,
+    count,
+    ROUND((count * 100.0 / SUM(count) OVER ()), 2) AS percent,
     country AS flag   -- use stored country code instead of emoji
-FROM posts
-GROUP BY country_name, country
+FROM totals
 ORDER BY count DESC
-LIMIT 7
+LIMIT %s
 """
 
 # Engagement by Post Type (Graph 4A) - 4chan
-SELECT_CHAN_ENGAGEMENT_BY_TYPE = """
+# Threads come from chan_post_types plus the opening posts the post-type job
+# hasn't classified yet, classified here. Reply/image counts come from the
+# chan_thread_stats rollup plus the replies ingested since the
+# chan_thread_stats job's last run; threads with no replies yet count as
+# zero. Params: (boards, start_epoch, end_epoch) twice, once for each side.
+SELECT_CHAN_ENGAGEMENT_BY_TYPE = f"""
+WITH {CHAN_THREAD_STATS_WATERMARK_CTE},
+{CHAN_POST_TYPES_WATERMARK_CTE},
+threads AS (
+    SELECT t.board_name, t.post_no, t.post_type
+    FROM chan_post_types t
+    WHERE t.board_name = ANY(%s)
+        AND t.post_time >= %s
+        AND t.post_time < %s
+    UNION ALL
+    (
+        SELECT DISTINCT ON (p.board_name, p.post_no)
+            p.board_name, p.post_no, {CHAN_POST_TYPE_CASE}
+        FROM posts p, wm_types
+        WHERE p.resto = 0
+            AND p.board_name = ANY(%s)
+            AND p.post_time >= %s
+            AND p.post_time < %s
+            AND (p.created_at, p.board_name, p.post_no)
+                > (wm_types.created_at, wm_types.board_name, wm_types.post_no)
+            AND NOT EXISTS (
+                SELECT 1
+                FROM chan_post_types t
+                WHERE t.board_name = p.board_name AND t.post_no = p.post_no
+            )
+        ORDER BY p.board_name, p.post_no, p.created_at DESC
+    )
+),
+tail AS (
+    SELECT p.board_name, p.resto, COUNT(*) AS reply_count, COUNT(p.filename) AS image_count
+    FROM posts p, wm
+    WHERE p.resto > 0
+        AND (p.created_at, p.board_name, p.post_no) > (wm.created_at, wm.board_name, wm.post_no)
+        AND (p.board_name, p.resto) IN (SELECT board_name, post_no FROM threads)
+    GROUP BY p.board_name, p.resto
+)
 SELECT
     post_type,
     COUNT(*) AS total_threads,
@@ -88,66 +281,116 @@ SELECT
     SUM(reply_count) AS total_replies
 FROM (
     SELECT
-        p.post_no,
-
-        /* ---- Enhanced Post-Type Classification ---- */
-        CASE 
-            /* Strong question detection */
-            WHEN LOWER(p.comment) ~ '\\?$'
-              OR LOWER(p.comment) LIKE '%%why%%'
-              OR LOWER(p.comment) LIKE '%%how%%'
-              OR LOWER(p.comment) LIKE '%%what do you think%%'
-              OR LOWER(p.comment) LIKE '%%is it true%%'
-              OR LOWER(p.comment) LIKE '%%should i%%'
-            THEN 'Question'
-
-            /* News — now detects more keywords */
-            WHEN LOWER(p.comment) LIKE ANY (ARRAY[
-                '%%news%%', '%%breaking%%', '%%breaking news%%', '%%report%%', '%%reported%%', 
-                '%%journalist%%', '%%update%%', '%%press%%', '%%headline%%', '%%alert%%', '%%source:%%'
-            ])
-            THEN 'News'
-
-            /* Meme classification — more robust */
-            WHEN p.filename IS NOT NULL AND p.ext IN ('.jpg', '.png', '.gif', '.jpeg')
-                 OR LOWER(p.comment) LIKE ANY (ARRAY[
-                     '%%meme%%', '%%dank%%', '%%lol%%', '%%funny%%', '%%cope%%', '%%cringe%%', '%%based%%'
-                 ])
-            THEN 'Meme'
-
-            /* Opinion — fallback, but expanded keyword detection */
-            WHEN LOWER(p.comment) LIKE ANY (ARRAY[
-                '%%i think%%', '%%in my opinion%%', '%%imo%%', '%%my view%%', '%%my take%%', '%%i believe%%',
-                '%%it seems to me%%', '%%i feel like%%', '%%personally%%'
-            ])
-            THEN 'Opinion'
-
-            /* Default bucket */
-            ELSE 'Opinion'
-        END AS post_type,
-
-        /* Replies + Image Count */
-        COUNT(r.post_no) AS reply_count,
-        p.images AS image_count
-
-    FROM posts p
-    LEFT JOIN posts r ON r.resto = p.post_no
-
-    WHERE 
-        p.resto = 0
-        AND p.board_name = ANY(%s)
-        AND to_timestamp(p.post_time) >= %s::timestamp
-        AND to_timestamp(p.post_time) < (%s::timestamp + interval '1 day')
-
-    GROUP BY p.post_no, post_type, p.images
+        t.post_type,
+        COALESCE(s.reply_count, 0) + COALESCE(tail.reply_count, 0) AS reply_count,
+        COALESCE(s.image_count, 0) + COALESCE(tail.image_count, 0) AS image_count
+    FROM threads t
+    LEFT JOIN chan_thread_stats s
+        ON s.board_name = t.board_name AND s.thread_no = t.post_no
+    LEFT JOIN tail
+        ON tail.board_name = t.board_name AND tail.resto = t.post_no
 ) t
 GROUP BY post_type
 ORDER BY post_type;
 """
 
-# Get Average Toxicity by Subreddit
+# Thread lifecycle per board for threads started in [start_epoch, end_epoch),
+# from chan_thread_lifecycle. Template: {board_filter} holds an optional
+# board condition. Params: (start_epoch, end_epoch, boards...)
+SELECT_CHAN_THREAD_LIFECYCLE = """
+SELECT
+    board_name,
+    COUNT(*) AS threads,
+    COUNT(*) FILTER (WHERE archived) AS archived_threads,
+    COUNT(bump_limit_time) AS bump_limit_threads,
+    AVG(lifetime_seconds)::float8 AS avg_lifetime,
+    percentile_cont(0.5) WITHIN GROUP (ORDER BY lifetime_seconds) AS median_lifetime,
+    percentile_cont(0.5) WITHIN GROUP (ORDER BY time_to_bump_limit)
+        AS median_time_to_bump_limit,
+    AVG(replies_per_hour)::float8 AS avg_replies_per_hour,
+    percentile_cont(0.5) WITHIN GROUP (ORDER BY archive_latency)
+        AS median_archive_latency
+FROM chan_thread_lifecycle
+WHERE thread_time >= %s
+    AND thread_time < %s{board_filter}
+GROUP BY board_name
+ORDER BY board_name
+"""
+
+# Threads started in the range, ranked by one lifecycle metric. Template:
+# {board_filter} as above, {metric} one of CHAN_THREAD_LIFECYCLE_METRICS.
+# Params: (start_epoch, end_epoch, boards..., limit)
+SELECT_CHAN_THREADS_BY_LIFECYCLE = """
+SELECT
+    board_name,
+    thread_no,
+    thread_time,
+    reply_count,
+    bump_limit_time IS NOT NULL OR bumplimit AS bump_limit_reached,
+    archived,
+    lifetime_seconds,
+    time_to_bump_limit,
+    replies_per_hour,
+    archive_latency
+FROM chan_thread_lifecycle
+WHERE thread_time >= %s
+    AND thread_time < %s{board_filter}
+    AND {metric} IS NOT NULL
+ORDER BY {metric} DESC, board_name, thread_no
+LIMIT %s
+"""
+
+CHAN_THREAD_LIFECYCLE_METRICS = (
+    "lifetime_seconds",
+    "time_to_bump_limit",
+    "replies_per_hour",
+    "archive_latency",
+)
+
+# Get Average Toxicity by Board
 SELECT_BOARD_TOXICITY = """
-SELECT board_name, toxicity FROM toxicity WHERE toxicity IS NOT NULL
+SELECT board_name, AVG(toxicity)::float8
+FROM toxicity
+WHERE toxicity IS NOT NULL
+GROUP BY board_name
+"""
+
+# Perspective attributes scored in the toxicity table of both databases
+TOXICITY_ATTRIBUTES = (
+    "toxicity",
+    "severe_toxicity",
+    "identity_attack",
+    "insult",
+    "threat",
+    "profanity",
+    "sexually_explicit",
+    "flirtation",
+    "obscene",
+    "spam",
+    "unsubstantial",
+)
+TOXICITY_QUANTILES = (0.5, 0.9, 0.99)
+
+# mean, scored count and quantiles per attribute, in TOXICITY_ATTRIBUTES
+# order. Shared by the board and subreddit distribution queries.
+TOXICITY_STATS_COLUMNS = ",\n    ".join(
+    f"AVG({attribute})::float8, COUNT({attribute}), "
+    f"percentile_cont(ARRAY{list(TOXICITY_QUANTILES)}::float8[]) "
+    f"WITHIN GROUP (ORDER BY {attribute})"
+    for attribute in TOXICITY_ATTRIBUTES
+)
+
+# Toxicity distribution per board. Template: {filters} holds optional
+# board/scored_at conditions.
+SELECT_BOARD_TOXICITY_STATS = f"""
+SELECT
+    board_name,
+    COUNT(*),
+    {TOXICITY_STATS_COLUMNS}
+FROM toxicity
+WHERE TRUE{{filters}}
+GROUP BY board_name
+ORDER BY board_name
 """
 
 # Event-related posts timeline for 4chan
@@ -204,3 +447,367 @@ FROM date_series ds
 LEFT JOIN event_counts ec ON ds.day = ec.day
 ORDER BY ds.day;
 """
+
+# Index-backed variants of the event timelines. The keywords arrive as one
+# lower-case regex alternation (app.utils.keywords.keyword_regex) instead of
+# a LIKE pattern array: pg_trgm can serve a regex from the GIN indexes on
+# LOWER(COALESCE(subject/comment, '')), while LIKE ANY(array) always scans.
+SELECT_CHAN_EVENT_RELATED_INDEXED = SELECT_CHAN_EVENT_RELATED.replace(
+    "LIKE ANY(%s)", "~ %s"
+)
+SELECT_CHAN_EVENT_RELATED_ALL_INDEXED = SELECT_CHAN_EVENT_RELATED_ALL.replace(
+    "LIKE ANY(%s)", "~ %s"
+)
+
+# Event timeline read from the event matcher's per-day counts, plus posts
+# past the event job's watermark matched with the event's keyword regex.
+# Template: {rollup_filter}/{tail_filter} carry the optional board filter.
+# Params: job name, date_series start/end, event id, start/end (+ board),
+# start/end (+ board), regex twice.
+CHAN_EVENT_WATERMARK_CTE = _CHAN_WATERMARK_CTE.replace("'{job}'", "%s")
+
+SELECT_CHAN_EVENT_TIMELINE = f"""
+WITH {CHAN_EVENT_WATERMARK_CTE},
+date_series AS (
+    SELECT generate_series(
+        DATE(TO_TIMESTAMP(%s)),
+        DATE(TO_TIMESTAMP(%s)) - INTERVAL '1 day',
+        INTERVAL '1 day'
+    )::DATE AS day
+),
+event_counts AS (
+    SELECT day, SUM(hits) AS count
+    FROM (
+        SELECT day, hits
+        FROM event_keyword_counts
+        WHERE event_id = %s
+          AND platform = 'chan'
+          AND day >= DATE(TO_TIMESTAMP(%s))
+          AND day < DATE(TO_TIMESTAMP(%s))
+          {{rollup_filter}}
+        UNION ALL
+        SELECT DATE(p.created_at), 1
+        FROM posts p, wm
+        WHERE (p.created_at, p.board_name, p.post_no) > (wm.created_at, wm.board_name, wm.post_no)
+          AND p.created_at >= TO_TIMESTAMP(%s)
+          AND p.created_at < TO_TIMESTAMP(%s)
+          {{tail_filter}}
+          AND (
+                LOWER(COALESCE(p.subject, '')) ~ %s
+                OR LOWER(COALESCE(p.comment, '')) ~ %s
+              )
+    ) c
+    GROUP BY day
+)
+SELECT ds.day, COALESCE(ec.count, 0)::bigint AS count
+FROM date_series ds
+LEFT JOIN event_counts ec ON ds.day = ec.day
+ORDER BY ds.day
+"""
+
+# Classify the next batch of threads after the (created_at, board_name,
+# post_no) watermark. Returns (processed, last created_at, board_name, post_no).
+BACKFILL_CHAN_POST_TYPES = f"""
+WITH batch AS (
+    SELECT board_name, post_no, post_time, created_at, comment, filename, ext
+    FROM posts
+    WHERE resto = 0
+      AND (created_at, board_name, post_no) > (%s::timestamp, %s, %s)
+      AND {CHAN_INGEST_SETTLED}
+    ORDER BY created_at, board_name, post_no
+    LIMIT %s
+),
+classified AS (
+    INSERT INTO chan_post_types (board_name, post_no, post_time, post_type)
+    SELECT DISTINCT ON (board_name, post_no)
+        board_name, post_no, post_time, {CHAN_POST_TYPE_CASE}
+    FROM batch
+    ORDER BY board_name, post_no, created_at DESC
+    ON CONFLICT (board_name, post_no) DO UPDATE
+    SET post_time = EXCLUDED.post_time, post_type = EXCLUDED.post_type
+)
+SELECT (SELECT COUNT(*) FROM batch), created_at, board_name, post_no
+FROM batch
+ORDER BY created_at DESC, board_name DESC, post_no DESC
+LIMIT 1
+"""
+
+# Fold the next batch of replies after the (created_at, board_name, post_no)
+# watermark into their threads' counters. Returns (processed, last key...).
+ROLLUP_CHAN_THREAD_STATS = f"""
+WITH batch AS (
+    SELECT board_name, post_no, resto, post_time, created_at, filename
+    FROM posts
+    WHERE resto > 0
+      AND (created_at, board_name, post_no) > (%s::timestamp, %s, %s)
+      AND {CHAN_INGEST_SETTLED}
+    ORDER BY created_at, board_name, post_no
+    LIMIT %s
+),
+rolled AS (
+    INSERT INTO chan_thread_stats AS s (
+        board_name, thread_no, reply_count, image_count,
+        first_reply_time, last_reply_time
+    )
+    SELECT board_name, resto, COUNT(*), COUNT(filename), MIN(post_time), MAX(post_time)
+    FROM batch
+    GROUP BY board_name, resto
+    ON CONFLICT (board_name, thread_no) DO UPDATE
+    SET reply_count = s.reply_count + EXCLUDED.reply_count,
+        image_count = s.image_count + EXCLUDED.image_count,
+        first_reply_time = LEAST(s.first_reply_time, EXCLUDED.first_reply_time),
+        last_reply_time = GREATEST(s.last_reply_time, EXCLUDED.last_reply_time)
+)
+SELECT (SELECT COUNT(*) FROM batch), created_at, board_name, post_no
+FROM batch
+ORDER BY created_at DESC, board_name DESC, post_no DESC
+LIMIT 1
+"""
+
+# Fold the next batch of posts after the (created_at, board_name, post_no)
+# watermark into the hourly thread-type counts and the daily post counts.
+# Returns (processed, last key...).
+ROLLUP_CHAN_ACTIVITY = f"""
+WITH batch AS (
+    SELECT board_name, post_no, resto, post_time, created_at, comment, filename, ext
+    FROM posts
+    WHERE (created_at, board_name, post_no) > (%s::timestamp, %s, %s)
+      AND {CHAN_INGEST_SETTLED}
+    ORDER BY created_at, board_name, post_no
+    LIMIT %s
+),
+hourly AS (
+    INSERT INTO chan_activity_hourly AS a (board_name, hour_start, post_type, post_count)
+    SELECT board_name, hour_start, post_type, COUNT(*)
+    FROM (
+        SELECT board_name, post_time - post_time %% 3600 AS hour_start,
+            {CHAN_POST_TYPE_CASE} AS post_type
+        FROM batch
+        WHERE resto = 0 AND post_time IS NOT NULL
+    ) threads
+    GROUP BY board_name, hour_start, post_type
+    ON CONFLICT (board_name, hour_start, post_type) DO UPDATE
+    SET post_count = a.post_count + EXCLUDED.post_count
+),
+daily AS (
+    INSERT INTO chan_posts_daily AS d (board_name, day, post_count)
+    SELECT board_name, DATE(created_at), COUNT(*)
+    FROM batch
+    GROUP BY board_name, DATE(created_at)
+    ON CONFLICT (board_name, day) DO UPDATE
+    SET post_count = d.post_count + EXCLUDED.post_count
+)
+SELECT (SELECT COUNT(*) FROM batch), created_at, board_name, post_no
+FROM batch
+ORDER BY created_at DESC, board_name DESC, post_no DESC
+LIMIT 1
+"""
+
+# Fold the next batch of posts after the (created_at, board_name, post_no)
+# watermark into the per-(board, day, country) counters.
+ROLLUP_CHAN_COUNTRIES = f"""
+WITH batch AS (
+    SELECT board_name, post_no, created_at, country, country_name
+    FROM posts
+    WHERE (created_at, board_name, post_no) > (%s::timestamp, %s, %s)
+      AND {CHAN_INGEST_SETTLED}
+    ORDER BY created_at, board_name, post_no
+    LIMIT %s
+),
+rolled AS (
+    INSERT INTO chan_country_daily AS c (board_name, day, country, country_name, post_count)
+    SELECT board_name, DATE(created_at), COALESCE(country, ''), COALESCE(country_name, ''), COUNT(*)
+    FROM batch
+    GROUP BY 1, 2, 3, 4
+    ON CONFLICT (board_name, day, country, country_name) DO UPDATE
+    SET post_count = c.post_count + EXCLUDED.post_count
+)
+SELECT (SELECT COUNT(*) FROM batch), created_at, board_name, post_no
+FROM batch
+ORDER BY created_at DESC, board_name DESC, post_no DESC
+LIMIT 1
+"""
+
+# Next batch of posts inside an event's time span for the event matcher,
+# after the (created_at, board_name, post_no) watermark. Returns the key,
+# then (board, day, subject, comment). Params: start, end, watermark, limit.
+SELECT_CHAN_EVENT_BATCH = f"""
+SELECT created_at, board_name, post_no, board_name, DATE(created_at), subject, comment
+FROM posts
+WHERE created_at >= TO_TIMESTAMP(%s)
+  AND created_at < TO_TIMESTAMP(%s)
+  AND (created_at, board_name, post_no) > (%s::timestamp, %s, %s)
+  AND {CHAN_INGEST_SETTLED}
+ORDER BY created_at, board_name, post_no
+LIMIT %s
+"""
+
+# Additive per-(event, platform, community, day) keyword hit counters,
+# shared by both databases.
+UPSERT_EVENT_KEYWORD_COUNTS = """
+INSERT INTO event_keyword_counts (event_id, platform, community, day, hits)
+VALUES (%s, %s, %s, %s, %s)
+ON CONFLICT (event_id, platform, community, day)
+DO UPDATE SET hits = event_keyword_counts.hits + EXCLUDED.hits
+"""
+
+# Fold the next batch of posts after the (created_at, board_name, post_no)
+# watermark into chan_thread_lifecycle: opening posts set the thread's start,
+# bump-limit and archive state, replies its reply count and last reply time.
+# A reply counts once, in the batch holding its first crawl; later crawls of
+# it only move the last reply time. Params: watermark, limit.
+ROLLUP_CHAN_THREAD_LIFECYCLE = f"""
+WITH batch AS (
+    SELECT board_name, post_no, resto, post_time, created_at,
+        archived, archived_on, bumplimit
+    FROM posts
+    WHERE (created_at, board_name, post_no) > (%s::timestamp, %s, %s)
+      AND {CHAN_INGEST_SETTLED}
+    ORDER BY created_at, board_name, post_no
+    LIMIT %s
+),
+reply_stats AS (
+    SELECT
+        b.board_name,
+        b.resto AS thread_no,
+        COUNT(DISTINCT b.post_no) FILTER (
+            WHERE NOT EXISTS (
+                SELECT 1
+                FROM posts e
+                WHERE e.board_name = b.board_name
+                    AND e.resto = b.resto
+                    AND e.post_time = b.post_time
+                    AND e.post_no = b.post_no
+                    AND e.created_at < b.created_at
+            )
+        ) AS reply_count,
+        MAX(b.post_time) AS last_reply_time
+    FROM batch b
+    WHERE b.resto > 0
+    GROUP BY b.board_name, b.resto
+),
+ops AS (
+    SELECT DISTINCT ON (board_name, post_no)
+        board_name, post_no, post_time, archived, NULLIF(archived_on, 0) AS archived_on,
+        bumplimit
+    FROM batch
+    WHERE resto = 0
+    ORDER BY board_name, post_no, created_at DESC
+),
+rolled AS (
+    INSERT INTO chan_thread_lifecycle AS l (
+        board_name, thread_no, thread_time, reply_count, last_reply_time,
+        bumplimit, archived, archived_on
+    )
+    SELECT
+        COALESCE(o.board_name, r.board_name),
+        COALESCE(o.post_no, r.thread_no),
+        o.post_time,
+        COALESCE(r.reply_count, 0),
+        r.last_reply_time,
+        COALESCE(o.bumplimit, false),
+        COALESCE(o.archived, false),
+        o.archived_on
+    FROM ops o
+    FULL JOIN reply_stats r ON r.board_name = o.board_name AND r.thread_no = o.post_no
+    ON CONFLICT (board_name, thread_no) DO UPDATE
+    SET thread_time = COALESCE(EXCLUDED.thread_time, l.thread_time),
+        reply_count = l.reply_count + EXCLUDED.reply_count,
+        last_reply_time = GREATEST(l.last_reply_time, EXCLUDED.last_reply_time),
+        bumplimit = l.bumplimit OR EXCLUDED.bumplimit,
+        archived = l.archived OR EXCLUDED.archived,
+        archived_on = COALESCE(EXCLUDED.archived_on, l.archived_on)
+)
+SELECT (SELECT COUNT(*) FROM batch), created_at, board_name, post_no
+FROM batch
+ORDER BY created_at DESC, board_name DESC, post_no DESC
+LIMIT 1
+"""
+
+# Bump-limit time of the threads that got replies in the batch between two
+# watermarks and have reached their board's bump limit: the post_time of
+# the Nth distinct reply by post_time, read from the raw replies, so replies
+# crawled out of order or more than once don't shift it. Runs after ROLLUP_CHAN_THREAD_LIFECYCLE in the
+# same transaction. Params: per-board bump limits as a JSON object, the bump
+# limit of the other boards, previous watermark, new watermark.
+UPDATE_CHAN_THREAD_BUMP_LIMIT_TIMES = """
+WITH limits AS (
+    SELECT %s::jsonb AS per_board, %s::int AS fallback
+),
+touched AS (
+    SELECT DISTINCT board_name, resto AS thread_no
+    FROM posts
+    WHERE resto > 0
+        AND (created_at, board_name, post_no) > (%s::timestamp, %s, %s)
+        AND (created_at, board_name, post_no) <= (%s::timestamp, %s, %s)
+),
+reached AS (
+    SELECT
+        l.board_name,
+        l.thread_no,
+        COALESCE((limits.per_board->>l.board_name)::int, limits.fallback) AS bump_limit
+    FROM touched t
+    JOIN chan_thread_lifecycle l
+        ON l.board_name = t.board_name AND l.thread_no = t.thread_no
+    CROSS JOIN limits
+    WHERE l.reply_count >= COALESCE((limits.per_board->>l.board_name)::int, limits.fallback)
+)
+UPDATE chan_thread_lifecycle l
+SET bump_limit_time = (
+    SELECT r.post_time
+    FROM (
+        SELECT DISTINCT p.post_no, p.post_time
+        FROM posts p
+        WHERE p.board_name = reached.board_name
+            AND p.resto = reached.thread_no
+    ) r
+    ORDER BY r.post_time, r.post_no
+    OFFSET reached.bump_limit - 1
+    LIMIT 1
+)
+FROM reached
+WHERE l.board_name = reached.board_name AND l.thread_no = reached.thread_no
+"""
+
+# Re-read the opening post of the next threads still open (not archived and
+# started within the refresh window) after the (board_name, thread_no)
+# cursor, since a thread is usually archived after its opening post was
+# first crawled. Returns (threads read, last board_name, thread_no).
+# Params: window seconds, cursor, limit.
+REFRESH_CHAN_THREAD_LIFECYCLE_STATE = """
+WITH live AS (
+    SELECT board_name, thread_no, thread_time
+    FROM chan_thread_lifecycle
+    WHERE NOT archived
+        AND thread_time >= EXTRACT(EPOCH FROM now())::bigint - %s
+        AND (board_name, thread_no) > (%s, %s)
+    ORDER BY board_name, thread_no
+    LIMIT %s
+),
+ops AS (
+    SELECT DISTINCT ON (p.board_name, p.post_no)
+        p.board_name, p.post_no, COALESCE(p.archived, false) AS archived,
+        NULLIF(p.archived_on, 0) AS archived_on, COALESCE(p.bumplimit, false) AS bumplimit
+    FROM live
+    JOIN posts p
+        ON p.board_name = live.board_name
+        AND p.resto = 0
+        AND p.post_time = live.thread_time
+        AND p.post_no = live.thread_no
+    ORDER BY p.board_name, p.post_no, p.created_at DESC
+),
+refreshed AS (
+    UPDATE chan_thread_lifecycle l
+    SET archived = o.archived,
+        archived_on = COALESCE(o.archived_on, l.archived_on),
+        bumplimit = l.bumplimit OR o.bumplimit
+    FROM ops o
+    WHERE l.board_name = o.board_name
+        AND l.thread_no = o.post_no
+        AND (o.archived OR o.bumplimit OR o.archived_on IS NOT NULL)
+)
+SELECT (SELECT COUNT(*) FROM live), board_name, thread_no
+FROM live
+ORDER BY board_name DESC, thread_no DESC
+LIMIT 1
+"""
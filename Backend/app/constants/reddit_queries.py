@@ -1,77 +1,282 @@
+from app.constants.queries import TOXICITY_STATS_COLUMNS
+
 # REDDIT
+
+# Post-type classification (Question/News/Meme/Opinion) on the post title,
+# evaluated once per post by the post-type job and stored in
+# reddit_post_types. Expects the posts columns title, is_video and thumbnail
+# unqualified.
+REDDIT_POST_TYPE_CASE = """
+CASE
+    WHEN LOWER(COALESCE(title, '')) ~ '\\?$'
+      OR LOWER(COALESCE(title, '')) LIKE ANY (ARRAY[
+          '%%why%%', '%%how%%', '%%what do you think%%', '%%is it true%%', '%%should i%%'
+      ])
+    THEN 'Question'
+    WHEN LOWER(COALESCE(title, '')) LIKE ANY (ARRAY[
+        '%%news%%', '%%breaking%%', '%%report%%', '%%update%%', '%%journalist%%',
+        '%%press%%', '%%headline%%', '%%alert%%', '%%source:%%'
+    ])
+    THEN 'News'
+    WHEN COALESCE(is_video, false)
+      OR LOWER(COALESCE(title, '')) LIKE ANY (ARRAY[
+          '%%meme%%', '%%dank%%', '%%lol%%', '%%funny%%',
+          '%%cope%%', '%%cringe%%', '%%based%%', '%%shitpost%%'
+      ])
+      OR LOWER(COALESCE(thumbnail, '')) IN ('image', 'gif')
+    THEN 'Meme'
+    ELSE 'Opinion'
+END
+"""
 SELECT_SUBREDDIT_COUNT = "SELECT count(distinct(id)) FROM subreddit"
 
+REDDIT_POST_TYPES_JOB = "reddit_post_types"
+REDDIT_COMMENT_STATS_JOB = "reddit_comment_stats"
+REDDIT_COMMENT_TREES_JOB = "reddit_comment_trees"
+
+# Comments that count as replies. Expects the comments column body as c.body.
+REDDIT_VALID_COMMENT = "c.body NOT IN ('', '[deleted]', '[removed]')"
+
+# Keyset position of the reddit_post_types job, as "wm_types"
+REDDIT_POST_TYPES_WATERMARK_CTE = f"""wm_types AS (
+    SELECT (w->>0)::timestamptz AS ingested_at, w->>1 AS unique_name
+    FROM (
+        SELECT COALESCE(
+            (SELECT watermark FROM job_watermarks WHERE job_name = '{REDDIT_POST_TYPES_JOB}'),
+            '["-infinity", ""]'::jsonb
+        ) AS w
+    ) s
+)"""
+
+# One subreddit's posts created in [start_epoch, end_epoch) with their post
+# type: reddit_post_types plus the posts the post-type job hasn't classified
+# yet, classified here. Needs REDDIT_POST_TYPES_WATERMARK_CTE. Params:
+# (subreddit, start_epoch, end_epoch) twice, once for each side.
+REDDIT_TYPED_POSTS_CTE = f"""typed_posts AS (
+    SELECT t.unique_name, t.created_at, t.post_type
+    FROM reddit_post_types t
+    WHERE t.subreddit = %s
+        AND t.created_at >= %s
+        AND t.created_at < %s
+    UNION ALL
+    (
+        SELECT DISTINCT ON (p.unique_name)
+            p.unique_name, p.created_at, {REDDIT_POST_TYPE_CASE}
+        FROM posts p, wm_types
+        WHERE (p.ingested_at, p.unique_name) > (wm_types.ingested_at, wm_types.unique_name)
+            AND p.subreddit = %s
+            AND p.created_at >= %s
+            AND p.created_at < %s
+            AND NOT EXISTS (
+                SELECT 1 FROM reddit_post_types t WHERE t.unique_name = p.unique_name
+            )
+        ORDER BY p.unique_name, p.ingested_at DESC
+    )
+)"""
+
 # Engagement by Post Type (Graph 4A) - Reddit
-# Joins posts with comments using post_id column
-SELECT_REDDIT_ENGAGEMENT_BY_TYPE = """
-SELECT 
+# Reply counts come from the per-post reddit_post_comment_stats rollup, plus
+# the comments ingested since the reddit_comment_stats job's last run, so the
+# cost follows the number of posts in range rather than their comments.
+# Params: (subreddit, start_epoch, end_epoch) twice, as for
+# REDDIT_TYPED_POSTS_CTE.
+SELECT_REDDIT_ENGAGEMENT_BY_TYPE = f"""
+WITH {REDDIT_POST_TYPES_WATERMARK_CTE},
+{REDDIT_TYPED_POSTS_CTE},
+wm AS (
+    SELECT (w->>0)::timestamptz AS ingested_at, w->>1 AS comment_id
+    FROM (
+        SELECT COALESCE(
+            (SELECT watermark FROM job_watermarks WHERE job_name = '{REDDIT_COMMENT_STATS_JOB}'),
+            '["-infinity", ""]'::jsonb
+        ) AS w
+    ) s
+),
+tail AS (
+    SELECT c.post_id, COUNT(*) AS reply_count
+    FROM comments c, wm
+    WHERE (c.ingested_at, c.comment_id) > (wm.ingested_at, wm.comment_id)
+        AND c.post_id IN (SELECT unique_name FROM typed_posts)
+        AND {REDDIT_VALID_COMMENT}
+    GROUP BY c.post_id
+)
+SELECT
     post_type,
     COUNT(*) AS total_threads,
     AVG(reply_count) AS avg_replies,
     SUM(reply_count) AS total_replies
 FROM (
-    SELECT 
-        p.unique_name,
-        p.title,
-        p.is_video,
-        COUNT(CASE WHEN c.body IS NOT NULL AND c.body != '' AND c.body != '[deleted]' AND c.body != '[removed]' THEN 1 END) AS reply_count,
-
-        /* ------------------------------------------
-           Enhanced Post-Type Classification (Matches 4chan)
-           ------------------------------------------ */
-        CASE 
-            /* ---- Strong question detection ---- */
-            WHEN LOWER(p.title) ~ '\\?$'
-              OR LOWER(p.title) LIKE '%%why%%'
-              OR LOWER(p.title) LIKE '%%how%%'
-              OR LOWER(p.title) LIKE '%%what do you think%%'
-              OR LOWER(p.title) LIKE '%%is it true%%'
-              OR LOWER(p.title) LIKE '%%should i%%'
-            THEN 'Question'
-
-            /* ---- Expanded news detection ---- */
-            WHEN LOWER(p.title) LIKE ANY (ARRAY[
-                '%%news%%', '%%breaking%%', '%%breaking news%%',
-                '%%report%%', '%%reported%%', '%%update%%',
-                '%%journalist%%', '%%press%%', '%%headline%%',
-                '%%alert%%', '%%source:%%'
-            ])
-            THEN 'News'
-
-            /* ---- Meme classification ---- */
-            WHEN COALESCE(p.is_video, false) = true
-              OR LOWER(p.title) LIKE ANY (ARRAY[
-                    '%%meme%%','%%dank%%','%%lol%%','%%funny%%',
-                    '%%cope%%','%%cringe%%','%%based%%','%%shitpost%%'
-              ])
-              OR LOWER(COALESCE(p.thumbnail, '')) IN ('image', 'gif')
-            THEN 'Meme'
-
-            /* ---- Opinion detection ---- */
-            WHEN LOWER(p.title) LIKE ANY (ARRAY[
-                '%%i think%%','%%in my opinion%%','%%imo%%',
-                '%%my view%%','%%my take%%','%%i believe%%',
-                '%%it seems to me%%','%%i feel like%%','%%personally%%'
-            ])
-            THEN 'Opinion'
-
-            ELSE 'Opinion'
-        END AS post_type
-
-    FROM posts p
-    LEFT JOIN comments c ON c.post_id = p.unique_name
-
-    WHERE 
-        p.subreddit = %s
-        AND p.created_at >= %s
-        AND p.created_at < %s
-
-    GROUP BY p.unique_name, p.title, p.is_video, p.thumbnail
+    SELECT
+        p.post_type,
+        COALESCE(s.comment_count, 0) + COALESCE(tail.reply_count, 0) AS reply_count
+    FROM typed_posts p
+    LEFT JOIN reddit_post_comment_stats s ON s.unique_name = p.unique_name
+    LEFT JOIN tail ON tail.post_id = p.unique_name
 ) t
 GROUP BY post_type
 ORDER BY post_type;
 """
 
+# Score histogram of a subreddit's posts over [start_epoch, end_epoch), read
+# from the reddit_post_metrics projection. width_bucket puts scores below the
+# first edge in bucket 0 and at or above the last edge in the last bucket.
+# Params: (bucket edges, subreddit, start_epoch, end_epoch)
+SELECT_REDDIT_SCORE_HISTOGRAM = """
+SELECT width_bucket(score, %s::int[]) AS bucket, COUNT(*) AS post_count
+FROM reddit_post_metrics
+WHERE subreddit = %s
+    AND created_at >= %s
+    AND created_at < %s
+    AND score IS NOT NULL
+GROUP BY bucket
+ORDER BY bucket
+"""
+
+# Score summary for the same range.
+# Params: (quantile fractions, subreddit, start_epoch, end_epoch)
+SELECT_REDDIT_SCORE_SUMMARY = """
+SELECT
+    COUNT(score) AS scored_posts,
+    AVG(score)::float8 AS avg_score,
+    percentile_cont(%s::float8[]) WITHIN GROUP (ORDER BY score) AS quantiles,
+    MAX(score) AS max_score
+FROM reddit_post_metrics
+WHERE subreddit = %s
+    AND created_at >= %s
+    AND created_at < %s
+"""
+
+# Upvote ratio and score per post type. Params: (subreddit, start_epoch, end_epoch)
+SELECT_REDDIT_UPVOTE_RATIO_BY_TYPE = """
+SELECT
+    t.post_type,
+    COUNT(m.upvote_ratio) AS posts,
+    AVG(m.upvote_ratio)::float8 AS avg_upvote_ratio,
+    percentile_cont(0.5) WITHIN GROUP (ORDER BY m.upvote_ratio) AS median_upvote_ratio,
+    AVG(m.score)::float8 AS avg_score
+FROM reddit_post_metrics m
+JOIN reddit_post_types t ON t.unique_name = m.unique_name
+WHERE m.subreddit = %s
+    AND m.created_at >= %s
+    AND m.created_at < %s
+    AND m.upvote_ratio IS NOT NULL
+GROUP BY t.post_type
+ORDER BY t.post_type
+"""
+
+# Comment counts reported by Reddit at crawl time (num_comments) against the
+# comments actually crawled (reddit_post_comment_stats.crawled_count, which
+# like num_comments includes deleted and removed comments), totals for the
+# range. Params: (subreddit, start_epoch, end_epoch)
+SELECT_REDDIT_COMMENT_COVERAGE = """
+SELECT
+    COUNT(*) AS posts,
+    COALESCE(SUM(m.num_comments), 0)::bigint AS reported_comments,
+    COALESCE(SUM(s.crawled_count), 0)::bigint AS observed_comments,
+    COUNT(*) FILTER (WHERE COALESCE(s.crawled_count, 0) < m.num_comments)
+        AS posts_missing_comments
+FROM reddit_post_metrics m
+LEFT JOIN reddit_post_comment_stats s ON s.unique_name = m.unique_name
+WHERE m.subreddit = %s
+    AND m.created_at >= %s
+    AND m.created_at < %s
+    AND m.num_comments IS NOT NULL
+"""
+
+# Posts whose crawled comments fall furthest short of num_comments.
+# Params: (subreddit, start_epoch, end_epoch, limit)
+SELECT_REDDIT_COMMENT_COVERAGE_GAPS = """
+SELECT
+    m.unique_name,
+    m.num_comments AS reported_comments,
+    COALESCE(s.crawled_count, 0) AS observed_comments
+FROM reddit_post_metrics m
+LEFT JOIN reddit_post_comment_stats s ON s.unique_name = m.unique_name
+WHERE m.subreddit = %s
+    AND m.created_at >= %s
+    AND m.created_at < %s
+    AND m.num_comments > COALESCE(s.crawled_count, 0)
+ORDER BY m.num_comments - COALESCE(s.crawled_count, 0) DESC, m.unique_name
+LIMIT %s
+"""
+
+# Comment-tree structure per (subreddit, post type) for posts created in
+# [start_epoch, end_epoch), from the reddit_comment_trees summaries.
+# Branching factor is replies per comment that has replies (the post counts
+# as a parent of its top-level comments); velocity is comments per hour
+# from the post's creation to its last comment, over at least a minute.
+# Params: (start_epoch, end_epoch, subreddit or NULL for all)
+SELECT_REDDIT_COMMENT_TREE_STRUCTURE = """
+SELECT
+    t.subreddit,
+    t.post_type,
+    COUNT(*) AS posts,
+    COUNT(tr.post_id) AS posts_with_comments,
+    COALESCE(SUM(tr.comment_count), 0)::bigint AS comments,
+    (SUM(tr.depth_sum)::float8 / NULLIF(SUM(tr.comment_count), 0)) AS avg_depth,
+    AVG(tr.max_depth)::float8 AS avg_max_depth,
+    MAX(tr.max_depth) AS max_depth,
+    (
+        SUM(tr.comment_count - tr.orphan_count)::float8
+        / NULLIF(SUM(tr.internal_count + (tr.top_level_count > 0)::int), 0)
+    ) AS branching_factor,
+    percentile_cont(0.5) WITHIN GROUP (
+        ORDER BY GREATEST(EXTRACT(EPOCH FROM tr.first_comment_time) - t.created_at, 0)
+    ) AS median_first_reply_seconds,
+    AVG(
+        tr.comment_count * 3600.0
+        / GREATEST(EXTRACT(EPOCH FROM tr.last_comment_time) - t.created_at, 60)
+    )::float8 AS avg_replies_per_hour
+FROM reddit_post_types t
+LEFT JOIN reddit_comment_trees tr ON tr.post_id = t.unique_name
+WHERE t.created_at >= %s
+    AND t.created_at < %s
+    AND t.subreddit = COALESCE(%s, t.subreddit)
+GROUP BY t.subreddit, t.post_type
+ORDER BY t.subreddit, t.post_type
+"""
+
+# One post's comment-tree summary. Params: (post_id)
+SELECT_REDDIT_COMMENT_TREE = """
+SELECT
+    tr.post_id,
+    t.subreddit,
+    t.post_type,
+    t.created_at,
+    tr.comment_count,
+    tr.top_level_count,
+    tr.orphan_count,
+    tr.max_depth,
+    tr.depth_sum,
+    tr.internal_count,
+    tr.first_comment_time,
+    tr.last_comment_time
+FROM reddit_comment_trees tr
+LEFT JOIN reddit_post_types t ON t.unique_name = tr.post_id
+WHERE tr.post_id = %s
+"""
+
+# Comments and comments with replies at each depth of one post's tree.
+# Params: (post_id)
+SELECT_REDDIT_COMMENT_TREE_LEVELS = """
+SELECT depth, COUNT(*) AS comments, COUNT(*) FILTER (WHERE child_count > 0) AS with_replies
+FROM reddit_comment_nodes
+WHERE post_id = %s
+GROUP BY depth
+ORDER BY depth
+"""
+
+# Activity heatmap: posts per UTC hour and post type over a date range,
+# shaped into a day x hour x post_type matrix by the route. Params as for
+# REDDIT_TYPED_POSTS_CTE.
+SELECT_REDDIT_ACTIVITY_HEATMAP = f"""
+WITH {REDDIT_POST_TYPES_WATERMARK_CTE},
+{REDDIT_TYPED_POSTS_CTE}
+SELECT created_at - created_at %% 3600 AS hour_start, post_type, COUNT(*) AS post_count
+FROM typed_posts
+GROUP BY hour_start, post_type
+"""
+
 # Get list of subreddits
 SELECT_ALL_SUBREDDITS = """
 SELECT unique_name, title, description, subscribers, over18
@@ -88,19 +293,82 @@ SELECT
 FROM posts;
 """
 
-# Daily post counts by subreddit
-SELECT_DAILY_POST_COUNTS_BY_SUBREDDIT = """
-SELECT 
-    DATE(created_timestamp) as date,
-    subreddit as subreddit_name,
-    COUNT(*) as counts
-FROM posts
-WHERE subreddit IN ('ArtificialInteligence', 'geopolitics', 'technology')
-    {date_filter}
-GROUP BY DATE(created_timestamp), subreddit
+REDDIT_DAILY_POSTS_JOB = "reddit_posts_daily"
+
+# Keyset position of the reddit_posts_daily job, for adding the posts it
+# hasn't counted yet. Posts without a created_timestamp are counted under
+# day '-infinity', so per-subreddit totals include them.
+REDDIT_DAILY_POSTS_WATERMARK_CTE = f"""wm AS (
+    SELECT (w->>0)::timestamptz AS ingested_at, w->>1 AS unique_name
+    FROM (
+        SELECT COALESCE(
+            (SELECT watermark FROM job_watermarks WHERE job_name = '{REDDIT_DAILY_POSTS_JOB}'),
+            '["-infinity", ""]'::jsonb
+        ) AS w
+    ) s
+)"""
+
+# Daily post counts for a list of subreddits: the (subreddit, day) rollup
+# plus the raw tail. Params: (subreddits, start_date, end_date) twice; a NULL
+# date leaves that side of the range open.
+SELECT_DAILY_POST_COUNTS_BY_SUBREDDIT = f"""
+WITH {REDDIT_DAILY_POSTS_WATERMARK_CTE},
+daily AS (
+    SELECT day, subreddit, post_count
+    FROM reddit_posts_daily
+    WHERE subreddit = ANY(%s)
+        AND day >= COALESCE(%s::date, '-infinity')
+        AND day <= COALESCE(%s::date, 'infinity')
+        AND isfinite(day)
+    UNION ALL
+    SELECT DATE(p.created_timestamp), p.subreddit, 1
+    FROM posts p, wm
+    WHERE (p.ingested_at, p.unique_name) > (wm.ingested_at, wm.unique_name)
+        AND p.subreddit = ANY(%s)
+        AND p.created_timestamp >= COALESCE(%s::date, '-infinity')
+        AND p.created_timestamp < COALESCE(%s::date + 1, 'infinity')
+)
+SELECT day AS date, subreddit AS subreddit_name, SUM(post_count)::bigint AS counts
+FROM daily
+GROUP BY day, subreddit
 ORDER BY date, subreddit
 """
 
+# Subreddits with the most posts, for the subreddit catalog: summed from the
+# (subreddit, day) rollup plus the raw tail instead of grouping every post.
+SELECT_SUBREDDIT_POST_COUNTS = f"""
+WITH {REDDIT_DAILY_POSTS_WATERMARK_CTE},
+counts AS (
+    SELECT subreddit, post_count
+    FROM reddit_posts_daily
+    UNION ALL
+    SELECT p.subreddit, 1
+    FROM posts p, wm
+    WHERE (p.ingested_at, p.unique_name) > (wm.ingested_at, wm.unique_name)
+        AND p.subreddit IS NOT NULL
+)
+SELECT subreddit, SUM(post_count)::bigint AS post_count
+FROM counts
+GROUP BY subreddit
+ORDER BY post_count DESC, subreddit
+LIMIT 20
+"""
+
+# Exact number of subreddits with posts for the approximate summary, from
+# the (subreddit, day) rollup plus the raw tail instead of all posts.
+SELECT_REDDIT_SUBREDDIT_COUNT = f"""
+WITH {REDDIT_DAILY_POSTS_WATERMARK_CTE}
+SELECT COUNT(*)
+FROM (
+    SELECT subreddit FROM reddit_posts_daily
+    UNION
+    SELECT p.subreddit
+    FROM posts p, wm
+    WHERE (p.ingested_at, p.unique_name) > (wm.ingested_at, wm.unique_name)
+        AND p.subreddit IS NOT NULL
+) s
+"""
+
 # Get Number SubScribers
 SELECT_NUMBER_OF_SUBSCRIBERS = """
 SELECT 
@@ -114,7 +382,23 @@ LIMIT 10
 
 # Get Average Toxicity by Subreddit
 SELECT_SUBREDDIT_TOXICITY = """
-SELECT subreddit, toxicity FROM toxicity WHERE toxicity IS NOT NULL
+SELECT subreddit, AVG(toxicity)::float8
+FROM toxicity
+WHERE toxicity IS NOT NULL
+GROUP BY subreddit
+"""
+
+# Toxicity distribution per subreddit. Template: {filters} holds optional
+# subreddit/scored_at conditions.
+SELECT_SUBREDDIT_TOXICITY_STATS = f"""
+SELECT
+    subreddit,
+    COUNT(*),
+    {TOXICITY_STATS_COLUMNS}
+FROM toxicity
+WHERE TRUE{{filters}}
+GROUP BY subreddit
+ORDER BY subreddit
 """
 
 # Event-related posts timeline for Reddit
@@ -196,3 +480,382 @@ FROM date_series ds
 LEFT JOIN event_counts ec ON ds.day = ec.day
 ORDER BY ds.day;
 """
+
+# Index-backed variants of the event timelines, matching a lower-case regex
+# alternation against the pg_trgm GIN indexes on LOWER(title) and
+# LOWER(body). See SELECT_CHAN_EVENT_RELATED_INDEXED.
+SELECT_REDDIT_EVENT_RELATED_INDEXED = SELECT_REDDIT_EVENT_RELATED.replace(
+    "LIKE ANY(%s)", "~ %s"
+)
+SELECT_REDDIT_EVENT_RELATED_ALL_INDEXED = SELECT_REDDIT_EVENT_RELATED_ALL.replace(
+    "LIKE ANY(%s)", "~ %s"
+)
+
+# Event timeline read from the event matcher's per-day counts, plus posts
+# and comments past the event jobs' watermarks matched with the event's
+# keyword regex. Template: {rollup_filter}/{post_filter}/{comment_filter}
+# carry the optional subreddit filter. Params: posts job name, comments job
+# name, date_series start/end, event id, start/end (+ subreddit), start/end
+# (+ subreddit), regex, start/end (+ subreddit), regex.
+SELECT_REDDIT_EVENT_TIMELINE = """
+WITH wm_posts AS (
+    SELECT (w->>0)::timestamptz AS ingested_at, w->>1 AS unique_name
+    FROM (
+        SELECT COALESCE(
+            (SELECT watermark FROM job_watermarks WHERE job_name = %s),
+            '["-infinity", ""]'::jsonb
+        ) AS w
+    ) s
+),
+wm_comments AS (
+    SELECT (w->>0)::timestamptz AS ingested_at, w->>1 AS comment_id
+    FROM (
+        SELECT COALESCE(
+            (SELECT watermark FROM job_watermarks WHERE job_name = %s),
+            '["-infinity", ""]'::jsonb
+        ) AS w
+    ) s
+),
+date_series AS (
+    SELECT generate_series(
+        DATE(TO_TIMESTAMP(%s)),
+        DATE(TO_TIMESTAMP(%s)) - INTERVAL '1 day',
+        INTERVAL '1 day'
+    )::DATE AS day
+),
+event_counts AS (
+    SELECT day, SUM(hits) AS count
+    FROM (
+        SELECT day, hits
+        FROM event_keyword_counts
+        WHERE event_id = %s
+          AND platform = 'reddit'
+          AND day >= DATE(TO_TIMESTAMP(%s))
+          AND day < DATE(TO_TIMESTAMP(%s))
+          {rollup_filter}
+        UNION ALL
+        SELECT DATE(p.created_timestamp), 1
+        FROM posts p, wm_posts w
+        WHERE (p.ingested_at, p.unique_name) > (w.ingested_at, w.unique_name)
+          AND p.created_timestamp >= TO_TIMESTAMP(%s)
+          AND p.created_timestamp < TO_TIMESTAMP(%s)
+          {post_filter}
+          AND LOWER(p.title) ~ %s
+        UNION ALL
+        SELECT DATE(c.created_timestamp), 1
+        FROM comments c, wm_comments w
+        WHERE (c.ingested_at, c.comment_id) > (w.ingested_at, w.comment_id)
+          AND c.created_timestamp >= TO_TIMESTAMP(%s)
+          AND c.created_timestamp < TO_TIMESTAMP(%s)
+          {comment_filter}
+          AND LOWER(c.body) ~ %s
+    ) c
+    GROUP BY day
+)
+SELECT ds.day, COALESCE(ec.count, 0)::bigint AS count
+FROM date_series ds
+LEFT JOIN event_counts ec ON ds.day = ec.day
+ORDER BY ds.day
+"""
+
+# Rows are stamped with clock_timestamp() when inserted (posts/comments
+# ingested_at) but only become visible when the crawler commits, so the
+# Reddit jobs stop short of the most recent rows rather than move their
+# watermark past rows of a transaction still in flight. The readers' raw
+# tails cover that margin.
+REDDIT_SETTLE_DELAY = "interval '5 minutes'"
+REDDIT_INGEST_SETTLED = f"ingested_at < now() - {REDDIT_SETTLE_DELAY}"
+
+# Classify the next batch of posts after the (ingested_at, unique_name)
+# watermark. Returns (processed, last ingested_at, unique_name).
+BACKFILL_REDDIT_POST_TYPES = f"""
+WITH batch AS (
+    SELECT unique_name, subreddit, created_at, title, is_video, thumbnail, ingested_at
+    FROM posts
+    WHERE (ingested_at, unique_name) > (%s::timestamptz, %s)
+        AND {REDDIT_INGEST_SETTLED}
+    ORDER BY ingested_at, unique_name
+    LIMIT %s
+),
+classified AS (
+    INSERT INTO reddit_post_types (unique_name, subreddit, created_at, post_type)
+    SELECT DISTINCT ON (unique_name)
+        unique_name, subreddit, created_at, {REDDIT_POST_TYPE_CASE}
+    FROM batch
+    ORDER BY unique_name, ingested_at DESC
+    ON CONFLICT (unique_name) DO UPDATE
+    SET subreddit = EXCLUDED.subreddit,
+        created_at = EXCLUDED.created_at,
+        post_type = EXCLUDED.post_type
+)
+SELECT (SELECT COUNT(*) FROM batch), ingested_at, unique_name
+FROM batch
+ORDER BY ingested_at DESC, unique_name DESC
+LIMIT 1
+"""
+
+# Next batch of posts / comments for the event matcher, after the job's
+# (ingested_at, key) watermark. Rows are walked in ingestion order, so late
+# crawls are matched too; the day and text are only returned for rows
+# created inside the event's span. Each returns the key, then (subreddit,
+# day, text). Params: start, end, watermark, limit.
+SELECT_REDDIT_POST_EVENT_BATCH = f"""
+SELECT
+    ingested_at,
+    unique_name,
+    subreddit,
+    CASE WHEN in_span THEN DATE(created_timestamp) END,
+    CASE WHEN in_span THEN title END
+FROM (
+    SELECT
+        ingested_at,
+        unique_name,
+        subreddit,
+        created_timestamp,
+        title,
+        created_timestamp >= TO_TIMESTAMP(%s)
+            AND created_timestamp < TO_TIMESTAMP(%s) AS in_span
+    FROM posts
+    WHERE (ingested_at, unique_name) > (%s::timestamptz, %s)
+        AND {REDDIT_INGEST_SETTLED}
+    ORDER BY ingested_at, unique_name
+    LIMIT %s
+) batch
+ORDER BY ingested_at, unique_name
+"""
+
+SELECT_REDDIT_COMMENT_EVENT_BATCH = f"""
+SELECT
+    ingested_at,
+    comment_id,
+    subreddit,
+    CASE WHEN in_span THEN DATE(created_timestamp) END,
+    CASE WHEN in_span THEN body END
+FROM (
+    SELECT
+        ingested_at,
+        comment_id,
+        subreddit,
+        created_timestamp,
+        body,
+        created_timestamp >= TO_TIMESTAMP(%s)
+            AND created_timestamp < TO_TIMESTAMP(%s) AS in_span
+    FROM comments
+    WHERE (ingested_at, comment_id) > (%s::timestamptz, %s)
+        AND {REDDIT_INGEST_SETTLED}
+    ORDER BY ingested_at, comment_id
+    LIMIT %s
+) batch
+ORDER BY ingested_at, comment_id
+"""
+
+# Fold the next batch of posts after the (ingested_at, unique_name)
+# watermark into the per-(subreddit, day) counters.
+ROLLUP_REDDIT_POSTS_DAILY = f"""
+WITH batch AS (
+    SELECT unique_name, subreddit, created_timestamp, ingested_at
+    FROM posts
+    WHERE (ingested_at, unique_name) > (%s::timestamptz, %s)
+        AND {REDDIT_INGEST_SETTLED}
+    ORDER BY ingested_at, unique_name
+    LIMIT %s
+),
+rolled AS (
+    INSERT INTO reddit_posts_daily AS d (subreddit, day, post_count)
+    SELECT subreddit, COALESCE(DATE(created_timestamp), '-infinity'), COUNT(*)
+    FROM batch
+    WHERE subreddit IS NOT NULL
+    GROUP BY 1, 2
+    ON CONFLICT (subreddit, day) DO UPDATE
+    SET post_count = d.post_count + EXCLUDED.post_count
+)
+SELECT (SELECT COUNT(*) FROM batch), ingested_at, unique_name
+FROM batch
+ORDER BY ingested_at DESC, unique_name DESC
+LIMIT 1
+"""
+
+# Fold the next batch of comments after the (ingested_at, comment_id)
+# watermark into their post's reddit_post_comment_stats row: replies
+# (REDDIT_VALID_COMMENT) in comment_count and the comment times, every
+# crawled comment, deleted and removed ones included, in crawled_count.
+ROLLUP_REDDIT_COMMENT_STATS = f"""
+WITH batch AS (
+    SELECT comment_id, post_id, body, created_timestamp, ingested_at
+    FROM comments
+    WHERE (ingested_at, comment_id) > (%s::timestamptz, %s)
+        AND {REDDIT_INGEST_SETTLED}
+    ORDER BY ingested_at, comment_id
+    LIMIT %s
+),
+rolled AS (
+    INSERT INTO reddit_post_comment_stats AS s
+        (unique_name, comment_count, crawled_count, first_comment_time, last_comment_time)
+    SELECT
+        c.post_id,
+        COUNT(*) FILTER (WHERE {REDDIT_VALID_COMMENT}),
+        COUNT(*),
+        MIN(c.created_timestamp) FILTER (WHERE {REDDIT_VALID_COMMENT}),
+        MAX(c.created_timestamp) FILTER (WHERE {REDDIT_VALID_COMMENT})
+    FROM batch c
+    WHERE c.post_id IS NOT NULL
+    GROUP BY c.post_id
+    ON CONFLICT (unique_name) DO UPDATE
+    SET comment_count = s.comment_count + EXCLUDED.comment_count,
+        crawled_count = s.crawled_count + EXCLUDED.crawled_count,
+        first_comment_time = LEAST(s.first_comment_time, EXCLUDED.first_comment_time),
+        last_comment_time = GREATEST(s.last_comment_time, EXCLUDED.last_comment_time)
+)
+SELECT (SELECT COUNT(*) FROM batch), ingested_at, comment_id
+FROM batch
+ORDER BY ingested_at DESC, comment_id DESC
+LIMIT 1
+"""
+
+# post_details fields projected into reddit_post_metrics and their SQL types.
+# A field that is missing or not a JSON number is stored as NULL.
+REDDIT_POST_METRIC_FIELDS = {
+    "score": "numeric::integer",
+    "upvote_ratio": "real",
+    "num_comments": "numeric::integer",
+}
+
+REDDIT_POST_METRIC_COLUMNS = ",\n        ".join(
+    f"CASE WHEN jsonb_typeof(post_details->'{field}') = 'number' "
+    f"THEN (post_details->>'{field}')::{cast} END"
+    for field, cast in REDDIT_POST_METRIC_FIELDS.items()
+)
+
+
+# Project the hot post_details fields of the next batch of posts after the
+# (details_updated_at, unique_name) watermark into reddit_post_metrics, so
+# engagement queries read narrow typed columns instead of parsing JSONB per
+# row. details_updated_at is set on insert and by a trigger whenever
+# post_details changes, so re-crawled scores are projected again.
+ROLLUP_REDDIT_POST_METRICS = f"""
+WITH batch AS (
+    SELECT unique_name, subreddit, created_at, post_details, details_updated_at
+    FROM posts
+    WHERE (details_updated_at, unique_name) > (%s::timestamptz, %s)
+        AND details_updated_at < now() - {REDDIT_SETTLE_DELAY}
+    ORDER BY details_updated_at, unique_name
+    LIMIT %s
+),
+projected AS (
+    INSERT INTO reddit_post_metrics AS m
+        (unique_name, subreddit, created_at, {", ".join(REDDIT_POST_METRIC_FIELDS)})
+    SELECT DISTINCT ON (unique_name)
+        unique_name,
+        subreddit,
+        created_at,
+        {REDDIT_POST_METRIC_COLUMNS}
+    FROM batch
+    WHERE unique_name IS NOT NULL
+    ORDER BY unique_name, details_updated_at DESC
+    ON CONFLICT (unique_name) DO UPDATE
+    SET subreddit = EXCLUDED.subreddit,
+        created_at = EXCLUDED.created_at,
+        score = EXCLUDED.score,
+        upvote_ratio = EXCLUDED.upvote_ratio,
+        num_comments = EXCLUDED.num_comments
+)
+SELECT (SELECT COUNT(*) FROM batch), details_updated_at, unique_name
+FROM batch
+ORDER BY details_updated_at DESC, unique_name DESC
+LIMIT 1
+"""
+
+# Next batch of comments after the (ingested_at, comment_id) watermark for
+# the comment-tree job, deleted and removed ones included since they still
+# hold their replies in place.
+SELECT_REDDIT_COMMENT_TREE_BATCH = f"""
+SELECT ingested_at, comment_id, post_id, parent_id, created_timestamp
+FROM comments
+WHERE (ingested_at, comment_id) > (%s::timestamptz, %s)
+    AND {REDDIT_INGEST_SETTLED}
+ORDER BY ingested_at, comment_id
+LIMIT %s
+"""
+
+# Already placed comments among a batch's comments and their parents
+SELECT_REDDIT_COMMENT_NODES = """
+SELECT comment_id, depth, child_count
+FROM reddit_comment_nodes
+WHERE comment_id = ANY(%s)
+"""
+
+# Stored orphans replying to a batch's new comments
+SELECT_REDDIT_COMMENT_ORPHANS = """
+SELECT comment_id, parent_key, post_id, depth
+FROM reddit_comment_nodes
+WHERE orphan AND parent_key = ANY(%s)
+"""
+
+INSERT_REDDIT_COMMENT_NODE = """
+INSERT INTO reddit_comment_nodes
+    (comment_id, post_id, parent_key, depth, child_count, orphan, created_timestamp)
+VALUES (%s, %s, %s, %s, %s, %s, %s)
+ON CONFLICT (comment_id) DO NOTHING
+"""
+
+# Move adopted orphans and everything below them by each orphan's depth
+# change, and clear their orphan flag. A node under two adopted orphans
+# (one adopted by a new comment inside the other's subtree) moves by both.
+# Returns (depth change total, deepest moved node, post_id) per post.
+# Params: (orphan keys, depth changes)
+ADOPT_REDDIT_COMMENT_ORPHANS = """
+WITH RECURSIVE moves AS (
+    SELECT a.comment_id, a.delta, true AS adopted, ARRAY[a.comment_id] AS path
+    FROM unnest(%s::text[], %s::int[]) AS a(comment_id, delta)
+    UNION ALL
+    SELECT n.comment_id, m.delta, false, m.path || n.comment_id
+    FROM moves m
+    JOIN reddit_comment_nodes n ON n.parent_key = m.comment_id
+    WHERE n.comment_id <> ALL(m.path)
+),
+moved AS (
+    UPDATE reddit_comment_nodes n
+    SET depth = n.depth + d.delta,
+        orphan = n.orphan AND NOT d.adopted
+    FROM (
+        SELECT comment_id, SUM(delta) AS delta, bool_or(adopted) AS adopted
+        FROM moves
+        GROUP BY comment_id
+    ) d
+    WHERE n.comment_id = d.comment_id
+    RETURNING n.post_id, d.delta, n.depth
+)
+SELECT SUM(delta)::bigint, MAX(depth), post_id
+FROM moved
+GROUP BY post_id
+"""
+
+UPDATE_REDDIT_COMMENT_TREE_DEPTHS = """
+UPDATE reddit_comment_trees
+SET depth_sum = depth_sum + %s,
+    max_depth = GREATEST(max_depth, %s)
+WHERE post_id = %s
+"""
+
+UPDATE_REDDIT_COMMENT_NODE_CHILDREN = """
+UPDATE reddit_comment_nodes
+SET child_count = child_count + %s
+WHERE comment_id = %s
+"""
+
+UPSERT_REDDIT_COMMENT_TREE = """
+INSERT INTO reddit_comment_trees AS t (
+    post_id, comment_count, top_level_count, orphan_count, max_depth,
+    depth_sum, internal_count, first_comment_time, last_comment_time
+)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+ON CONFLICT (post_id) DO UPDATE
+SET comment_count = t.comment_count + EXCLUDED.comment_count,
+    top_level_count = t.top_level_count + EXCLUDED.top_level_count,
+    orphan_count = t.orphan_count + EXCLUDED.orphan_count,
+    max_depth = GREATEST(t.max_depth, EXCLUDED.max_depth),
+    depth_sum = t.depth_sum + EXCLUDED.depth_sum,
+    internal_count = t.internal_count + EXCLUDED.internal_count,
+    first_comment_time = LEAST(t.first_comment_time, EXCLUDED.first_comment_time),
+    last_comment_time = GREATEST(t.last_comment_time, EXCLUDED.last_comment_time)
+"""
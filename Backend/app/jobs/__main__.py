@@ -0,0 +1,39 @@
+"""
+Run the incremental jobs from the command line, e.g. for the initial backfill:
+
+    python -m app.jobs                     # every job, once
+    python -m app.jobs chan_post_types     # selected jobs
+    python -m app.jobs --loop              # keep running every JOBS_INTERVAL_SECONDS
+"""
+
+import argparse
+import asyncio
+
+from app.jobs.runner import JOBS, JOBS_INTERVAL_SECONDS, run_jobs
+from app.utils.async_plsql import close_async_pools, init_async_pools
+from app.utils.logger import stop_log_listeners
+
+
+async def main(names, loop):
+    await init_async_pools()
+    try:
+        while True:
+            results = await run_jobs(names)
+            for name, processed in results.items():
+                print(f"{name}: {processed} rows")
+            if not loop:
+                break
+            await asyncio.sleep(JOBS_INTERVAL_SECONDS)
+    finally:
+        await close_async_pools()
+        stop_log_listeners()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run incremental rollup jobs")
+    parser.add_argument(
+        "jobs", nargs="*", help=f"job names ({', '.join(job.name for job in JOBS)})"
+    )
+    parser.add_argument("--loop", action="store_true", help="run periodically")
+    args = parser.parse_args()
+    asyncio.run(main(args.jobs, args.loop))
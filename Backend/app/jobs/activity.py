@@ -0,0 +1,16 @@
+from app.constants.queries import CHAN_ACTIVITY_JOB, ROLLUP_CHAN_ACTIVITY
+from app.jobs.base import IncrementalJob
+
+
+class ChanActivityJob(IncrementalJob):
+    """
+    Adds newly ingested 4chan posts to chan_activity_hourly (threads per
+    board, hour and post type) and chan_posts_daily (all posts per board and
+    day). Readers use the watermark to add the not-yet-rolled-up tail.
+    """
+
+    name = CHAN_ACTIVITY_JOB
+    database = "chan"
+    # (created_at, board_name, post_no) of the last post counted
+    initial_watermark = ["-infinity", "", -1]
+    batch_sql = ROLLUP_CHAN_ACTIVITY
@@ -0,0 +1,88 @@
+import json
+
+from app.utils.logger import Logger
+
+logger = Logger("logs").get_logger()
+
+SELECT_JOB_WATERMARK = "SELECT watermark FROM job_watermarks WHERE job_name = %s"
+
+UPSERT_JOB_WATERMARK = """
+INSERT INTO job_watermarks (job_name, watermark, updated_at)
+VALUES (%s, %s::jsonb, now())
+ON CONFLICT (job_name) DO UPDATE
+SET watermark = EXCLUDED.watermark, updated_at = EXCLUDED.updated_at
+"""
+
+# Serialises a job across API workers: the loser of the race skips the batch
+TRY_JOB_LOCK = "SELECT pg_try_advisory_xact_lock(hashtext(%s))"
+
+
+class IncrementalJob:
+    """
+    Base class for jobs that fold newly ingested rows into a derived table.
+
+    Each job walks its source table in keyset order from a stored watermark.
+    A batch is processed and the watermark advanced in the same transaction,
+    so every source row is applied exactly once, and re-running a job after a
+    crash simply resumes where the last committed batch ended.
+
+    Subclasses set ``name``, ``database``, ``initial_watermark`` and
+    ``batch_sql``. ``batch_sql`` receives ``watermark + [batch_size]`` as
+    params, does its inserts in data-modifying CTEs and returns a single row
+    ``(processed, *last_key)``, or no row when there is nothing to do.
+    The tables a job writes are created by ``app.migrations``.
+    """
+
+    name = ""
+    database = ""
+    initial_watermark = []
+    batch_sql = ""
+
+    def __init__(self, batch_size: int = 5000):
+        self.batch_size = batch_size
+
+    async def load_watermark(self, conn):
+        cur = await conn.execute(SELECT_JOB_WATERMARK, (self.name,))
+        row = await cur.fetchone()
+        return list(row[0]) if row else list(self.initial_watermark)
+
+    async def save_watermark(self, conn, watermark):
+        await conn.execute(
+            UPSERT_JOB_WATERMARK, (self.name, json.dumps(watermark, default=str))
+        )
+
+    async def process_batch(self, conn, watermark):
+        """Apply one batch after ``watermark``; return ``(processed, new_watermark)``."""
+        cur = await conn.execute(self.batch_sql, (*watermark, self.batch_size))
+        row = await cur.fetchone()
+        if row is None or not row[0]:
+            return 0, watermark
+        return row[0], list(row[1:])
+
+    async def run_batch(self, db):
+        async with db.connection() as conn:
+            async with conn.transaction():
+                cur = await conn.execute(TRY_JOB_LOCK, (self.name,))
+                if not (await cur.fetchone())[0]:
+                    logger.info("Job %s is running elsewhere, skipping", self.name)
+                    return 0
+
+                watermark = await self.load_watermark(conn)
+                processed, watermark = await self.process_batch(conn, watermark)
+                if processed:
+                    await self.save_watermark(conn, watermark)
+            return processed
+
+    async def run(self, db, max_batches=None):
+        """Process batches until caught up (or ``max_batches``); return rows processed."""
+        total = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            processed = await self.run_batch(db)
+            total += processed
+            batches += 1
+            if processed < self.batch_size:
+                break
+        if total:
+            logger.info("Job %s processed %d rows", self.name, total)
+        return total
@@ -0,0 +1,186 @@
+from collections import Counter, defaultdict
+
+from app.constants.reddit_queries import (
+    ADOPT_REDDIT_COMMENT_ORPHANS,
+    INSERT_REDDIT_COMMENT_NODE,
+    REDDIT_COMMENT_TREES_JOB,
+    SELECT_REDDIT_COMMENT_NODES,
+    SELECT_REDDIT_COMMENT_ORPHANS,
+    SELECT_REDDIT_COMMENT_TREE_BATCH,
+    UPDATE_REDDIT_COMMENT_NODE_CHILDREN,
+    UPDATE_REDDIT_COMMENT_TREE_DEPTHS,
+    UPSERT_REDDIT_COMMENT_TREE,
+)
+from app.jobs.base import IncrementalJob
+
+
+def comment_key(comment_id):
+    """Comment id without the ``t1_`` fullname prefix."""
+    return comment_id[3:] if comment_id.startswith("t1_") else comment_id
+
+
+def parent_key(parent_id):
+    """Key of the parent comment, or None when the comment replies to the post."""
+    if not parent_id or parent_id.startswith("t3_"):
+        return None
+    return comment_key(parent_id)
+
+
+def place_comments(comments, known, orphans_of=None):
+    """
+    Attach a batch of new comments to the stored comment trees.
+
+    ``comments`` maps comment key -> (post_id, parent key, created_timestamp)
+    and ``known`` maps the keys of already placed comments -> (depth,
+    child_count). Only the batch and its direct parents are needed, never a
+    whole tree. A comment whose parent hasn't been crawled is an orphan and
+    is placed at depth 2, the least its depth can be.
+
+    ``orphans_of`` maps the key of a new comment -> [(key, post_id, depth)]
+    of stored orphans that reply to it. They are adopted: the new comment
+    counts them as replies, and each moves (with its subtree) by the depth
+    change returned in ``adoptions``.
+
+    Returns ``(nodes, child_updates, trees, adoptions)``: node rows to
+    insert, child count increments for stored parents, per-post summary
+    deltas and ``(orphan key, depth change)`` pairs.
+    """
+    orphans_of = orphans_of or {}
+    new = {key: comment for key, comment in comments.items() if key not in known}
+
+    depths, orphans = {}, set()
+    for key in new:
+        # Walk up to a resolved ancestor, then assign depths back down
+        chain, seen, node = [], set(), key
+        while node not in depths:
+            chain.append(node)
+            seen.add(node)
+            parent = new[node][1]
+            if parent is None:
+                depth = 0
+                break
+            if parent in known:
+                depth = known[parent][0]
+                break
+            if parent not in new or parent in seen:
+                orphans.add(node)
+                depth = 1
+                break
+            node = parent
+        else:
+            depth = depths[node]
+        for node in reversed(chain):
+            depth += 1
+            depths[node] = depth
+
+    children = Counter(parent for _, parent, _ in new.values() if parent is not None)
+    for parent, adopted in orphans_of.items():
+        children[parent] += len(adopted)
+
+    # post_id -> [comments, top level, orphans, max depth, depth sum,
+    #             comments with replies, first comment, last comment]
+    trees = defaultdict(lambda: [0, 0, 0, 0, 0, 0, None, None])
+    first_replies = {}
+    for key, (post_id, parent, created) in new.items():
+        tree = trees[post_id]
+        tree[0] += 1
+        tree[1] += parent is None
+        tree[2] += key in orphans
+        tree[3] = max(tree[3], depths[key])
+        tree[4] += depths[key]
+        if created is not None:
+            tree[6] = created if tree[6] is None else min(tree[6], created)
+            tree[7] = created if tree[7] is None else max(tree[7], created)
+        if parent is not None and key not in orphans:
+            first_replies.setdefault(parent, post_id)
+
+    adoptions = []
+    for parent, adopted in orphans_of.items():
+        for key, post_id, depth in adopted:
+            adoptions.append((key, depths[parent] + 1 - depth))
+            trees[post_id][2] -= 1
+            first_replies.setdefault(parent, post_id)
+
+    # A comment becomes a parent with its first reply, whichever batch that is in
+    for parent, post_id in first_replies.items():
+        if parent in new or known[parent][1] == 0:
+            trees[post_id][5] += 1
+
+    nodes = [
+        (key, post_id, parent, depths[key], children[key], key in orphans, created)
+        for key, (post_id, parent, created) in new.items()
+    ]
+    child_updates = [
+        (count, parent) for parent, count in children.items() if parent in known
+    ]
+    trees = [(post_id, *tree) for post_id, tree in trees.items()]
+    return nodes, child_updates, trees, adoptions
+
+
+class RedditCommentTreeJob(IncrementalJob):
+    """
+    Builds Reddit comment trees incrementally: each new comment is stored as
+    a node (depth, reply count) under its parent in reddit_comment_nodes, and
+    its post's reddit_comment_trees summary (size, depth, parents, first and
+    last comment) is updated in place. Comments are walked in ingestion
+    order; one crawled before its parent is kept as an orphan and moved under
+    the parent, subtree and summary included, once the parent arrives. New
+    comments never rebuild a tree, and memory is bounded by the batch size
+    however large a thread grows.
+    """
+
+    name = REDDIT_COMMENT_TREES_JOB
+    database = "reddit"
+    # (ingested_at, comment_id) of the last comment placed
+    initial_watermark = ["-infinity", ""]
+
+    async def process_batch(self, conn, watermark):
+        cur = await conn.execute(
+            SELECT_REDDIT_COMMENT_TREE_BATCH, (*watermark, self.batch_size)
+        )
+        rows = await cur.fetchall()
+        if not rows:
+            return 0, watermark
+
+        comments = {}
+        for _, comment_id, post_id, parent_id, created in rows:
+            if not comment_id or not post_id:
+                continue
+            comments.setdefault(
+                comment_key(comment_id), (post_id, parent_key(parent_id), created)
+            )
+
+        lookup = set(comments)
+        lookup.update(parent for _, parent, _ in comments.values() if parent)
+        cur = await conn.execute(SELECT_REDDIT_COMMENT_NODES, (list(lookup),))
+        known = {key: (depth, count) for key, depth, count in await cur.fetchall()}
+
+        new = [key for key in comments if key not in known]
+        cur = await conn.execute(SELECT_REDDIT_COMMENT_ORPHANS, (new,))
+        orphans_of = defaultdict(list)
+        for key, parent, post_id, depth in await cur.fetchall():
+            orphans_of[parent].append((key, post_id, depth))
+
+        nodes, child_updates, trees, adoptions = place_comments(
+            comments, known, orphans_of
+        )
+        async with conn.cursor() as cur:
+            if nodes:
+                await cur.executemany(INSERT_REDDIT_COMMENT_NODE, nodes)
+            if child_updates:
+                await cur.executemany(
+                    UPDATE_REDDIT_COMMENT_NODE_CHILDREN, child_updates
+                )
+            if trees:
+                await cur.executemany(UPSERT_REDDIT_COMMENT_TREE, trees)
+            if adoptions:
+                # Move the adopted subtrees, new nodes under them included,
+                # then their posts' depth totals
+                keys, deltas = zip(*adoptions)
+                await cur.execute(
+                    ADOPT_REDDIT_COMMENT_ORPHANS, (list(keys), list(deltas))
+                )
+                moved = await cur.fetchall()
+                await cur.executemany(UPDATE_REDDIT_COMMENT_TREE_DEPTHS, moved)
+
+        return len(rows), list(rows[-1][:2])
@@ -0,0 +1,12 @@
+from app.constants.queries import CHAN_COUNTRY_JOB, ROLLUP_CHAN_COUNTRIES
+from app.jobs.base import IncrementalJob
+
+
+class ChanCountryJob(IncrementalJob):
+    """Adds newly ingested 4chan posts to the chan_country_daily counters."""
+
+    name = CHAN_COUNTRY_JOB
+    database = "chan"
+    # (created_at, board_name, post_no) of the last post counted
+    initial_watermark = ["-infinity", "", -1]
+    batch_sql = ROLLUP_CHAN_COUNTRIES
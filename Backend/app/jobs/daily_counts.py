@@ -0,0 +1,15 @@
+from app.constants.reddit_queries import (
+    REDDIT_DAILY_POSTS_JOB,
+    ROLLUP_REDDIT_POSTS_DAILY,
+)
+from app.jobs.base import IncrementalJob
+
+
+class RedditDailyPostsJob(IncrementalJob):
+    """Adds newly ingested Reddit posts to the reddit_posts_daily counters."""
+
+    name = REDDIT_DAILY_POSTS_JOB
+    database = "reddit"
+    # (ingested_at, unique_name) of the last post counted
+    initial_watermark = ["-infinity", ""]
+    batch_sql = ROLLUP_REDDIT_POSTS_DAILY
@@ -0,0 +1,95 @@
+import asyncio
+from collections import Counter
+
+from app.constants.queries import SELECT_CHAN_EVENT_BATCH, UPSERT_EVENT_KEYWORD_COUNTS
+from app.constants.reddit_queries import (
+    SELECT_REDDIT_COMMENT_EVENT_BATCH,
+    SELECT_REDDIT_POST_EVENT_BATCH,
+)
+from app.jobs.base import IncrementalJob
+from app.utils.events import EVENT_SOURCES, EVENTS, event_job_name, event_span
+from app.utils.keywords import KeywordAutomaton
+
+# source -> (database, platform, batch query, initial keyset watermark)
+SOURCES = {
+    "chan": ("chan", "chan", SELECT_CHAN_EVENT_BATCH, ["-infinity", "", -1]),
+    "reddit_posts": (
+        "reddit",
+        "reddit",
+        SELECT_REDDIT_POST_EVENT_BATCH,
+        ["-infinity", ""],
+    ),
+    "reddit_comments": (
+        "reddit",
+        "reddit",
+        SELECT_REDDIT_COMMENT_EVENT_BATCH,
+        ["-infinity", ""],
+    ),
+}
+
+
+class EventMatchJob(IncrementalJob):
+    """
+    Counts the posts (or comments) mentioning one event's keywords per
+    (community, day) into event_keyword_counts.
+
+    A newly registered event backfills in batches, independently of the
+    others. 4chan posts are walked inside the event's span only; Reddit
+    posts and comments are walked in ingestion order, since they can be
+    crawled long after they were created, and those outside the span are
+    skipped.
+    Matching runs through an Aho-Corasick automaton in a worker thread,
+    since it is CPU-bound Python rather than SQL.
+    """
+
+    def __init__(self, event, source, batch_size: int = 5000):
+        super().__init__(batch_size)
+        self.event = event
+        self.name = event_job_name(event, source)
+        database, platform, batch_sql, initial_watermark = SOURCES[source]
+        self.database = database
+        self.platform = platform
+        self.batch_sql = batch_sql
+        self.initial_watermark = initial_watermark
+        self.start_ts, self.end_ts = event_span(event)
+        self.automaton = KeywordAutomaton(event.keywords)
+
+    def count_hits(self, rows):
+        # rows: keyset columns, then (community, day, *texts)
+        width = len(self.initial_watermark)
+        hits = Counter()
+        for row in rows:
+            community, day, *texts = row[width:]
+            if day is not None and any(self.automaton.search(t) for t in texts):
+                hits[(community or "", day)] += 1
+        return hits
+
+    async def process_batch(self, conn, watermark):
+        cur = await conn.execute(
+            self.batch_sql, (self.start_ts, self.end_ts, *watermark, self.batch_size)
+        )
+        rows = await cur.fetchall()
+        if not rows:
+            return 0, watermark
+
+        hits = await asyncio.to_thread(self.count_hits, rows)
+        if hits:
+            async with conn.cursor() as cur:
+                await cur.executemany(
+                    UPSERT_EVENT_KEYWORD_COUNTS,
+                    [
+                        (self.event.id, self.platform, community, day, count)
+                        for (community, day), count in hits.items()
+                    ],
+                )
+        return len(rows), list(rows[-1][: len(self.initial_watermark)])
+
+
+def event_jobs(batch_size: int = 5000):
+    """One matcher job per registered event and source table."""
+    return [
+        EventMatchJob(event, source, batch_size)
+        for event in EVENTS.values()
+        for platform in event.platforms
+        for source in EVENT_SOURCES[platform]
+    ]
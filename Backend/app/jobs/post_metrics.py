@@ -0,0 +1,16 @@
+from app.constants.reddit_queries import ROLLUP_REDDIT_POST_METRICS
+from app.jobs.base import IncrementalJob
+
+
+class RedditPostMetricsJob(IncrementalJob):
+    """
+    Projects score, upvote_ratio and num_comments out of Reddit posts'
+    post_details JSONB into reddit_post_metrics, for new posts and again
+    whenever the crawler rewrites a post's post_details.
+    """
+
+    name = "reddit_post_metrics"
+    database = "reddit"
+    # (details_updated_at, unique_name) of the last projected post
+    initial_watermark = ["-infinity", ""]
+    batch_sql = ROLLUP_REDDIT_POST_METRICS
@@ -0,0 +1,26 @@
+from app.constants.queries import BACKFILL_CHAN_POST_TYPES, CHAN_POST_TYPES_JOB
+from app.constants.reddit_queries import (
+    BACKFILL_REDDIT_POST_TYPES,
+    REDDIT_POST_TYPES_JOB,
+)
+from app.jobs.base import IncrementalJob
+
+
+class ChanPostTypeJob(IncrementalJob):
+    """Classifies new 4chan threads into chan_post_types."""
+
+    name = CHAN_POST_TYPES_JOB
+    database = "chan"
+    # (created_at, board_name, post_no) of the last classified thread
+    initial_watermark = ["-infinity", "", -1]
+    batch_sql = BACKFILL_CHAN_POST_TYPES
+
+
+class RedditPostTypeJob(IncrementalJob):
+    """Classifies new Reddit posts into reddit_post_types."""
+
+    name = REDDIT_POST_TYPES_JOB
+    database = "reddit"
+    # (ingested_at, unique_name) of the last classified post
+    initial_watermark = ["-infinity", ""]
+    batch_sql = BACKFILL_REDDIT_POST_TYPES
@@ -0,0 +1,107 @@
+import asyncio
+import os
+from pathlib import Path
+
+from app.jobs.activity import ChanActivityJob
+from app.jobs.comment_trees import RedditCommentTreeJob
+from app.jobs.countries import ChanCountryJob
+from app.jobs.daily_counts import RedditDailyPostsJob
+from app.jobs.events import event_jobs
+from app.jobs.post_metrics import RedditPostMetricsJob
+from app.jobs.post_types import ChanPostTypeJob, RedditPostTypeJob
+from app.jobs.thread_lifecycle import (
+    ChanThreadLifecycleJob,
+    ChanThreadLifecycleRefreshJob,
+)
+from app.jobs.thread_stats import ChanThreadStatsJob, RedditCommentStatsJob
+from app.utils.async_plsql import get_async_db
+from app.utils.cache import get_cache
+from app.utils.logger import Logger
+from dotenv import load_dotenv
+
+load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+
+logger = Logger("logs").get_logger()
+
+JOBS_ENABLED = os.getenv("JOBS_ENABLED", "true").lower() == "true"
+JOBS_INTERVAL_SECONDS = float(os.getenv("JOBS_INTERVAL_SECONDS", "300"))
+JOBS_BATCH_SIZE = int(os.getenv("JOBS_BATCH_SIZE", "5000"))
+
+# Run in order: later jobs may read tables maintained by earlier ones
+JOBS = [
+    ChanPostTypeJob(JOBS_BATCH_SIZE),
+    RedditPostTypeJob(JOBS_BATCH_SIZE),
+    ChanThreadStatsJob(JOBS_BATCH_SIZE),
+    ChanThreadLifecycleJob(JOBS_BATCH_SIZE),
+    ChanThreadLifecycleRefreshJob(JOBS_BATCH_SIZE),
+    ChanActivityJob(JOBS_BATCH_SIZE),
+    ChanCountryJob(JOBS_BATCH_SIZE),
+    RedditDailyPostsJob(JOBS_BATCH_SIZE),
+    RedditCommentStatsJob(JOBS_BATCH_SIZE),
+    RedditPostMetricsJob(JOBS_BATCH_SIZE),
+    RedditCommentTreeJob(JOBS_BATCH_SIZE),
+    *event_jobs(JOBS_BATCH_SIZE),
+]
+
+
+def get_jobs(names=None):
+    if not names:
+        return list(JOBS)
+    known = {job.name: job for job in JOBS}
+    unknown = [name for name in names if name not in known]
+    if unknown:
+        raise ValueError(f"Unknown job(s): {', '.join(unknown)}")
+    return [known[name] for name in names]
+
+
+async def run_jobs(names=None):
+    """Run each job until it has caught up; return rows processed per job."""
+    results = {}
+    for job in get_jobs(names):
+        try:
+            db = get_async_db(job.database)
+        except RuntimeError:
+            logger.warning("Skipping job %s: no '%s' pool", job.name, job.database)
+            continue
+
+        try:
+            results[job.name] = await job.run(db)
+        except Exception as e:
+            logger.exception("Job %s failed: %s", job.name, e)
+            continue
+
+        # Derived tables changed, so cached dashboard results are stale
+        if results[job.name]:
+            get_cache().invalidate(job.database)
+    return results
+
+
+async def _job_loop(interval, after=None):
+    if after is not None:
+        # Let startup migrations create the job tables first
+        await asyncio.wait([after])
+    while True:
+        await run_jobs()
+        await asyncio.sleep(interval)
+
+
+def start_job_loop(after=None):
+    """
+    Schedule the periodic job loop on the running event loop (lifespan),
+    starting once the ``after`` task (if any) has finished.
+    """
+    if not JOBS_ENABLED:
+        logger.info("Background jobs disabled (JOBS_ENABLED=false)")
+        return None
+    logger.info("Starting background jobs every %ss", JOBS_INTERVAL_SECONDS)
+    return asyncio.create_task(_job_loop(JOBS_INTERVAL_SECONDS, after), name="jobs")
+
+
+async def stop_background_task(task):
+    if task is None:
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
@@ -0,0 +1,85 @@
+import json
+import os
+from pathlib import Path
+
+from app.constants.queries import (
+    CHAN_THREAD_LIFECYCLE_JOB,
+    REFRESH_CHAN_THREAD_LIFECYCLE_STATE,
+    ROLLUP_CHAN_THREAD_LIFECYCLE,
+    UPDATE_CHAN_THREAD_BUMP_LIMIT_TIMES,
+)
+from app.jobs.base import IncrementalJob
+from dotenv import load_dotenv
+
+load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+
+# Replies after which a thread stops being bumped, and per-board exceptions
+# as a JSON object, e.g. {"vg": 500}
+CHAN_BUMP_LIMIT = int(os.getenv("CHAN_BUMP_LIMIT", "300"))
+CHAN_BUMP_LIMITS = json.loads(os.getenv("CHAN_BUMP_LIMITS") or "{}")
+# Days after its start a thread not yet archived is still re-read
+CHAN_LIFECYCLE_REFRESH_DAYS = float(os.getenv("CHAN_LIFECYCLE_REFRESH_DAYS", "7"))
+
+
+class ChanThreadLifecycleJob(IncrementalJob):
+    """
+    Keeps chan_thread_lifecycle: per 4chan thread its start, reply count,
+    last reply, the time its bump-limit reply was posted and its archive
+    state. Lifetime, time to bump limit, replies per hour and archive
+    latency are generated columns of the table.
+    """
+
+    name = CHAN_THREAD_LIFECYCLE_JOB
+    database = "chan"
+    # (created_at, board_name, post_no) of the last post applied
+    initial_watermark = ["-infinity", "", -1]
+    batch_sql = ROLLUP_CHAN_THREAD_LIFECYCLE
+
+    async def process_batch(self, conn, watermark):
+        cur = await conn.execute(self.batch_sql, (*watermark, self.batch_size))
+        row = await cur.fetchone()
+        if row is None or not row[0]:
+            return 0, watermark
+
+        # Threads of the batch's replies that reached the bump limit take
+        # its time from their replies ordered by post_time
+        await conn.execute(
+            UPDATE_CHAN_THREAD_BUMP_LIMIT_TIMES,
+            (
+                json.dumps(CHAN_BUMP_LIMITS),
+                CHAN_BUMP_LIMIT,
+                *watermark,
+                *row[1:],
+            ),
+        )
+        return row[0], list(row[1:])
+
+
+class ChanThreadLifecycleRefreshJob(IncrementalJob):
+    """
+    Re-reads the opening post of chan_thread_lifecycle threads not yet
+    archived and started within CHAN_LIFECYCLE_REFRESH_DAYS, so their
+    archive and bump-limit state follows the latest crawl of the thread.
+    Each run walks the open threads once in key order, then the next run
+    starts over.
+    """
+
+    name = "chan_thread_lifecycle_refresh"
+    database = "chan"
+    # (board_name, thread_no) of the last thread re-read in this pass
+    initial_watermark = ["", -1]
+    batch_sql = REFRESH_CHAN_THREAD_LIFECYCLE_STATE
+
+    async def process_batch(self, conn, watermark):
+        window = int(CHAN_LIFECYCLE_REFRESH_DAYS * 86400)
+        cur = await conn.execute(self.batch_sql, (window, *watermark, self.batch_size))
+        row = await cur.fetchone()
+        if row is None or not row[0]:
+            if watermark != self.initial_watermark:
+                # Past the last open thread: the next run starts over
+                await self.save_watermark(conn, self.initial_watermark)
+            return 0, watermark
+        if row[0] < self.batch_size:
+            # Pass finished; the next run starts from the first thread again
+            return row[0], self.initial_watermark
+        return row[0], list(row[1:])
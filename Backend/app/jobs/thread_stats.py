@@ -0,0 +1,30 @@
+from app.constants.queries import CHAN_THREAD_STATS_JOB, ROLLUP_CHAN_THREAD_STATS
+from app.constants.reddit_queries import (
+    REDDIT_COMMENT_STATS_JOB,
+    ROLLUP_REDDIT_COMMENT_STATS,
+)
+from app.jobs.base import IncrementalJob
+
+
+class ChanThreadStatsJob(IncrementalJob):
+    """Adds newly ingested 4chan replies to their thread's chan_thread_stats row."""
+
+    name = CHAN_THREAD_STATS_JOB
+    database = "chan"
+    # (created_at, board_name, post_no) of the last reply counted
+    initial_watermark = ["-infinity", "", -1]
+    batch_sql = ROLLUP_CHAN_THREAD_STATS
+
+
+class RedditCommentStatsJob(IncrementalJob):
+    """
+    Adds newly ingested Reddit comments to their post's
+    reddit_post_comment_stats row (replies, all crawled comments,
+    first/last comment time).
+    """
+
+    name = REDDIT_COMMENT_STATS_JOB
+    database = "reddit"
+    # (ingested_at, comment_id) of the last comment counted
+    initial_watermark = ["-infinity", ""]
+    batch_sql = ROLLUP_REDDIT_COMMENT_STATS
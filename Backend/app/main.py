@@ -2,16 +2,56 @@ from copilotkit import CopilotKitSDK, LangGraphAgent
 from copilotkit.integrations.fastapi import add_fastapi_endpoint
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from langchain_core.messages import HumanMessage
 import json
 import asyncio
+from contextlib import asynccontextmanager
 from app.agent.sql_agent import sql_agent
+from app.jobs.runner import start_job_loop, stop_background_task
+from app.migrations.runner import DB_AUTO_MIGRATE, prepare_schema, schema_readiness
+from app.routes.admin import router as admin_router
 from app.routes.chan import router as chan_router
 from app.routes.comparison import router as comparison_router
+from app.routes.dashboard import router as dashboard_router
 from app.routes.reddit import router as reddit_router
+from app.utils.catalog import start_catalog_refresh
+from app.utils.async_plsql import async_pool_stats, close_async_pools, init_async_pools
+from app.utils.db_pool import close_pools, init_pools, pool_stats
+from app.utils.logger import stop_log_listeners
+from app.utils.metrics import (
+    EXPOSITION_CONTENT_TYPE,
+    MetricsMiddleware,
+    TimedJSONResponse,
+    render_metrics,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Async pools serve the routes, the sync pools serve the SQL agent
+    init_pools()
+    await init_async_pools()
+    if DB_AUTO_MIGRATE:
+        # Index builds can take a while on a large archive, so don't hold up
+        # startup; /health/ready reports when the tables are there
+        schema = asyncio.create_task(prepare_schema(), name="schema")
+    else:
+        # Nothing to build: refuse to start without the required tables
+        await prepare_schema()
+        schema = None
+    jobs = start_job_loop(after=schema)
+    catalog_refresh = start_catalog_refresh()
+    yield
+    await stop_background_task(catalog_refresh)
+    await stop_background_task(jobs)
+    await stop_background_task(schema)
+    await close_async_pools()
+    close_pools()
+    stop_log_listeners()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan, default_response_class=TimedJSONResponse)
 
 # Allow Next.js (localhost:3000)
 app.add_middleware(
@@ -20,12 +60,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "ETag", "Last-Modified"],
 )
+app.add_middleware(MetricsMiddleware)
 
 
 app.include_router(chan_router)
 app.include_router(reddit_router)
 app.include_router(comparison_router)
+app.include_router(dashboard_router)
+app.include_router(admin_router)
 
 # CopilotKit SDK setup
 sdk = CopilotKitSDK(
@@ -65,3 +109,28 @@ async def sql_stream(request: Request):
 def health():
     """Health check."""
     return {"status": "ok"}
+
+
+@app.get("/health/db")
+def health_db():
+    """Database pool health check and checkout metrics."""
+    pools = pool_stats(check=True)
+    status = "ok" if all(p["healthy"] for p in pools.values()) else "degraded"
+    return {"status": status, "pools": pools, "async_pools": async_pool_stats()}
+
+
+@app.get("/health/ready")
+async def health_ready():
+    """Readiness: 503 until every database has the tables the routes read."""
+    ready, problems = await schema_readiness()
+    if not ready:
+        return TimedJSONResponse(
+            {"status": "not ready", "schema": problems}, status_code=503
+        )
+    return {"status": "ready"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus text exposition of query, pool and route metrics."""
+    return PlainTextResponse(render_metrics(), media_type=EXPOSITION_CONTENT_TYPE)
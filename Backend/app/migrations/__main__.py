@@ -0,0 +1,34 @@
+"""
+Apply or check the schema migrations:
+
+    python -m app.migrations            # apply pending migrations
+    python -m app.migrations --check    # report pending migrations / missing or invalid indexes
+"""
+
+import argparse
+import asyncio
+import json
+
+from app.migrations.runner import report_schema, run_migrations
+from app.utils.async_plsql import close_async_pools, init_async_pools
+from app.utils.logger import stop_log_listeners
+
+
+async def main(check_only):
+    await init_async_pools()
+    try:
+        if not check_only:
+            await run_migrations()
+        print(json.dumps(await report_schema(), indent=2))
+    finally:
+        await close_async_pools()
+        stop_log_listeners()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply schema migrations")
+    parser.add_argument(
+        "--check", action="store_true", help="only report, don't migrate"
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.check))
@@ -0,0 +1,245 @@
+import os
+import re
+from pathlib import Path
+
+from app.migrations.versions import MIGRATIONS
+from app.utils.async_plsql import get_async_db
+from app.utils.db_pool import DATABASES
+from app.utils.logger import Logger
+from dotenv import load_dotenv
+
+load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+
+logger = Logger("logs").get_logger()
+
+DB_AUTO_MIGRATE = os.getenv("DB_AUTO_MIGRATE", "true").lower() == "true"
+
+CREATE_SCHEMA_MIGRATIONS = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INT PRIMARY KEY,
+    name TEXT NOT NULL,
+    applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+)
+"""
+
+SCHEMA_MIGRATIONS_EXISTS = "SELECT to_regclass('schema_migrations') IS NOT NULL"
+
+SELECT_APPLIED_MIGRATIONS = "SELECT version FROM schema_migrations"
+
+INSERT_SCHEMA_MIGRATION = """
+INSERT INTO schema_migrations (version, name) VALUES (%s, %s)
+ON CONFLICT (version) DO NOTHING
+"""
+
+SELECT_EXISTING_INDEXES = "SELECT indexname FROM pg_indexes WHERE indexname = ANY(%s)"
+
+# Indexes left INVALID by a CREATE INDEX CONCURRENTLY that failed part way
+SELECT_INVALID_INDEXES = """
+SELECT c.relname
+FROM pg_index i
+JOIN pg_class c ON c.oid = i.indexrelid
+WHERE NOT i.indisvalid AND c.relname = ANY(%s)
+"""
+
+# One migrator at a time per database, across API workers and the CLI
+MIGRATION_LOCK = "hashtext('schema_migrations')"
+
+_INDEX_NAME = re.compile(
+    r"CREATE\s+(?:UNIQUE\s+)?INDEX\s+(?:CONCURRENTLY\s+)?IF\s+NOT\s+EXISTS\s+(\w+)",
+    re.IGNORECASE,
+)
+
+
+def migrations_for(database):
+    return [m for m in MIGRATIONS if database in m.databases]
+
+
+def _index_names(migration):
+    return [
+        name
+        for statement in migration.statements
+        for name in _INDEX_NAME.findall(statement)
+    ]
+
+
+def expected_indexes(database):
+    """Index names the migrations create on ``database``."""
+    return [
+        name
+        for migration in migrations_for(database)
+        for name in _index_names(migration)
+    ]
+
+
+async def _applied_versions(conn):
+    cur = await conn.execute(SCHEMA_MIGRATIONS_EXISTS)
+    if not (await cur.fetchone())[0]:
+        return set()
+    cur = await conn.execute(SELECT_APPLIED_MIGRATIONS)
+    return {row[0] for row in await cur.fetchall()}
+
+
+async def _invalid_indexes(conn, names):
+    if not names:
+        return []
+    cur = await conn.execute(SELECT_INVALID_INDEXES, (names,))
+    return [row[0] for row in await cur.fetchall()]
+
+
+async def _apply(conn, migration):
+    logger.info("Applying migration %d (%s)", migration.version, migration.name)
+    if migration.transactional:
+        async with conn.transaction():
+            for statement in migration.statements:
+                await conn.execute(statement)
+            await conn.execute(
+                INSERT_SCHEMA_MIGRATION, (migration.version, migration.name)
+            )
+    else:
+        # IF NOT EXISTS would skip an index an interrupted build left
+        # invalid, so drop those and build them again
+        names = _index_names(migration)
+        for name in await _invalid_indexes(conn, names):
+            logger.warning("Dropping invalid index %s", name)
+            await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+        for statement in migration.statements:
+            await conn.execute(statement)
+        invalid = await _invalid_indexes(conn, names)
+        if invalid:
+            raise RuntimeError(
+                f"Migration {migration.version} left invalid indexes: {', '.join(invalid)}"
+            )
+        await conn.execute(INSERT_SCHEMA_MIGRATION, (migration.version, migration.name))
+
+
+async def migrate(database):
+    """Apply the pending migrations for one database; return the versions applied."""
+    applied_now = []
+    async with get_async_db(database).connection() as conn:
+        await conn.execute(f"SELECT pg_advisory_lock({MIGRATION_LOCK})")
+        try:
+            await conn.execute(CREATE_SCHEMA_MIGRATIONS)
+            applied = await _applied_versions(conn)
+            for migration in migrations_for(database):
+                # Re-run a recorded migration whose indexes are invalid, as
+                # recorded by runs before the validity check
+                if migration.version in applied and (
+                    migration.transactional
+                    or not await _invalid_indexes(conn, _index_names(migration))
+                ):
+                    continue
+                await _apply(conn, migration)
+                applied_now.append(migration.version)
+        finally:
+            await conn.execute(f"SELECT pg_advisory_unlock({MIGRATION_LOCK})")
+    return applied_now
+
+
+async def check_schema(database):
+    """
+    Report pending migrations and expected indexes missing or invalid on one
+    database. ``blocking_migrations`` are the pending ones that create tables
+    or columns the routes and jobs read (every transactional migration); the
+    others only build indexes, so without them queries are slower, not broken.
+    """
+    async with get_async_db(database).connection() as conn:
+        applied = await _applied_versions(conn)
+        indexes = expected_indexes(database)
+        cur = await conn.execute(SELECT_EXISTING_INDEXES, (indexes,))
+        existing = {row[0] for row in await cur.fetchall()}
+        invalid = await _invalid_indexes(conn, indexes)
+    pending = [m for m in migrations_for(database) if m.version not in applied]
+    return {
+        "pending_migrations": [m.version for m in pending],
+        "blocking_migrations": [m.version for m in pending if m.transactional],
+        "missing_indexes": [name for name in indexes if name not in existing],
+        "invalid_indexes": invalid,
+    }
+
+
+def _configured_databases():
+    return [name for name, env_var in DATABASES.items() if os.getenv(env_var)]
+
+
+async def run_migrations():
+    for database in _configured_databases():
+        applied = await migrate(database)
+        if applied:
+            logger.info("Applied migrations %s on '%s'", applied, database)
+
+
+async def report_schema():
+    """Log pending migrations and missing or invalid indexes per database; return the report."""
+    report = {}
+    for database in _configured_databases():
+        try:
+            report[database] = status = await check_schema(database)
+        except Exception as e:
+            logger.error("Schema check failed for '%s': %s", database, e)
+            continue
+        if status["pending_migrations"]:
+            logger.warning(
+                "'%s' has pending migrations %s (run python -m app.migrations)",
+                database,
+                status["pending_migrations"],
+            )
+        if status["missing_indexes"]:
+            logger.warning(
+                "'%s' is missing indexes: %s",
+                database,
+                ", ".join(status["missing_indexes"]),
+            )
+        if status["invalid_indexes"]:
+            logger.warning(
+                "'%s' has invalid indexes (rebuilt by the next migration run): %s",
+                database,
+                ", ".join(status["invalid_indexes"]),
+            )
+    return report
+
+
+async def schema_readiness():
+    """
+    ``(ready, problems)``: whether every configured database has the tables
+    and columns the routes read, and per database what is missing.
+    """
+    problems = {}
+    for database in _configured_databases():
+        try:
+            status = await check_schema(database)
+        except Exception as e:
+            problems[database] = f"schema check failed: {e}"
+            continue
+        if status["blocking_migrations"]:
+            problems[database] = (
+                f"pending migrations {status['blocking_migrations']} "
+                "(run python -m app.migrations)"
+            )
+    return not problems, problems
+
+
+async def prepare_schema():
+    """
+    Startup hook: migrate when DB_AUTO_MIGRATE is on, then report what is
+    missing. Without automatic migration, raise if a database lacks tables
+    or columns the routes read, so the API doesn't start only to fail.
+    """
+    if DB_AUTO_MIGRATE:
+        try:
+            await run_migrations()
+        except Exception as e:
+            logger.exception("Automatic migration failed: %s", e)
+    report = await report_schema()
+    blocking = {
+        database: status["blocking_migrations"]
+        for database, status in report.items()
+        if status["blocking_migrations"]
+    }
+    if blocking:
+        if not DB_AUTO_MIGRATE:
+            raise RuntimeError(
+                f"Pending schema migrations {blocking} "
+                "(run python -m app.migrations, or set DB_AUTO_MIGRATE=true)"
+            )
+        logger.error("Schema still lacks required tables, not ready: %s", blocking)
+    return report
@@ -0,0 +1,501 @@
+"""
+Versioned schema changes for the tables and indexes this API owns.
+
+Append new migrations with the next version number; never edit or reorder
+one that has shipped. Each migration runs once per database listed in
+``databases`` and is recorded in that database's ``schema_migrations``.
+Index builds on the crawler's large tables use CREATE INDEX CONCURRENTLY so
+they don't block ingestion, which means they run outside a transaction
+(``transactional=False``) and must be idempotent.
+
+The crawler owns ``posts`` and ``comments``. Besides indexes, the API adds
+bookkeeping columns to them that the crawler never writes: the Reddit
+``ingested_at`` columns, filled by their column default on insert, give
+the jobs an order to walk that late crawls can't fall behind, and Reddit
+``posts.details_updated_at``, set the same way on insert and by the
+``posts_details_updated_at`` trigger when an update changes
+``post_details``, lets the post metrics follow rescored posts. The trigger
+is the only thing the API puts on the crawler's write path: one timestamp
+assignment per updated row whose post_details changed. The crawler's
+statements don't change, but a crawler that recreates these tables must
+run the migrations again (delete their versions from ``schema_migrations``).
+"""
+
+
+class Migration:
+    def __init__(self, version, name, databases, statements, transactional=True):
+        self.version = version
+        self.name = name
+        self.databases = tuple(databases)
+        self.statements = tuple(statements)
+        self.transactional = transactional
+
+
+MIGRATIONS = [
+    Migration(
+        1,
+        "job_watermarks",
+        ("chan", "reddit"),
+        [
+            """
+            CREATE TABLE IF NOT EXISTS job_watermarks (
+                job_name TEXT PRIMARY KEY,
+                watermark JSONB NOT NULL,
+                updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+            """,
+        ],
+    ),
+    Migration(
+        2,
+        "chan_post_types",
+        ("chan",),
+        [
+            """
+            CREATE TABLE IF NOT EXISTS chan_post_types (
+                board_name TEXT NOT NULL,
+                post_no BIGINT NOT NULL,
+                post_time BIGINT,
+                post_type TEXT NOT NULL,
+                PRIMARY KEY (board_name, post_no)
+            )
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS chan_post_types_board_time_idx
+            ON chan_post_types (board_name, post_time) INCLUDE (post_type)
+            """,
+        ],
+    ),
+    Migration(
+        3,
+        "reddit_post_types",
+        ("reddit",),
+        [
+            """
+            CREATE TABLE IF NOT EXISTS reddit_post_types (
+                unique_name TEXT PRIMARY KEY,
+                subreddit TEXT,
+                created_at BIGINT,
+                post_type TEXT NOT NULL
+            )
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS reddit_post_types_subreddit_created_idx
+            ON reddit_post_types (subreddit, created_at) INCLUDE (post_type)
+            """,
+        ],
+    ),
+    Migration(
+        4,
+        "chan_thread_stats",
+        ("chan",),
+        [
+            """
+            CREATE TABLE IF NOT EXISTS chan_thread_stats (
+                board_name TEXT NOT NULL,
+                thread_no BIGINT NOT NULL,
+                reply_count INT NOT NULL DEFAULT 0,
+                image_count INT NOT NULL DEFAULT 0,
+                first_reply_time BIGINT,
+                last_reply_time BIGINT,
+                PRIMARY KEY (board_name, thread_no)
+            )
+            """,
+        ],
+    ),
+    Migration(
+        5,
+        "chan_posts_indexes",
+        ("chan",),
+        [
+            # Board + time range scans (threads are resto = 0)
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS posts_board_resto_time_idx
+            ON posts (board_name, resto, post_time)
+            """,
+            # Keyset order walked by the incremental jobs
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS posts_created_key_idx
+            ON posts (created_at, board_name, post_no)
+            """,
+        ],
+        transactional=False,
+    ),
+    Migration(
+        6,
+        "reddit_posts_indexes",
+        ("reddit",),
+        [
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS posts_subreddit_created_idx
+            ON posts (subreddit, created_at)
+            """,
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS posts_created_key_idx
+            ON posts (created_at, unique_name)
+            """,
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS comments_post_id_idx
+            ON comments (post_id)
+            """,
+        ],
+        transactional=False,
+    ),
+    Migration(
+        7,
+        "chan_activity_rollups",
+        ("chan",),
+        [
+            """
+            CREATE TABLE IF NOT EXISTS chan_activity_hourly (
+                board_name TEXT NOT NULL,
+                hour_start BIGINT NOT NULL,
+                post_type TEXT NOT NULL,
+                post_count BIGINT NOT NULL DEFAULT 0,
+                PRIMARY KEY (board_name, hour_start, post_type)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS chan_posts_daily (
+                board_name TEXT NOT NULL,
+                day DATE NOT NULL,
+                post_count BIGINT NOT NULL DEFAULT 0,
+                PRIMARY KEY (board_name, day)
+            )
+            """,
+        ],
+    ),
+    Migration(
+        8,
+        "chan_country_daily",
+        ("chan",),
+        [
+            """
+            CREATE TABLE IF NOT EXISTS chan_country_daily (
+                board_name TEXT NOT NULL,
+                day DATE NOT NULL,
+                country TEXT NOT NULL,
+                country_name TEXT NOT NULL,
+                post_count BIGINT NOT NULL DEFAULT 0,
+                PRIMARY KEY (board_name, day, country, country_name)
+            )
+            """,
+            # Unfiltered and date-only requests scan by day across boards
+            """
+            CREATE INDEX IF NOT EXISTS chan_country_daily_day_idx
+            ON chan_country_daily (day)
+            """,
+        ],
+    ),
+    Migration(
+        9,
+        "toxicity_scored_at_indexes",
+        ("chan", "reddit"),
+        [
+            # Date-filtered toxicity distributions range over scored_at
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS toxicity_scored_at_idx
+            ON toxicity (scored_at)
+            """,
+        ],
+        transactional=False,
+    ),
+    Migration(
+        10,
+        "chan_posts_trigram_indexes",
+        ("chan",),
+        [
+            "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+            # Event keyword matching: the expressions must match the ones in
+            # the *_EVENT_RELATED_INDEXED queries for the planner to use them
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS posts_subject_trgm_idx
+            ON posts USING gin (LOWER(COALESCE(subject, '')) gin_trgm_ops)
+            """,
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS posts_comment_trgm_idx
+            ON posts USING gin (LOWER(COALESCE(comment, '')) gin_trgm_ops)
+            """,
+        ],
+        transactional=False,
+    ),
+    Migration(
+        11,
+        "reddit_text_trigram_indexes",
+        ("reddit",),
+        [
+            "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS posts_title_trgm_idx
+            ON posts USING gin (LOWER(title) gin_trgm_ops)
+            """,
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS comments_body_trgm_idx
+            ON comments USING gin (LOWER(body) gin_trgm_ops)
+            """,
+        ],
+        transactional=False,
+    ),
+    Migration(
+        12,
+        "event_keyword_counts",
+        ("chan", "reddit"),
+        [
+            """
+            CREATE TABLE IF NOT EXISTS event_keyword_counts (
+                event_id TEXT NOT NULL,
+                platform TEXT NOT NULL,
+                community TEXT NOT NULL,
+                day DATE NOT NULL,
+                hits BIGINT NOT NULL DEFAULT 0,
+                PRIMARY KEY (event_id, platform, community, day)
+            )
+            """,
+        ],
+    ),
+    Migration(
+        13,
+        "reddit_comments_created_index",
+        ("reddit",),
+        [
+            # Keyset order walked by the event matcher over comments
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS comments_created_key_idx
+            ON comments (created_timestamp, comment_id)
+            """,
+        ],
+        transactional=False,
+    ),
+    Migration(
+        14,
+        "reddit_posts_daily",
+        ("reddit",),
+        [
+            """
+            CREATE TABLE IF NOT EXISTS reddit_posts_daily (
+                subreddit TEXT NOT NULL,
+                day DATE NOT NULL,
+                post_count BIGINT NOT NULL DEFAULT 0,
+                PRIMARY KEY (subreddit, day)
+            )
+            """,
+        ],
+    ),
+    Migration(
+        15,
+        "reddit_post_comment_stats",
+        ("reddit",),
+        [
+            """
+            CREATE TABLE IF NOT EXISTS reddit_post_comment_stats (
+                unique_name TEXT PRIMARY KEY,
+                comment_count BIGINT NOT NULL DEFAULT 0,
+                crawled_count BIGINT NOT NULL DEFAULT 0,
+                first_comment_time TIMESTAMP,
+                last_comment_time TIMESTAMP
+            )
+            """,
+        ],
+    ),
+    Migration(
+        16,
+        "reddit_post_metrics",
+        ("reddit",),
+        [
+            # Typed projection of posts.post_details, kept by the
+            # reddit_post_metrics job
+            """
+            CREATE TABLE IF NOT EXISTS reddit_post_metrics (
+                unique_name TEXT PRIMARY KEY,
+                subreddit TEXT,
+                created_at BIGINT,
+                score INTEGER,
+                upvote_ratio REAL,
+                num_comments INTEGER
+            )
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS reddit_post_metrics_subreddit_time_idx
+            ON reddit_post_metrics (subreddit, created_at)
+            INCLUDE (score, upvote_ratio, num_comments)
+            """,
+        ],
+    ),
+    Migration(
+        17,
+        "reddit_comment_trees",
+        ("reddit",),
+        [
+            # One row per placed comment, kept by the reddit_comment_trees
+            # job. Each node keeps its parent's key so orphans can be moved
+            # under their parent when it is crawled.
+            """
+            CREATE TABLE IF NOT EXISTS reddit_comment_nodes (
+                comment_id TEXT PRIMARY KEY,
+                post_id TEXT NOT NULL,
+                parent_key TEXT,
+                depth INTEGER NOT NULL,
+                child_count INTEGER NOT NULL DEFAULT 0,
+                orphan BOOLEAN NOT NULL DEFAULT false,
+                created_timestamp TIMESTAMP
+            )
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS reddit_comment_nodes_post_depth_idx
+            ON reddit_comment_nodes (post_id, depth) INCLUDE (child_count)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS reddit_comment_nodes_parent_idx
+            ON reddit_comment_nodes (parent_key)
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS reddit_comment_trees (
+                post_id TEXT PRIMARY KEY,
+                comment_count BIGINT NOT NULL DEFAULT 0,
+                top_level_count BIGINT NOT NULL DEFAULT 0,
+                orphan_count BIGINT NOT NULL DEFAULT 0,
+                max_depth INTEGER NOT NULL DEFAULT 0,
+                depth_sum BIGINT NOT NULL DEFAULT 0,
+                internal_count BIGINT NOT NULL DEFAULT 0,
+                first_comment_time TIMESTAMP,
+                last_comment_time TIMESTAMP
+            )
+            """,
+        ],
+    ),
+    Migration(
+        18,
+        "chan_thread_lifecycle",
+        ("chan",),
+        [
+            # Kept by the chan_thread_lifecycle job; times are epoch seconds
+            """
+            CREATE TABLE IF NOT EXISTS chan_thread_lifecycle (
+                board_name TEXT NOT NULL,
+                thread_no BIGINT NOT NULL,
+                thread_time BIGINT,
+                reply_count INT NOT NULL DEFAULT 0,
+                last_reply_time BIGINT,
+                bump_limit_time BIGINT,
+                bumplimit BOOLEAN NOT NULL DEFAULT false,
+                archived BOOLEAN NOT NULL DEFAULT false,
+                archived_on BIGINT,
+                lifetime_seconds BIGINT GENERATED ALWAYS AS (
+                    COALESCE(archived_on, last_reply_time, thread_time) - thread_time
+                ) STORED,
+                time_to_bump_limit BIGINT GENERATED ALWAYS AS (
+                    bump_limit_time - thread_time
+                ) STORED,
+                replies_per_hour DOUBLE PRECISION GENERATED ALWAYS AS (
+                    reply_count * 3600.0
+                    / GREATEST(COALESCE(last_reply_time, thread_time) - thread_time, 60)
+                ) STORED,
+                archive_latency BIGINT GENERATED ALWAYS AS (
+                    archived_on - COALESCE(last_reply_time, thread_time)
+                ) STORED,
+                PRIMARY KEY (board_name, thread_no)
+            )
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS chan_thread_lifecycle_board_time_idx
+            ON chan_thread_lifecycle (board_name, thread_time)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS chan_thread_lifecycle_time_idx
+            ON chan_thread_lifecycle (thread_time)
+            """,
+            # Threads still open, re-read by chan_thread_lifecycle_refresh
+            """
+            CREATE INDEX IF NOT EXISTS chan_thread_lifecycle_live_idx
+            ON chan_thread_lifecycle (board_name, thread_no)
+            WHERE NOT archived
+            """,
+        ],
+    ),
+    Migration(
+        19,
+        "reddit_ingest_order",
+        ("reddit",),
+        [
+            # Insert time of each crawled row, the order the Reddit jobs walk
+            # so late-crawled posts and comments are still picked up. Rows
+            # already present get '-infinity' (a constant default, so no
+            # table rewrite) and are walked first, in key order; new rows get
+            # their insert time.
+            """
+            ALTER TABLE posts
+            ADD COLUMN IF NOT EXISTS ingested_at TIMESTAMPTZ NOT NULL DEFAULT '-infinity'
+            """,
+            "ALTER TABLE posts ALTER COLUMN ingested_at SET DEFAULT clock_timestamp()",
+            """
+            ALTER TABLE comments
+            ADD COLUMN IF NOT EXISTS ingested_at TIMESTAMPTZ NOT NULL DEFAULT '-infinity'
+            """,
+            "ALTER TABLE comments ALTER COLUMN ingested_at SET DEFAULT clock_timestamp()",
+        ],
+    ),
+    Migration(
+        20,
+        "reddit_ingest_order_indexes",
+        ("reddit",),
+        [
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS posts_ingested_key_idx
+            ON posts (ingested_at, unique_name)
+            """,
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS comments_ingested_key_idx
+            ON comments (ingested_at, comment_id)
+            """,
+        ],
+        transactional=False,
+    ),
+    Migration(
+        21,
+        "reddit_post_details_updated",
+        ("reddit",),
+        [
+            # When a post's post_details last changed, walked by the
+            # reddit_post_metrics job so updated scores are projected again.
+            # Set like ingested_at on insert, then by the trigger on update.
+            """
+            ALTER TABLE posts
+            ADD COLUMN IF NOT EXISTS details_updated_at TIMESTAMPTZ NOT NULL
+            DEFAULT '-infinity'
+            """,
+            """
+            ALTER TABLE posts
+            ALTER COLUMN details_updated_at SET DEFAULT clock_timestamp()
+            """,
+            """
+            CREATE OR REPLACE FUNCTION touch_post_details_updated_at()
+            RETURNS trigger LANGUAGE plpgsql AS $$
+            BEGIN
+                NEW.details_updated_at := clock_timestamp();
+                RETURN NEW;
+            END
+            $$
+            """,
+            "DROP TRIGGER IF EXISTS posts_details_updated_at ON posts",
+            """
+            CREATE TRIGGER posts_details_updated_at
+            BEFORE UPDATE OF post_details ON posts
+            FOR EACH ROW
+            WHEN (OLD.post_details IS DISTINCT FROM NEW.post_details)
+            EXECUTE FUNCTION touch_post_details_updated_at()
+            """,
+        ],
+    ),
+    Migration(
+        22,
+        "reddit_post_details_updated_index",
+        ("reddit",),
+        [
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS posts_details_updated_key_idx
+            ON posts (details_updated_at, unique_name)
+            """,
+        ],
+        transactional=False,
+    ),
+]
@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from typing import List
+
+
+class ActivityHeatmapResponse(BaseModel):
+    platform: str  # "4chan" or "reddit"
+    community: str  # board_name or subreddit
+    start_date: str
+    end_date: str
+    # Axes of the matrix: counts[day][hour][post_type], days and hours in UTC
+    days: List[str]
+    hours: List[int]
+    post_types: List[str]
+    counts: List[List[List[int]]]
+    total: int
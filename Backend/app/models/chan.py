@@ -11,6 +11,10 @@ class SummaryStats(BaseModel):
     total_posts: int
     unique_boards: int
     total_toxicity: int
+    approximate: bool = False
+    # Approximate mode only: bound on the relative error of the counts taken
+    # from planner statistics (0.01 = 1%); the distinct counts are exact
+    error_bound: Optional[float] = None
 
 
 class DailyActivityData(BaseModel):
@@ -91,3 +95,44 @@ class CountryData(BaseModel):
 
 class CountryStatsResponse(BaseModel):
     data: List[CountryData]
+
+
+class ThreadLifecycleData(BaseModel):
+    board_name: str
+    threads: int
+    archived_threads: int
+    bump_limit_threads: int
+    # seconds, except replies_per_hour
+    avg_lifetime: Optional[float] = None
+    median_lifetime: Optional[float] = None
+    median_time_to_bump_limit: Optional[float] = None
+    avg_replies_per_hour: Optional[float] = None
+    median_archive_latency: Optional[float] = None
+
+
+class ThreadLifecycleResponse(BaseModel):
+    board_name: Optional[str] = None  # None: all boards
+    start_date: str
+    end_date: str
+    data: List[ThreadLifecycleData]
+
+
+class ThreadLifecycle(BaseModel):
+    board_name: str
+    thread_no: int
+    thread_time: Optional[int] = None
+    reply_count: int
+    bump_limit_reached: bool
+    archived: bool
+    lifetime_seconds: Optional[int] = None
+    time_to_bump_limit: Optional[int] = None
+    replies_per_hour: Optional[float] = None
+    archive_latency: Optional[int] = None
+
+
+class TopThreadsResponse(BaseModel):
+    board_name: Optional[str] = None
+    start_date: str
+    end_date: str
+    metric: str
+    data: List[ThreadLifecycle]
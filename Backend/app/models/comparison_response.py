@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List
+from typing import Dict, List, Optional
 
 
 class ForumsToxicity(BaseModel):
@@ -19,3 +19,23 @@ class EventTimelineResponse(BaseModel):
     event_date: str
     window: int
     timeline: List[EventTimelinePoint]
+
+
+class AttributeDistribution(BaseModel):
+    mean: Optional[float] = None
+    count: int
+    quantiles: Dict[str, Optional[float]]  # e.g. {"p50": 0.12, "p90": ...}
+
+
+class ForumToxicityDistribution(BaseModel):
+    forum_name: str
+    platform: str  # '4chan' or 'reddit'
+    scored_posts: int
+    attributes: Dict[str, AttributeDistribution]
+
+
+class ToxicityDistributionResponse(BaseModel):
+    platform: str
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    forums: List[ForumToxicityDistribution]
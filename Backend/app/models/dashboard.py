@@ -0,0 +1,33 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+
+# Upper bound on widgets per dashboard request: every page's widgets, with
+# room for a few repeated with different params
+MAX_DASHBOARD_WIDGETS = 20
+
+
+class WidgetSpec(BaseModel):
+    widget: str  # widget name, see GET /dashboard/{page}/widgets
+    id: Optional[str] = None  # key in the response; defaults to the widget name
+    params: Dict[str, Any] = {}  # query params of the underlying endpoint
+
+
+class DashboardRequest(BaseModel):
+    widgets: List[WidgetSpec] = Field(
+        ..., min_length=1, max_length=MAX_DASHBOARD_WIDGETS
+    )
+
+
+class WidgetResult(BaseModel):
+    widget: str
+    status: str  # "ok", "error" or "timeout"
+    status_code: int
+    duration_ms: float
+    data: Any = None
+    error: Optional[Any] = None
+
+
+class DashboardResponse(BaseModel):
+    page: str
+    duration_ms: float
+    widgets: Dict[str, WidgetResult]
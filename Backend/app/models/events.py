@@ -0,0 +1,13 @@
+from datetime import date
+from pydantic import BaseModel, Field
+from typing import List, Literal
+
+
+class Event(BaseModel):
+    id: str = Field(..., pattern=r"^[a-z0-9][a-z0-9_-]*$")  # stable, used in job names
+    name: str
+    event_date: date
+    keywords: List[str] = Field(..., min_length=1)
+    platforms: List[Literal["chan", "reddit"]] = ["chan", "reddit"]
+    # Days either side of event_date the matcher precomputes counts for
+    window_days: int = Field(30, ge=1, le=366)
@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from pydantic import BaseModel
 from typing import List, Optional
 
@@ -7,6 +9,10 @@ class SummaryStats(BaseModel):
     unique_subreddit: int
     total_toxicity: int
     total_comments: int
+    approximate: bool = False
+    # Approximate mode only: bound on the relative error of the counts taken
+    # from planner statistics (0.01 = 1%); the distinct counts are exact
+    error_bound: Optional[float] = None
 
 
 class EngagementByTypeData(BaseModel):
@@ -25,6 +31,100 @@ class EngagementByTypeResponse(BaseModel):
     data: List[EngagementByTypeData]
 
 
+class ScoreBucket(BaseModel):
+    min_score: Optional[int] = None  # None: open-ended below
+    max_score: Optional[int] = None  # exclusive; None: open-ended above
+    post_count: int
+
+
+class ScoreDistributionResponse(BaseModel):
+    subreddit: str
+    start_date: str
+    end_date: str
+    scored_posts: int
+    avg_score: Optional[float] = None
+    quantiles: dict[str, Optional[float]]
+    max_score: Optional[int] = None
+    buckets: List[ScoreBucket]
+
+
+class UpvoteRatioByTypeData(BaseModel):
+    post_type: str
+    posts: int
+    avg_upvote_ratio: Optional[float] = None
+    median_upvote_ratio: Optional[float] = None
+    avg_score: Optional[float] = None
+
+
+class UpvoteRatioByTypeResponse(BaseModel):
+    subreddit: str
+    start_date: str
+    end_date: str
+    data: List[UpvoteRatioByTypeData]
+
+
+class CommentCountGap(BaseModel):
+    unique_name: str
+    reported_comments: int
+    observed_comments: int
+
+
+class CommentCoverageResponse(BaseModel):
+    subreddit: str
+    start_date: str
+    end_date: str
+    posts: int
+    reported_comments: int  # num_comments reported by Reddit at crawl time
+    observed_comments: int  # comments actually crawled
+    coverage: Optional[float] = None  # observed / reported
+    posts_missing_comments: int
+    largest_gaps: List[CommentCountGap]
+
+
+class CommentTreeStructureData(BaseModel):
+    subreddit: str
+    post_type: str
+    posts: int
+    posts_with_comments: int
+    comments: int
+    avg_depth: Optional[float] = None
+    avg_max_depth: Optional[float] = None
+    max_depth: Optional[int] = None
+    branching_factor: Optional[float] = None  # replies per comment with replies
+    median_first_reply_seconds: Optional[float] = None
+    avg_replies_per_hour: Optional[float] = None
+
+
+class CommentTreeStructureResponse(BaseModel):
+    subreddit: Optional[str] = None  # None: all subreddits
+    start_date: str
+    end_date: str
+    data: List[CommentTreeStructureData]
+
+
+class CommentTreeLevel(BaseModel):
+    depth: int
+    comments: int
+    with_replies: int
+
+
+class CommentTreeResponse(BaseModel):
+    post_id: str
+    subreddit: Optional[str] = None
+    post_type: Optional[str] = None
+    comments: int
+    top_level_comments: int
+    orphan_comments: int  # parent comment not crawled (yet)
+    max_depth: int
+    avg_depth: Optional[float] = None
+    branching_factor: Optional[float] = None
+    first_reply_seconds: Optional[float] = None
+    replies_per_hour: Optional[float] = None
+    first_comment_time: Optional[datetime] = None
+    last_comment_time: Optional[datetime] = None
+    levels: List[CommentTreeLevel]
+
+
 class DailyPostCountByDate(BaseModel):
     date: str
     subreddit_counts: dict[str, int]
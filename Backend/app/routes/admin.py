@@ -0,0 +1,62 @@
+from typing import Optional
+
+from app.utils.cache import get_cache
+from app.utils.catalog import catalog
+from app.utils.db_pool import DATABASES
+from app.utils.singleflight import query_flight
+from fastapi import APIRouter, HTTPException, Query
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+@router.get("/cache")
+async def get_cache_stats():
+    """Query cache hit/miss counters and size."""
+    return get_cache().stats()
+
+
+@router.post("/cache/invalidate")
+async def invalidate_cache(
+    database: Optional[str] = Query(
+        None, description="Only drop entries for this database (chan or reddit)"
+    ),
+):
+    """
+    Drop cached query results, e.g. right after the crawler ingests. Catalog
+    entries of the database are marked stale and reload on next request.
+    """
+    if database is not None and database not in DATABASES:
+        raise HTTPException(status_code=400, detail="Invalid database")
+
+    removed = get_cache().invalidate(database)
+    stale = catalog.invalidate(database)
+    return {
+        "database": database or "all",
+        "invalidated": removed,
+        "catalog_invalidated": stale,
+    }
+
+
+@router.get("/catalog")
+async def get_catalog_stats():
+    """Loaded catalog entries with their validators and load times."""
+    return catalog.stats()
+
+
+@router.post("/catalog/refresh")
+async def refresh_catalog(
+    database: Optional[str] = Query(
+        None, description="Only reload entries for this database (chan or reddit)"
+    ),
+):
+    """Reload loaded catalog entries now instead of waiting for the schedule."""
+    if database is not None and database not in DATABASES:
+        raise HTTPException(status_code=400, detail="Invalid database")
+
+    return {"database": database or "all", "refreshed": await catalog.refresh(database)}
+
+
+@router.get("/coalescing")
+async def get_coalescing_stats():
+    """How many concurrent identical queries were served by a single execution."""
+    return query_flight.stats()
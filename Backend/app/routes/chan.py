@@ -1,16 +1,21 @@
-import os
-from pathlib import Path
+import logging
 from typing import List, Optional
 
 from app.constants.queries import (
+    CHAN_THREAD_LIFECYCLE_METRICS,
     SELECT_ALL_BOARDS,
+    SELECT_CHAN_ACTIVITY_HEATMAP,
     SELECT_CHAN_COUNTRY_STATS,
     SELECT_CHAN_DAILY_POST_COUNT,
     SELECT_CHAN_ENGAGEMENT_BY_TYPE,
+    SELECT_CHAN_SUMMARY_DISTINCT_COUNTS,
     SELECT_CHAN_SUMMARY_STATS,
+    SELECT_CHAN_THREAD_LIFECYCLE,
+    SELECT_CHAN_THREADS_BY_LIFECYCLE,
     SELECT_DAILY_ACTIVITY,
     SELECT_HOURLY_ACTIVITY,
 )
+from app.models.activity import ActivityHeatmapResponse
 from app.models.chan import (
     Board,
     CountryData,
@@ -23,65 +28,120 @@ from app.models.chan import (
     HourlyActivityResponse,
     StatsDaily,
     SummaryStats,
+    ThreadLifecycle,
+    ThreadLifecycleData,
+    ThreadLifecycleResponse,
+    TopThreadsResponse,
 )
+from app.utils.cache import TTL_ACTIVITY, TTL_SUMMARY
+from app.utils.catalog import catalog, conditional_response
 from app.utils.logger import Logger
-from app.utils.plsql import PLSQL
-from dotenv import load_dotenv
-from fastapi import APIRouter, HTTPException, Query
+from app.utils.async_plsql import get_data_async, stream_data_async
+from app.utils.dates import day_bounds, day_bounds_or_400
+from app.utils.estimates import error_bound, table_estimates
+from app.utils.heatmap import heatmap_bounds, heatmap_response
+from app.utils.streaming import FORMAT_PATTERN, ndjson_response
+from fastapi import APIRouter, HTTPException, Query, Request
 
 router = APIRouter(prefix="/chan", tags=["4chan"])
-
-load_dotenv(Path(__file__).resolve().parent.parent / ".env")
-CHAN_DATABASE_URL = os.getenv("CHAN_DATABASE_URL")
 logger = Logger("logs").get_logger()
 
 
+def _board_from_row(row):
+    return Board(
+        board_code=row[0],
+        board_title=row[1],
+        meta_description=row[2],
+        ws_board=row[3],
+    )
+
+
+BOARDS_CATALOG = "chan_boards"
+
+
+async def _load_boards():
+    logger.info("Loading the board catalog")
+    result = await get_data_async("chan", SELECT_ALL_BOARDS)
+    return [_board_from_row(row) for row in result]
+
+
+catalog.register(BOARDS_CATALOG, "chan", _load_boards)
+
+
 @router.get("/boards", response_model=List[Board])
-async def get_boards():
-    """Get list of all boards"""
+async def get_boards(
+    request: Request,
+    response_format: str = Query("json", alias="format", pattern=FORMAT_PATTERN),
+):
+    """
+    Get list of all boards. JSON responses come from the in-memory catalog
+    and carry ETag/Last-Modified, so revalidation is answered with a 304.
+    """
     logger.info("GET /boards called")
 
     try:
-        plsql = PLSQL(CHAN_DATABASE_URL)
-        logger.info("Executing SELECT_ALL_BOARDS query")
-        result = plsql.get_data_from(SELECT_ALL_BOARDS)
-        logger.info(f"Query returned {len(result)} rows")
-
-        plsql.close_connection()
-
-        boards = []
-        for row in result:
-            boards.append(
-                {
-                    "board_code": row[0],
-                    "board_title": row[1],
-                    "meta_description": row[2],
-                    "ws_board": row[3],
-                }
+        if response_format == "ndjson":
+            return ndjson_response(
+                stream_data_async("chan", SELECT_ALL_BOARDS), _board_from_row
             )
-        return boards
+
+        return conditional_response(request, await catalog.get(BOARDS_CATALOG))
 
     except Exception as e:
-        logger.exception(f"Error in get_boards: {e}")
+        logger.exception("Error in get_boards: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def _approximate_summary_stats():
+    tables = await table_estimates("chan", ("toxicity",))
+    if "toxicity" not in tables:
+        return None
+    # Distinct posts and boards are counted exactly from the rollups
+    result = await get_data_async(
+        "chan", SELECT_CHAN_SUMMARY_DISTINCT_COUNTS, None, ttl=TTL_SUMMARY
+    )
+    total_posts, unique_boards = result[0]
+
+    toxicity = tables["toxicity"]
+    return SummaryStats(
+        total_posts=total_posts,
+        unique_boards=unique_boards,
+        total_toxicity=toxicity[0],
+        approximate=True,
+        error_bound=error_bound(toxicity),
+    )
+
+
 @router.get("/stats/summary", response_model=SummaryStats)
-async def get_summary_stats():
-    logger.info("GET /stats/summary called")
+async def get_summary_stats(approx: bool = Query(False)):
+    """
+    Summary card counts. With approx=true distinct posts and boards come
+    from the rollups and total_toxicity from planner statistics (see
+    error_bound); otherwise they are counted over the raw tables.
+    """
+    logger.info("GET /stats/summary called with approx=%s", approx)
+
+    if approx:
+        try:
+            stats = await _approximate_summary_stats()
+        except Exception as e:
+            logger.exception("Error in approximate get_summary_stats: %s", e)
+            raise HTTPException(status_code=500, detail=str(e))
+        if stats is not None:
+            return stats
+        logger.info("No planner statistics yet, falling back to exact counts")
 
     try:
-        plsql = PLSQL(CHAN_DATABASE_URL)
         logger.info("Executing SELECT_CHAN_SUMMARY_STATS")
 
-        result = plsql.get_data_from(SELECT_CHAN_SUMMARY_STATS, None)
-        logger.info(f"Query returned {len(result)} rows")
-
-        plsql.close_connection()
+        result = await get_data_async(
+            "chan", SELECT_CHAN_SUMMARY_STATS, None, ttl=TTL_SUMMARY
+        )
+        logger.info("Query returned %d rows", len(result))
 
         if result:
             row = result[0]
-            logger.info(f"Summary row: {row}")
+            logger.debug("Summary row: %s", row)
             return SummaryStats(
                 total_posts=row[0] or 0,
                 unique_boards=row[1] or 0,
@@ -92,94 +152,94 @@ async def get_summary_stats():
             return SummaryStats(total_posts=0, unique_boards=0, total_toxicity=0.0)
 
     except Exception as e:
-        logger.exception(f"Error in get_summary_stats: {e}")
+        logger.exception("Error in get_summary_stats: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _rollup_filters(board_name, start_date, end_date):
+    """
+    Optional board/date filters for a (board_name, day) rollup and for its
+    raw posts tail. Returns both SQL fragments and the params for both.
+    """
+    rollup_filter, tail_filter = "", ""
+    params = []
+
+    if board_name:
+        rollup_filter += " AND board_name = %s"
+        tail_filter += " AND p.board_name = %s"
+        params.append(board_name)
+
+    if start_date:
+        rollup_filter += " AND day >= %s::date"
+        tail_filter += " AND p.created_at >= %s::timestamp"
+        params.append(start_date)
+
+    if end_date:
+        rollup_filter += " AND day <= %s::date"
+        tail_filter += " AND p.created_at < (%s::timestamp + interval '1 day')"
+        params.append(end_date)
+
+    return rollup_filter, tail_filter, params * 2
+
+
 @router.get("/stats/daily", response_model=List[StatsDaily])
 async def get_daily_post_stats(
     board_name: Optional[str] = Query(None),
     start_date: Optional[str] = Query("2025-11-15"),
     end_date: Optional[str] = Query(None),
+    response_format: str = Query("json", alias="format", pattern=FORMAT_PATTERN),
 ):
     logger.info(
-        f"GET /stats/daily called with board_name={board_name}, start_date={start_date}, end_date={end_date}"
+        "GET /stats/daily called with board_name=%s, start_date=%s, end_date=%s",
+        board_name,
+        start_date,
+        end_date,
     )
 
     try:
-        plsql = PLSQL(CHAN_DATABASE_URL)
-
-        sql = SELECT_CHAN_DAILY_POST_COUNT
-        params = []
-
-        if board_name:
-            sql += " AND board_name = %s"
-            params.append(board_name)
-
-        if start_date:
-            sql += " AND created_at >= %s::timestamp"
-            params.append(start_date)
-
-        if end_date:
-            sql += " AND created_at < (%s::timestamp + interval '1 day')"
-            params.append(end_date)
+        rollup_filter, tail_filter, params = _rollup_filters(
+            board_name, start_date, end_date
+        )
+        sql = SELECT_CHAN_DAILY_POST_COUNT.format(
+            rollup_filter=rollup_filter, tail_filter=tail_filter
+        )
 
-        sql += """
-            GROUP BY DATE(created_at)
-            ORDER BY DATE(created_at)
-        """
+        logger.debug("Executing daily stats query: %s", sql)
+        logger.debug("Query params: %s", params)
 
-        logger.info(f"Executing daily stats query: {sql}")
-        logger.info(f"Query params: {params}")
+        def to_item(row):
+            return StatsDaily(day=str(row[0]), count=row[1])
 
-        result = plsql.get_data_from(sql, tuple(params))
-        logger.info(f"Query returned {len(result)} rows")
+        if response_format == "ndjson":
+            return ndjson_response(
+                stream_data_async("chan", sql, tuple(params)), to_item
+            )
 
-        plsql.close_connection()
+        result = await get_data_async("chan", sql, tuple(params), ttl=TTL_ACTIVITY)
+        logger.info("Query returned %d rows", len(result))
 
-        return [StatsDaily(day=str(row[0]), count=row[1]) for row in result]
+        return [to_item(row) for row in result]
 
     except Exception as e:
-        logger.exception(f"Error in get_daily_post_stats: {e}")
+        logger.exception("Error in get_daily_post_stats: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/debug/posts")
 async def debug_posts(board_name: str = Query("pol")):
-    logger.info(f"GET /debug/posts called with board_name={board_name}")
+    logger.info("GET /debug/posts called with board_name=%s", board_name)
 
     try:
-        plsql = PLSQL(CHAN_DATABASE_URL)
-
         logger.info("Running debug test query for posts")
 
-        test_query = """
-        SELECT 
-            DATE(to_timestamp(post_time)) as post_date,
-            CASE 
-                WHEN COALESCE(comment, '') ILIKE '%%?%%' THEN 'question'
-                WHEN COALESCE(comment, '') ILIKE '%%news%%' OR COALESCE(comment, '') ILIKE '%%breaking%%' THEN 'news'
-                WHEN filename IS NOT NULL AND ext IN ('.jpg', '.png', '.gif') THEN 'meme'
-                ELSE 'opinion'
-            END as post_type,
-            COUNT(*) as post_count
-        FROM posts
-        WHERE board_name = %s
-            AND to_timestamp(post_time) >= %s::timestamp
-            AND to_timestamp(post_time) < (%s::timestamp + interval '1 day')
-            AND resto = 0
-        GROUP BY post_date, post_type
-        ORDER BY post_date, post_type
-        LIMIT 20
-        """
-
-        params = (board_name, "2025-12-01", "2025-12-05")
-        logger.info(f"Query params: {params}")
-
-        result = plsql.get_data_from(test_query, params)
-        logger.info(f"Debug returned {len(result)} rows")
-
-        plsql.close_connection()
+        # Same rollup-plus-tail read the dashboard serves
+        test_query = SELECT_DAILY_ACTIVITY + "LIMIT 20"
+
+        params = (board_name, *day_bounds("2025-12-01", "2025-12-05")) * 2
+        logger.info("Query params: %s", params)
+
+        result = await get_data_async("chan", test_query, params)
+        logger.info("Debug returned %d rows", len(result))
 
         return {
             "query_results": [
@@ -187,114 +247,178 @@ async def debug_posts(board_name: str = Query("pol")):
             ]
         }
     except Exception as e:
-        logger.exception(f"Error in debug_posts: {e}")
+        logger.exception("Error in debug_posts: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _post_type_filter(post_types):
+    # Stored labels are capitalised (Question, News, ...); match case-insensitively
+    if post_types is None:
+        return None
+    return {post_type.lower() for post_type in post_types}
+
+
 @router.get("/activity/daily", response_model=DailyActivityResponse)
 async def get_daily_activity(
     board_name: str,
     start_date: str,
     end_date: str,
-    post_types: Optional[List[str]] = None,
+    post_types: Optional[List[str]] = Query(None),
+    response_format: str = Query("json", alias="format", pattern=FORMAT_PATTERN),
 ):
     logger.info(
-        f"GET /activity/daily called with board={board_name}, start={start_date}, end={end_date}, post_types={post_types}"
+        "GET /activity/daily called with board=%s, start=%s, end=%s, post_types=%s",
+        board_name,
+        start_date,
+        end_date,
+        post_types,
     )
 
+    bounds = day_bounds_or_400(start_date, end_date)
+
     try:
-        plsql = PLSQL(CHAN_DATABASE_URL)
         logger.info("Executing SELECT_DAILY_ACTIVITY")
+        # Once for the rollup, once for the raw tail
+        params = (board_name, *bounds) * 2
+        wanted = _post_type_filter(post_types)
+
+        def to_item(row):
+            if wanted is not None and row[1].lower() not in wanted:
+                return None
+            return DailyActivityData(
+                post_date=str(row[0]), post_type=row[1], post_count=row[2]
+            )
 
-        result = plsql.get_data_from(
-            SELECT_DAILY_ACTIVITY, (board_name, start_date, end_date)
-        )
-        logger.info(f"Query returned {len(result)} rows")
+        if response_format == "ndjson":
+            return ndjson_response(
+                stream_data_async("chan", SELECT_DAILY_ACTIVITY, params), to_item
+            )
 
-        plsql.close_connection()
+        result = await get_data_async(
+            "chan", SELECT_DAILY_ACTIVITY, params, ttl=TTL_ACTIVITY
+        )
+        logger.info("Query returned %d rows", len(result))
 
-        data = []
-        for row in result:
-            if post_types is None or row[1] in post_types:
-                data.append(
-                    DailyActivityData(
-                        post_date=str(row[0]), post_type=row[1], post_count=row[2]
-                    )
-                )
+        data = [item for item in map(to_item, result) if item is not None]
 
         return DailyActivityResponse(
             board_name=board_name, start_date=start_date, end_date=end_date, data=data
         )
 
     except Exception as e:
-        logger.exception(f"Error in get_daily_activity: {e}")
+        logger.exception("Error in get_daily_activity: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/activity/hourly", response_model=HourlyActivityResponse)
 async def get_hourly_activity(
-    board_name: str, selected_date: str, post_types: Optional[List[str]] = None
+    board_name: str,
+    selected_date: str,
+    post_types: Optional[List[str]] = Query(None),
+    response_format: str = Query("json", alias="format", pattern=FORMAT_PATTERN),
 ):
     logger.info(
-        f"GET /activity/hourly called with board={board_name}, date={selected_date}, post_types={post_types}"
+        "GET /activity/hourly called with board=%s, date=%s, post_types=%s",
+        board_name,
+        selected_date,
+        post_types,
     )
 
-    try:
-        plsql = PLSQL(CHAN_DATABASE_URL)
+    bounds = day_bounds_or_400(selected_date)
 
+    try:
         logger.info("Executing SELECT_HOURLY_ACTIVITY")
-        result = plsql.get_data_from(
-            SELECT_HOURLY_ACTIVITY, (board_name, selected_date)
-        )
-        logger.info(f"Query returned {len(result)} rows")
+        # Once for the rollup, once for the raw tail
+        params = (board_name, *bounds) * 2
+        wanted = _post_type_filter(post_types)
+
+        def to_item(row):
+            if wanted is not None and row[2].lower() not in wanted:
+                return None
+            return HourlyActivityData(
+                post_date=str(row[0]),
+                hour=int(row[1]),
+                post_type=row[2],
+                post_count=row[3],
+            )
 
-        plsql.close_connection()
+        if response_format == "ndjson":
+            return ndjson_response(
+                stream_data_async("chan", SELECT_HOURLY_ACTIVITY, params), to_item
+            )
 
-        data = []
-        for row in result:
-            if post_types is None or row[2] in post_types:
-                data.append(
-                    HourlyActivityData(
-                        post_date=str(row[0]),
-                        hour=int(row[1]),
-                        post_type=row[2],
-                        post_count=row[3],
-                    )
-                )
+        result = await get_data_async(
+            "chan", SELECT_HOURLY_ACTIVITY, params, ttl=TTL_ACTIVITY
+        )
+        logger.info("Query returned %d rows", len(result))
+
+        data = [item for item in map(to_item, result) if item is not None]
 
         return HourlyActivityResponse(
             board_name=board_name, selected_date=selected_date, data=data
         )
 
     except Exception as e:
-        logger.exception(f"Error in get_hourly_activity: {e}")
+        logger.exception("Error in get_hourly_activity: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/activity/heatmap", response_model=ActivityHeatmapResponse)
+async def get_activity_heatmap(board_name: str, start_date: str, end_date: str):
+    """Threads per day x hour x post type over a date range, as a dense matrix"""
+    logger.info(
+        "GET /activity/heatmap called with board=%s, start=%s, end=%s",
+        board_name,
+        start_date,
+        end_date,
+    )
+    bounds = heatmap_bounds(start_date, end_date)
+
+    try:
+        # Once for the rollup, once for the raw tail
+        params = (board_name, *bounds) * 2
+        result = await get_data_async(
+            "chan", SELECT_CHAN_ACTIVITY_HEATMAP, params, ttl=TTL_ACTIVITY
+        )
+        logger.info("Query returned %d rows", len(result))
+
+        return heatmap_response("4chan", board_name, start_date, end_date, result)
+
+    except Exception as e:
+        logger.exception("Error in get_activity_heatmap: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/engagement/by-type", response_model=EngagementByTypeResponse)
 async def get_engagement_by_type(board_name: str, start_date: str, end_date: str):
     logger.info(
-        f"GET /engagement/by-type called with boards={board_name}, start={start_date}, end={end_date}"
+        "GET /engagement/by-type called with boards=%s, start=%s, end=%s",
+        board_name,
+        start_date,
+        end_date,
     )
+    bounds = day_bounds_or_400(start_date, end_date)
 
     try:
         board_list = [b.strip() for b in board_name.split(",") if b.strip()]
-        logger.info(f"Parsed board list: {board_list}")
+        logger.info("Parsed board list: %s", board_list)
 
-        plsql = PLSQL(CHAN_DATABASE_URL)
         logger.info("Executing SELECT_CHAN_ENGAGEMENT_BY_TYPE")
 
-        result = plsql.get_data_from(
-            SELECT_CHAN_ENGAGEMENT_BY_TYPE, (board_list, start_date, end_date)
+        result = await get_data_async(
+            "chan",
+            SELECT_CHAN_ENGAGEMENT_BY_TYPE,
+            (board_list, *bounds) * 2,
+            ttl=TTL_ACTIVITY,
         )
-        logger.info(f"Query returned {len(result)} rows")
-
-        plsql.close_connection()
+        logger.info("Query returned %d rows", len(result))
 
         data = []
 
+        debug = logger.isEnabledFor(logging.DEBUG)
         for idx, row in enumerate(result):
-            logger.debug(f"Row {idx}: {row}")
+            if debug:
+                logger.debug("Row %s: %s", idx, row)
             if row and len(row) >= 5:
                 data.append(
                     EngagementByTypeData(
@@ -306,7 +430,7 @@ async def get_engagement_by_type(board_name: str, start_date: str, end_date: str
                     )
                 )
             else:
-                logger.warning(f"Skipping malformed row {idx}: {row}")
+                logger.warning("Skipping malformed row %s: %s", idx, row)
 
         if data:  # avoid division by zero if empty
             max_threads = max(d.total_threads for d in data)
@@ -341,22 +465,164 @@ async def get_engagement_by_type(board_name: str, start_date: str, end_date: str
         )
 
     except Exception as e:
-        logger.exception(f"Error in get_engagement_by_type: {e}")
+        logger.exception("Error in get_engagement_by_type: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _board_filter(board_name):
+    """Optional comma-separated board list as a SQL condition and its params."""
+    boards = [b.strip() for b in (board_name or "").split(",") if b.strip()]
+    if not boards:
+        return "", []
+    return " AND board_name = ANY(%s)", [boards]
+
+
+def _round(value, digits=1):
+    return None if value is None else round(value, digits)
+
+
+@router.get("/threads/lifecycle", response_model=ThreadLifecycleResponse)
+async def get_thread_lifecycle(
+    start_date: str = Query(..., description="YYYY-MM-DD, threads started from"),
+    end_date: str = Query(..., description="YYYY-MM-DD, threads started through"),
+    board_name: Optional[str] = Query(None, description="Comma-separated boards"),
+):
+    """
+    Thread lifecycle per board for threads started in the date range:
+    lifetime, time to bump limit, replies per hour and archive latency
+    (time from the last reply to archiving), from chan_thread_lifecycle.
+    """
+    logger.info(
+        "GET /threads/lifecycle called with boards=%s, start=%s, end=%s",
+        board_name,
+        start_date,
+        end_date,
+    )
+    bounds = day_bounds_or_400(start_date, end_date)
+
+    try:
+        board_filter, board_params = _board_filter(board_name)
+        result = await get_data_async(
+            "chan",
+            SELECT_CHAN_THREAD_LIFECYCLE.format(board_filter=board_filter),
+            (*bounds, *board_params),
+            ttl=TTL_ACTIVITY,
+        )
+        logger.info("Query returned %d rows", len(result))
+
+        data = [
+            ThreadLifecycleData(
+                board_name=row[0],
+                threads=row[1],
+                archived_threads=row[2],
+                bump_limit_threads=row[3],
+                avg_lifetime=_round(row[4]),
+                median_lifetime=_round(row[5]),
+                median_time_to_bump_limit=_round(row[6]),
+                avg_replies_per_hour=_round(row[7], 2),
+                median_archive_latency=_round(row[8]),
+            )
+            for row in result
+        ]
+
+        return ThreadLifecycleResponse(
+            board_name=board_name,
+            start_date=start_date,
+            end_date=end_date,
+            data=data,
+        )
+
+    except Exception as e:
+        logger.exception("Error in get_thread_lifecycle: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/threads/top", response_model=TopThreadsResponse)
+async def get_top_threads(
+    start_date: str = Query(..., description="YYYY-MM-DD, threads started from"),
+    end_date: str = Query(..., description="YYYY-MM-DD, threads started through"),
+    board_name: Optional[str] = Query(None, description="Comma-separated boards"),
+    metric: str = Query(
+        "lifetime_seconds", pattern=f"^({'|'.join(CHAN_THREAD_LIFECYCLE_METRICS)})$"
+    ),
+    limit: int = Query(20, ge=1, le=200),
+):
+    """Threads started in the date range with the highest lifecycle ``metric``."""
+    logger.info(
+        "GET /threads/top called with boards=%s, start=%s, end=%s, metric=%s",
+        board_name,
+        start_date,
+        end_date,
+        metric,
+    )
+    bounds = day_bounds_or_400(start_date, end_date)
+
+    try:
+        board_filter, board_params = _board_filter(board_name)
+        result = await get_data_async(
+            "chan",
+            SELECT_CHAN_THREADS_BY_LIFECYCLE.format(
+                board_filter=board_filter, metric=metric
+            ),
+            (*bounds, *board_params, limit),
+            ttl=TTL_ACTIVITY,
+        )
+
+        data = [
+            ThreadLifecycle(
+                board_name=row[0],
+                thread_no=row[1],
+                thread_time=row[2],
+                reply_count=row[3],
+                bump_limit_reached=row[4],
+                archived=row[5],
+                lifetime_seconds=row[6],
+                time_to_bump_limit=row[7],
+                replies_per_hour=_round(row[8], 2),
+                archive_latency=row[9],
+            )
+            for row in result
+        ]
+
+        return TopThreadsResponse(
+            board_name=board_name,
+            start_date=start_date,
+            end_date=end_date,
+            metric=metric,
+            data=data,
+        )
+
+    except Exception as e:
+        logger.exception("Error in get_top_threads: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/stats/countries", response_model=CountryStatsResponse)
-async def get_country_stats():
-    logger.info("GET /stats/countries called")
+async def get_country_stats(
+    board_name: Optional[str] = Query(None),
+    start_date: Optional[str] = Query(None),
+    end_date: Optional[str] = Query(None),
+    top_n: int = Query(7, ge=1, le=250),
+):
+    logger.info(
+        "GET /stats/countries called with board_name=%s, start_date=%s, end_date=%s, top_n=%s",
+        board_name,
+        start_date,
+        end_date,
+        top_n,
+    )
 
     try:
-        plsql = PLSQL(CHAN_DATABASE_URL)
         logger.info("Executing SELECT_CHAN_COUNTRY_STATS")
+        rollup_filter, tail_filter, params = _rollup_filters(
+            board_name, start_date, end_date
+        )
+        sql = SELECT_CHAN_COUNTRY_STATS.format(
+            rollup_filter=rollup_filter, tail_filter=tail_filter
+        )
 
-        result = plsql.get_data_from(SELECT_CHAN_COUNTRY_STATS, None)
-        logger.info(f"Query returned {len(result)} rows")
-
-        plsql.close_connection()
+        result = await get_data_async("chan", sql, (*params, top_n), ttl=TTL_SUMMARY)
+        logger.info("Query returned %d rows", len(result))
 
         data = []
         for row in result:
@@ -372,5 +638,5 @@ async def get_country_stats():
         return CountryStatsResponse(data=data)
 
     except Exception as e:
-        logger.exception(f"Error in get_country_stats: {e}")
+        logger.exception("Error in get_country_stats: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
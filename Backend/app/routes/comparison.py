@@ -1,53 +1,54 @@
-import asyncio
-import os
-from datetime import datetime, date, timedelta
-from pathlib import Path
-from typing import List
+from datetime import date, timedelta
+from typing import List, Optional
 
 from app.constants.queries import (
     SELECT_BOARD_COUNT,
     SELECT_BOARD_TOXICITY,
     SELECT_CHAN_ENGAGEMENT_BY_TYPE,
-    SELECT_CHAN_EVENT_RELATED,
-    SELECT_CHAN_EVENT_RELATED_ALL,
+    SELECT_CHAN_EVENT_RELATED_INDEXED,
+    SELECT_CHAN_EVENT_RELATED_ALL_INDEXED,
 )
 from app.constants.reddit_queries import (
     SELECT_REDDIT_ENGAGEMENT_BY_TYPE,
-    SELECT_REDDIT_EVENT_RELATED,
-    SELECT_REDDIT_EVENT_RELATED_ALL,
+    SELECT_REDDIT_EVENT_RELATED_INDEXED,
+    SELECT_REDDIT_EVENT_RELATED_ALL_INDEXED,
     SELECT_SUBREDDIT_COUNT,
     SELECT_SUBREDDIT_TOXICITY,
 )
 from app.models.chan import PlatformComparisonData, PlatformComparisonResponse
-from app.models.comparison_response import ForumsToxicity
-from app.utils.plsql import PLSQL, get_data_db
-from dotenv import load_dotenv
+from app.models.comparison_response import (
+    ForumsToxicity,
+    ToxicityDistributionResponse,
+)
+from app.utils.async_plsql import get_data_async
+from app.utils.cache import TTL_ACTIVITY, TTL_CATALOG, TTL_SUMMARY, get_or_load
+from app.utils.cross_platform import LegTimeoutError, run_legs
+from app.utils.dates import day_bounds_or_400, epoch
+from app.utils.events import DEFAULT_EVENT, EVENTS, event_span, event_timeline
+from app.utils.keywords import keyword_regex
+from app.utils.toxicity import toxicity_distribution
 from fastapi import APIRouter, HTTPException, Query
 
 router = APIRouter(prefix="/comparison", tags=["Platform Comparison"])
-load_dotenv(Path(__file__).resolve().parent.parent / ".env")
-
-CHAN_DATABASE_URL = os.getenv("CHAN_DATABASE_URL")
-REDDIT_DATABASE_URL = os.getenv("REDDIT_DATABASE_URL")
-
-
-def sync_get_data(database_url, query):
-    plsql = PLSQL(database_url)
-    data = plsql.get_data_from(query)
-    plsql.close_connection()
-    return data
 
 
 @router.get("/forums")
 async def get_forums():
-    chan_data, reddit_data = await asyncio.gather(
-        asyncio.to_thread(sync_get_data, CHAN_DATABASE_URL, SELECT_BOARD_COUNT),
-        asyncio.to_thread(sync_get_data, REDDIT_DATABASE_URL, SELECT_SUBREDDIT_COUNT),
-    )
+    try:
+        results = await run_legs(
+            {
+                "chan": get_data_async("chan", SELECT_BOARD_COUNT, ttl=TTL_CATALOG),
+                "reddit": get_data_async(
+                    "reddit", SELECT_SUBREDDIT_COUNT, ttl=TTL_CATALOG
+                ),
+            }
+        )
+    except LegTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
 
     return {
-        "4chan_board_count": chan_data,
-        "reddit_subreddit_count": reddit_data,
+        "4chan_board_count": results["chan"],
+        "reddit_subreddit_count": results["reddit"],
     }
 
 
@@ -63,26 +64,26 @@ async def compare_engagement_by_type(
     Returns side-by-side comparison of average replies and thread counts.
     This directly answers RQ1 about platform differences in engagement patterns.
     """
+    start_ts, end_ts = day_bounds_or_400(start_date, end_date)
+
     try:
-        # Get 4chan data
-        plsql_chan = PLSQL(CHAN_DATABASE_URL)
-        chan_result = plsql_chan.get_data_from(
-            SELECT_CHAN_ENGAGEMENT_BY_TYPE, (board_name, start_date, end_date)
-        )
-        plsql_chan.close_connection()
-
-        # Convert dates to Unix timestamps for Reddit query
-        start_dt = datetime.strptime(start_date, "%Y-%m-%d")
-        end_dt = datetime.strptime(end_date, "%Y-%m-%d")
-        start_ts = int(start_dt.timestamp())
-        end_ts = int(end_dt.timestamp())
-
-        # Get Reddit data
-        plsql_reddit = PLSQL(REDDIT_DATABASE_URL)
-        reddit_result = plsql_reddit.get_data_from(
-            SELECT_REDDIT_ENGAGEMENT_BY_TYPE, (subreddit, start_ts, end_ts)
+        results = await run_legs(
+            {
+                "chan": get_data_async(
+                    "chan",
+                    SELECT_CHAN_ENGAGEMENT_BY_TYPE,
+                    ([board_name], start_ts, end_ts) * 2,
+                    ttl=TTL_ACTIVITY,
+                ),
+                "reddit": get_data_async(
+                    "reddit",
+                    SELECT_REDDIT_ENGAGEMENT_BY_TYPE,
+                    (subreddit, start_ts, end_ts) * 2,
+                    ttl=TTL_ACTIVITY,
+                ),
+            }
         )
-        plsql_reddit.close_connection()
+        chan_result, reddit_result = results["chan"], results["reddit"]
 
         # Convert results to dictionaries for easy lookup
         chan_data = {
@@ -128,10 +129,40 @@ async def compare_engagement_by_type(
             end_date=end_date,
             data=comparison_data,
         )
+    except LegTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def _forum_toxicity(database, query, platform):
+    # Averaged per forum in SQL: one row per forum comes back, not per post
+    rows = await get_data_async(database, query)
+    return [
+        ForumsToxicity(
+            forum_name=forum_name,
+            average_toxicity=round(average, 4),
+            platform=platform,
+        )
+        for forum_name, average in rows
+    ]
+
+
+async def _load_top_toxic_forums():
+    results = await run_legs(
+        {
+            "chan": _forum_toxicity("chan", SELECT_BOARD_TOXICITY, "4chan"),
+            "reddit": _forum_toxicity("reddit", SELECT_SUBREDDIT_TOXICITY, "reddit"),
+        }
+    )
+    final_result = results["chan"] + results["reddit"]
+
+    # Sort by average toxicity descending
+    final_result.sort(key=lambda x: x.average_toxicity, reverse=True)
+
+    return final_result
+
+
 @router.get("/top-toxic", response_model=List[ForumsToxicity])
 async def get_top_toxic_forums():
     """
@@ -139,219 +170,154 @@ async def get_top_toxic_forums():
     Combines data from both platforms and returns a unified list.
     """
     try:
-        chan_toxicity = get_data_db(CHAN_DATABASE_URL, SELECT_BOARD_TOXICITY, None)
-        reddit_toxicity = get_data_db(
-            REDDIT_DATABASE_URL, SELECT_SUBREDDIT_TOXICITY, None
+        return await get_or_load(
+            ("chan", "reddit"), "top-toxic", None, TTL_SUMMARY, _load_top_toxic_forums
         )
 
-        final_result = []
-
-        # Process 4chan toxicity
-        if len(chan_toxicity) > 0:
-            chan_scores = {}
-            for board_name, toxicity in chan_toxicity:
-                if toxicity is not None:
-                    if board_name not in chan_scores:
-                        chan_scores[board_name] = []
-                    chan_scores[board_name].append(float(toxicity))
-
-            for board_name, scores in chan_scores.items():
-                avg = sum(scores) / len(scores)
-                final_result.append(
-                    ForumsToxicity(
-                        forum_name=board_name,
-                        average_toxicity=round(avg, 4),
-                        platform="4chan",
-                    )
-                )
+    except HTTPException:
+        raise
+    except LegTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # Process Reddit toxicity
-        if len(reddit_toxicity) > 0:
-            reddit_scores = {}
-            for subreddit_name, toxicity in reddit_toxicity:
-                if toxicity is not None:
-                    if subreddit_name not in reddit_scores:
-                        reddit_scores[subreddit_name] = []
-                    reddit_scores[subreddit_name].append(float(toxicity))
-
-            for subreddit_name, scores in reddit_scores.items():
-                avg = sum(scores) / len(scores)
-                final_result.append(
-                    ForumsToxicity(
-                        forum_name=subreddit_name,
-                        average_toxicity=round(avg, 4),
-                        platform="reddit",
-                    )
-                )
 
-        # Sort by average toxicity descending
-        final_result.sort(key=lambda x: x.average_toxicity, reverse=True)
+@router.get("/toxicity/distribution", response_model=ToxicityDistributionResponse)
+async def get_toxicity_distribution(
+    platform: str = Query("all", pattern="^(all|chan|reddit)$"),
+    forums: Optional[List[str]] = Query(
+        None, description="Boards and/or subreddits to include (default: all)"
+    ),
+    start_date: Optional[str] = Query(
+        None, description="First scoring day, YYYY-MM-DD"
+    ),
+    end_date: Optional[str] = Query(None, description="Last scoring day, YYYY-MM-DD"),
+):
+    """
+    Mean, scored count and p50/p90/p99 of every toxicity attribute per board
+    and/or subreddit, optionally limited to posts scored in a date range.
+    """
+    start_ts = day_bounds_or_400(start_date)[0] if start_date else None
+    end_ts = day_bounds_or_400(end_date)[1] if end_date else None
+    databases = ("chan", "reddit") if platform == "all" else (platform,)
 
-        return final_result
+    try:
+        results = await run_legs(
+            {
+                database: toxicity_distribution(database, forums, start_ts, end_ts)
+                for database in databases
+            }
+        )
 
-    except HTTPException:
-        raise
+        return ToxicityDistributionResponse(
+            platform=platform,
+            start_date=start_date,
+            end_date=end_date,
+            forums=[item for database in databases for item in results[database]],
+        )
+
+    except LegTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-CLOUDFLARE_KEYWORDS = [
-    "cloudflare",
-    "cloud flare",
-    "cf outage",
-    "cloudflare down",
-    "cloudflare outage",
-    "dns issue",
-    "cloudflare dns",
-    "cloudflare error",
-    "cloudflare not working",
-    "gateway timeout",
-    "5xx",
-    "error 500",
-    "error 520",
-    "error 522",
-    # Added keywords
-    "cloudflare service disruption",
-    "cloudflare status",
-    "cloudflare network issue",
-    "cloudflare connectivity issue",
-    "cloudflare routing issue",
-    "cloudflare incident",
-    "cloudflare downtime",
-    "cloudflare problems",
-    "cloudflare malfunction",
-    "cloudflare crash",
-    # DNS-related
-    "cloudflare dns outage",
-    "cloudflare dns down",
-    "cloudflare dns failure",
-    "cloudflare dns not responding",
-    "dns resolving issue",
-    "dns resolution failure",
-    "dns lookup failed",
-    "dns unavailable",
-    "dns propagation issue",
-    # Errors
-    "cloudflare 5xx",
-    "cloudflare 500 error",
-    "cloudflare 502 bad gateway",
-    "cloudflare 503 service unavailable",
-    "cloudflare 504 gateway timeout",
-    "cloudflare 524 timeout",
-    "cloudflare 523 origin unreachable",
-    "cloudflare 521 web server down",
-    "origin server timeout",
-    "server unreachable",
-    # Performance & security issues
-    "cloudflare rate limit",
-    "cloudflare firewall error",
-    "cloudflare ssl issue",
-    "ssl handshake failed",
-    "tls handshake failure",
-    "connection timed out",
-    "connection reset",
-    "network congestion cloudflare",
-    "ddos protection triggered",
-    "cdn outage",
-    "edge server issue",
-    # Cloudflare services outages
-    "cloudflare api down",
-    "cloudflare workers issue",
-    "cloudflare workers outage",
-    "cloudflare pages outage",
-    "cloudflare r2 outage",
-    "cloudflare zero trust issue",
-    "cloudflare tunnel down",
-    "cloudflare warp not working",
-    # User search phrases
-    "why is cloudflare down",
-    "cloudflare issues today",
-    "cloudflare outage today",
-    "sites down cloudflare",
-    "website not loading cloudflare",
-    "cannot connect via cloudflare",
-    "websites timing out cf",
-]
+@router.get("/events")
+async def get_events():
+    """Events registered for the event timeline, with their keywords."""
+    return list(EVENTS.values())
+
+
+async def _scan_event_timeline(database, community, start_ts, end_ts, patterns):
+    # Raw-table fallback for ranges outside an event's precomputed span.
+    # Parameters order: start_ts, end_ts (for date_series), then community,
+    # start, end, patterns (reddit: repeated for posts and comments; chan:
+    # for subject and comment). No community means all boards/subreddits.
+    if database == "reddit":
+        if community:
+            query = SELECT_REDDIT_EVENT_RELATED_INDEXED
+            params = (start_ts, end_ts, community, start_ts, end_ts, patterns)
+            params += (community, start_ts, end_ts, patterns)
+        else:
+            query = SELECT_REDDIT_EVENT_RELATED_ALL_INDEXED
+            params = (start_ts, end_ts, start_ts, end_ts, patterns)
+            params += (start_ts, end_ts, patterns)
+    elif community:
+        query = SELECT_CHAN_EVENT_RELATED_INDEXED
+        params = (start_ts, end_ts, community, start_ts, end_ts, patterns, patterns)
+    else:
+        query = SELECT_CHAN_EVENT_RELATED_ALL_INDEXED
+        params = (start_ts, end_ts, start_ts, end_ts, patterns, patterns)
+
+    return await get_data_async(database, query, params, ttl=TTL_ACTIVITY)
 
 
 @router.get("/event-related-timeline")
 async def get_event_related_timeline(
-    platform: str, community: str = "", event_date: date = None, window: int = 7
+    platform: str,
+    community: str = "",
+    event_date: date = None,
+    window: int = 7,
+    event: str = Query(DEFAULT_EVENT, description="Event id, see /comparison/events"),
 ):
-    print("event_date", event_date)
-    start_dt = event_date - timedelta(days=window)
-    end_dt = event_date + timedelta(days=window)
-
-    # Build LIKE patterns such as ["%cloudflare%", "%cf outage%", ...]
-    patterns = [f"%{kw}%" for kw in CLOUDFLARE_KEYWORDS]
-    start_ts = int(datetime.combine(start_dt, datetime.min.time()).timestamp())
-    end_ts = int(datetime.combine(end_dt, datetime.min.time()).timestamp())
-    # Reddit
-    print(start_ts, end_ts)
-    if platform == "reddit":
-        # Parameters order: start_ts, end_ts (for date_series), then community, start, end, patterns (repeated for posts and comments)
-        params = (
-            start_ts,  # date_series start
-            end_ts,  # date_series end
-            community,
-            start_ts,
-            end_ts,
-            patterns,
-            community,
-            start_ts,
-            end_ts,
-            patterns,
-        )
-        rows = get_data_db(REDDIT_DATABASE_URL, SELECT_REDDIT_EVENT_RELATED, params)
-
-    # 4chan
-    elif platform == "chan":
-        # Parameters order: start_ts, end_ts (for date_series), then community, start, end, patterns (for subject), patterns (for comment)
-        params = (start_ts, end_ts, community, start_ts, end_ts, patterns, patterns)
-        rows = get_data_db(CHAN_DATABASE_URL, SELECT_CHAN_EVENT_RELATED, params)
-
-    # Both platforms - need to merge results by date
-    elif platform == "all" or platform == "":
-        # Get Reddit data (all subreddits - no community filter)
-        reddit_params = (
-            start_ts,
-            end_ts,
-            start_ts,
-            end_ts,
-            patterns,
-            start_ts,
-            end_ts,
-            patterns,
-        )
-        reddit_rows = get_data_db(
-            REDDIT_DATABASE_URL, SELECT_REDDIT_EVENT_RELATED_ALL, reddit_params
-        )
+    registered = EVENTS.get(event)
+    if registered is None:
+        raise HTTPException(404, f"Unknown event '{event}'")
+
+    if platform == "all" or platform == "":
+        # Both platforms, all communities - counts are merged by date
+        databases, community_filter = registered.platforms, ""
+    elif platform in ("reddit", "chan"):
+        if platform not in registered.platforms:
+            raise HTTPException(400, f"Event '{event}' is not tracked on {platform}")
+        databases, community_filter = [platform], community
+    else:
+        raise HTTPException(400, "Invalid platform")
 
-        # Get 4chan data (all boards - no community filter)
-        chan_params = (start_ts, end_ts, start_ts, end_ts, patterns, patterns)
-        chan_rows = get_data_db(
-            CHAN_DATABASE_URL, SELECT_CHAN_EVENT_RELATED_ALL, chan_params
-        )
+    event_date = event_date or registered.event_date
+    start_ts = epoch(event_date - timedelta(days=window))
+    end_ts = epoch(event_date + timedelta(days=window))
+
+    # Inside the event's span the matcher has counted every day already;
+    # wider ranges fall back to matching the raw text via the trigram indexes
+    span_start, span_end = event_span(registered)
+    if span_start <= start_ts and end_ts <= span_end:
+        legs = {
+            database: event_timeline(
+                registered, database, community_filter, start_ts, end_ts
+            )
+            for database in databases
+        }
+    else:
+        patterns = keyword_regex(registered.keywords)
+        legs = {
+            database: _scan_event_timeline(
+                database, community_filter, start_ts, end_ts, patterns
+            )
+            for database in databases
+        }
 
-        # Merge results by date - sum counts for same dates
-        date_counts = {}
-        for row in reddit_rows:
-            date_key = row[0]
-            date_counts[date_key] = date_counts.get(date_key, 0) + row[1]
-        for row in chan_rows:
+    try:
+        results = await run_legs(legs)
+    except LegTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+
+    # Merge results by date - sum counts for same dates
+    date_counts = {}
+    for database in databases:
+        for row in results[database]:
             date_key = row[0]
             date_counts[date_key] = date_counts.get(date_key, 0) + row[1]
 
-        # Convert back to sorted list of tuples
-        rows = sorted(date_counts.items(), key=lambda x: x[0])
-    else:
-        raise HTTPException(400, "Invalid platform")
+    # Convert back to sorted list of tuples
+    rows = sorted(date_counts.items(), key=lambda x: x[0])
 
     final_result = [{"date": str(row[0]), "count": row[1]} for row in rows]
 
     return {
         "platform": platform,
         "community": community,
+        "event": event,
         "event_date": str(event_date),
         "window": window,
         "timeline": final_result,
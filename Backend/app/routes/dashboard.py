@@ -0,0 +1,213 @@
+import asyncio
+import os
+import time
+
+from app.models.dashboard import DashboardRequest, DashboardResponse, WidgetResult
+from app.routes import chan, comparison, reddit
+from app.utils.logger import Logger
+from app.utils.metrics import observe_widget
+from fastapi import APIRouter, HTTPException
+from fastapi.dependencies.utils import request_params_to_args
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.routing import APIRoute
+
+router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
+logger = Logger("logs").get_logger()
+
+WIDGET_TIMEOUT = float(os.getenv("DASHBOARD_WIDGET_TIMEOUT", "30"))
+# Widgets of one request running at once, so a single request can't take
+# every pooled connection
+WIDGET_CONCURRENCY = int(os.getenv("DASHBOARD_WIDGET_CONCURRENCY", "6"))
+
+# page -> widget name -> route handler. Widgets take the same params as the
+# endpoint they wrap and return the same payload.
+WIDGETS = {
+    "chan": {
+        "boards": chan.get_boards,
+        "summary": chan.get_summary_stats,
+        "daily_stats": chan.get_daily_post_stats,
+        "countries": chan.get_country_stats,
+        "activity_daily": chan.get_daily_activity,
+        "activity_hourly": chan.get_hourly_activity,
+        "activity_heatmap": chan.get_activity_heatmap,
+        "engagement_by_type": chan.get_engagement_by_type,
+        "thread_lifecycle": chan.get_thread_lifecycle,
+        "top_threads": chan.get_top_threads,
+    },
+    "reddit": {
+        "subreddits": reddit.get_subreddits,
+        "summary": reddit.get_summary_stats,
+        "daily_counts": reddit.get_daily_post_counts,
+        "top_subscribers": reddit.get_top_subscribers,
+        "activity_heatmap": reddit.get_activity_heatmap,
+        "engagement_by_type": reddit.get_engagement_by_type,
+        "score_distribution": reddit.get_score_distribution,
+        "upvote_ratio": reddit.get_upvote_ratio_by_type,
+        "comment_coverage": reddit.get_comment_coverage,
+        "comment_trees": reddit.get_comment_tree_structure,
+    },
+    "comparison": {
+        "forums": comparison.get_forums,
+        "engagement_by_type": comparison.compare_engagement_by_type,
+        "top_toxic": comparison.get_top_toxic_forums,
+        "toxicity_distribution": comparison.get_toxicity_distribution,
+        "event_timeline": comparison.get_event_related_timeline,
+    },
+}
+
+# The APIRoute of each handler: widgets take their params through the
+# route's own dependant, so they are validated exactly as the endpoint's
+ROUTES = {
+    route.endpoint: route
+    for module in (chan, reddit, comparison)
+    for route in module.router.routes
+    if isinstance(route, APIRoute)
+}
+
+# Streaming responses can't be embedded in a combined payload, and without a
+# request catalog endpoints return their payload instead of a 304-able response
+_FIXED_ARGUMENTS = {"response_format": "json", "request": None}
+
+
+def _query_fields(route):
+    """The route's query parameter fields a widget can set."""
+    return [
+        field
+        for field in route.dependant.query_params
+        if field.name not in _FIXED_ARGUMENTS
+    ]
+
+
+def _resolve_arguments(route, params):
+    """
+    Turn a widget's params into keyword arguments for the route handler,
+    validated against the route's query parameters by FastAPI itself.
+    Raises RequestValidationError as the endpoint would answer with a 422.
+    """
+    fields = _query_fields(route)
+    fixed = {
+        field.alias
+        for field in route.dependant.query_params
+        if field.name in _FIXED_ARGUMENTS
+    }
+    params = {key: value for key, value in params.items() if key not in fixed}
+    unknown = sorted(set(params) - {field.alias for field in fields})
+    if unknown:
+        raise RequestValidationError(
+            [
+                {
+                    "type": "extra_forbidden",
+                    "loc": ("query", name),
+                    "msg": "Unknown parameter",
+                    "input": params[name],
+                }
+                for name in unknown
+            ]
+        )
+
+    kwargs, errors = request_params_to_args(fields, params)
+    if errors:
+        raise RequestValidationError(errors)
+    for field in route.dependant.query_params:
+        if field.name in _FIXED_ARGUMENTS:
+            kwargs[field.name] = _FIXED_ARGUMENTS[field.name]
+    if route.dependant.request_param_name:
+        kwargs[route.dependant.request_param_name] = _FIXED_ARGUMENTS["request"]
+    return kwargs
+
+
+async def _run_widget(page, name, handler, params, slots):
+    async with slots:
+        return await _run_widget_now(page, name, handler, params)
+
+
+async def _run_widget_now(page, name, handler, params):
+    route = ROUTES[handler]
+    start = time.perf_counter()
+    try:
+        kwargs = _resolve_arguments(route, params)
+        data = await asyncio.wait_for(handler(**kwargs), WIDGET_TIMEOUT)
+        result = {"status": "ok", "status_code": 200, "data": jsonable_encoder(data)}
+    except RequestValidationError as e:
+        result = {
+            "status": "error",
+            "status_code": 422,
+            "error": jsonable_encoder(e.errors()),
+        }
+    except HTTPException as e:
+        result = {"status": "error", "status_code": e.status_code, "error": e.detail}
+    except asyncio.TimeoutError:
+        result = {
+            "status": "timeout",
+            "status_code": 504,
+            "error": f"Widget timed out after {WIDGET_TIMEOUT}s",
+        }
+    except Exception as e:
+        logger.exception("Widget %s failed: %s", name, e)
+        result = {"status": "error", "status_code": 500, "error": str(e)}
+
+    duration = time.perf_counter() - start
+    observe_widget(page, name, route.path, result["status_code"], duration)
+    return WidgetResult(
+        widget=name,
+        duration_ms=round(duration * 1000, 3),
+        **result,
+    )
+
+
+@router.get("/{page}/widgets")
+async def list_widgets(page: str):
+    """Widgets available on a dashboard page and the params each accepts."""
+    widgets = WIDGETS.get(page)
+    if widgets is None:
+        raise HTTPException(status_code=404, detail=f"Unknown dashboard '{page}'")
+
+    return {
+        name: {
+            field.alias: {"required": field.field_info.is_required()}
+            for field in _query_fields(ROUTES[handler])
+        }
+        for name, handler in widgets.items()
+    }
+
+
+@router.post("/{page}", response_model=DashboardResponse)
+async def get_dashboard(page: str, request: DashboardRequest):
+    """
+    Run several widget queries in one round trip.
+
+    Widgets run concurrently (across both databases, at most
+    DASHBOARD_WIDGET_CONCURRENCY at a time), so the page costs roughly its
+    slowest widget. A failing or slow widget is reported in its own entry
+    without failing the others.
+    """
+    widgets = WIDGETS.get(page)
+    if widgets is None:
+        raise HTTPException(status_code=404, detail=f"Unknown dashboard '{page}'")
+
+    ids = [spec.id or spec.widget for spec in request.widgets]
+    if len(set(ids)) != len(ids):
+        raise HTTPException(status_code=400, detail="Widget ids must be unique")
+
+    unknown = [spec.widget for spec in request.widgets if spec.widget not in widgets]
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown widget(s): {', '.join(unknown)}"
+        )
+
+    logger.info("POST /dashboard/%s called with widgets=%s", page, ids)
+    start = time.perf_counter()
+    slots = asyncio.Semaphore(WIDGET_CONCURRENCY)
+    results = await asyncio.gather(
+        *(
+            _run_widget(page, spec.widget, widgets[spec.widget], spec.params, slots)
+            for spec in request.widgets
+        )
+    )
+
+    return DashboardResponse(
+        page=page,
+        duration_ms=round((time.perf_counter() - start) * 1000, 3),
+        widgets=dict(zip(ids, results)),
+    )
@@ -1,50 +1,93 @@
-import os
-from datetime import datetime
-from pathlib import Path
+from datetime import datetime, timezone
 from typing import List, Optional
 
 from app.constants.reddit_queries import (
+    SELECT_REDDIT_ACTIVITY_HEATMAP,
+    SELECT_REDDIT_COMMENT_COVERAGE,
+    SELECT_REDDIT_COMMENT_COVERAGE_GAPS,
+    SELECT_REDDIT_COMMENT_TREE,
+    SELECT_REDDIT_COMMENT_TREE_LEVELS,
+    SELECT_REDDIT_COMMENT_TREE_STRUCTURE,
+    SELECT_REDDIT_SCORE_HISTOGRAM,
+    SELECT_REDDIT_SCORE_SUMMARY,
+    SELECT_REDDIT_UPVOTE_RATIO_BY_TYPE,
     SELECT_DAILY_POST_COUNTS_BY_SUBREDDIT,
     SELECT_NUMBER_OF_SUBSCRIBERS,
     SELECT_REDDIT_ENGAGEMENT_BY_TYPE,
+    SELECT_REDDIT_SUBREDDIT_COUNT,
     SELECT_REDDIT_SUMMARY_STATS,
+    SELECT_SUBREDDIT_POST_COUNTS,
 )
+from app.models.activity import ActivityHeatmapResponse
 from app.models.reddit import (
+    CommentCountGap,
+    CommentCoverageResponse,
+    CommentTreeLevel,
+    CommentTreeResponse,
+    CommentTreeStructureData,
+    CommentTreeStructureResponse,
     DailyPostCountByDate,
     DailyPostCountsResponse,
     EngagementByTypeData,
     EngagementByTypeResponse,
+    ScoreBucket,
+    ScoreDistributionResponse,
     SubScribers,
     SummaryStats,
+    UpvoteRatioByTypeData,
+    UpvoteRatioByTypeResponse,
 )
-from app.utils.plsql import PLSQL
-from dotenv import load_dotenv
-from fastapi import APIRouter, HTTPException, Query
+from app.utils.async_plsql import get_data_async
+from app.utils.cache import TTL_ACTIVITY, TTL_SUMMARY
+from app.utils.catalog import catalog, conditional_response
+from app.utils.dates import parse_date
+from app.utils.estimates import error_bound, table_estimates
+from app.utils.heatmap import heatmap_bounds, heatmap_response
+from fastapi import APIRouter, HTTPException, Query, Request
 
 router = APIRouter(prefix="/reddit", tags=["Reddit"])
-load_dotenv(Path(__file__).resolve().parent.parent / ".env")
 
-REDDIT_DATABASE_URL = os.getenv("REDDIT_DATABASE_URL")
+
+SUBREDDITS_CATALOG = "reddit_subreddits"
+TOP_SUBSCRIBERS_CATALOG = "reddit_top_subscribers"
+
+
+async def _load_subreddits():
+    result = await get_data_async("reddit", SELECT_SUBREDDIT_POST_COUNTS)
+    return {"subreddits": [{"name": row[0], "post_count": row[1]} for row in result]}
+
+
+def _subreddit_display_name(subreddit_name):
+    if subreddit_name.lower().startswith("r/"):
+        subreddit_name = subreddit_name[2:]
+    elif subreddit_name.lower().startswith("/r/"):
+        subreddit_name = subreddit_name[3:]
+    return subreddit_name[0].upper() + subreddit_name[1:]
+
+
+async def _load_top_subscribers():
+    result = await get_data_async("reddit", SELECT_NUMBER_OF_SUBSCRIBERS)
+    return [
+        SubScribers(
+            subreddit_name=_subreddit_display_name(subreddit_name),
+            subscribers=subscribers,
+        )
+        for subreddit_name, subscribers in result
+    ]
+
+
+catalog.register(SUBREDDITS_CATALOG, "reddit", _load_subreddits)
+catalog.register(TOP_SUBSCRIBERS_CATALOG, "reddit", _load_top_subscribers)
 
 
 @router.get("/subreddits")
-async def get_subreddits():
-    """Get list of available subreddits"""
+async def get_subreddits(request: Request):
+    """
+    Get list of available subreddits. Served from the in-memory catalog with
+    ETag/Last-Modified, so revalidation is answered with a 304.
+    """
     try:
-        plsql = PLSQL(REDDIT_DATABASE_URL)
-        query = """
-        SELECT DISTINCT subreddit, COUNT(*) as post_count
-        FROM posts
-        GROUP BY subreddit
-        ORDER BY post_count DESC
-        LIMIT 20
-        """
-        result = plsql.get_data_from(query, ())
-        plsql.close_connection()
-
-        return {
-            "subreddits": [{"name": row[0], "post_count": row[1]} for row in result]
-        }
+        return conditional_response(request, await catalog.get(SUBREDDITS_CATALOG))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -55,8 +98,6 @@ async def debug_posts(
 ):
     """Debug endpoint to check Reddit posts data"""
     try:
-        plsql = PLSQL(REDDIT_DATABASE_URL)
-
         # First check table structure
         structure_query = """
         SELECT column_name, data_type 
@@ -64,13 +105,13 @@ async def debug_posts(
         WHERE table_name = 'posts'
         ORDER BY ordinal_position
         """
-        structure = plsql.get_data_from(structure_query, ())
+        structure = await get_data_async("reddit", structure_query, ())
 
         # Check all posts
         count_query = """
         SELECT COUNT(*) FROM posts
         """
-        total = plsql.get_data_from(count_query, ())
+        total = await get_data_async("reddit", count_query, ())
 
         # Sample posts
         sample_query = """
@@ -78,9 +119,7 @@ async def debug_posts(
         FROM posts
         LIMIT 10
         """
-        samples = plsql.get_data_from(sample_query, ())
-
-        plsql.close_connection()
+        samples = await get_data_async("reddit", sample_query, ())
 
         return {
             "total_posts_in_db": total[0][0] if total else 0,
@@ -113,12 +152,12 @@ async def get_engagement_by_type(
     This directly answers RQ1 about how different post types affect engagement.
     """
     try:
-        plsql = PLSQL(REDDIT_DATABASE_URL)
-        result = plsql.get_data_from(
+        result = await get_data_async(
+            "reddit",
             SELECT_REDDIT_ENGAGEMENT_BY_TYPE,
-            (subreddit, start_timestamp, end_timestamp),
+            (subreddit, start_timestamp, end_timestamp) * 2,
+            ttl=TTL_ACTIVITY,
         )
-        plsql.close_connection()
 
         data = []
         for row in result:
@@ -146,18 +185,324 @@ async def get_engagement_by_type(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/stats/summary", response_model=SummaryStats)
-async def get_summary_stats():
+# Lower edges of the score histogram buckets; scores below 0 get their own
+SCORE_BUCKET_EDGES = [0, 1, 10, 100, 1000, 10000]
+SCORE_QUANTILES = (0.5, 0.9, 0.99)
+
+
+def _date_label(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d")
+
+
+@router.get("/engagement/score-distribution", response_model=ScoreDistributionResponse)
+async def get_score_distribution(
+    subreddit: str = Query(..., description="Subreddit name"),
+    start_timestamp: int = Query(..., description="Start Unix timestamp"),
+    end_timestamp: int = Query(..., description="End Unix timestamp"),
+):
     """
-    Get summary statistics: total posts, unique boards, and total toxicity.
+    Score histogram, mean and quantiles of a subreddit's posts, read from
+    the typed reddit_post_metrics projection of post_details.
     """
+    params = (subreddit, start_timestamp, end_timestamp)
     try:
-        plsql = PLSQL(REDDIT_DATABASE_URL)
+        histogram = await get_data_async(
+            "reddit",
+            SELECT_REDDIT_SCORE_HISTOGRAM,
+            (SCORE_BUCKET_EDGES, *params),
+            ttl=TTL_ACTIVITY,
+        )
+        summary = await get_data_async(
+            "reddit",
+            SELECT_REDDIT_SCORE_SUMMARY,
+            (list(SCORE_QUANTILES), *params),
+            ttl=TTL_ACTIVITY,
+        )
+        scored_posts, avg_score, quantiles, max_score = summary[0]
+
+        counts = dict(histogram)
+        edges = [None, *SCORE_BUCKET_EDGES, None]
+        buckets = [
+            ScoreBucket(
+                min_score=edges[i], max_score=edges[i + 1], post_count=counts.get(i, 0)
+            )
+            for i in range(len(SCORE_BUCKET_EDGES) + 1)
+        ]
+
+        return ScoreDistributionResponse(
+            subreddit=subreddit,
+            start_date=_date_label(start_timestamp),
+            end_date=_date_label(end_timestamp),
+            scored_posts=scored_posts,
+            avg_score=None if avg_score is None else round(avg_score, 2),
+            quantiles={
+                f"p{round(q * 100):g}": value
+                for q, value in zip(
+                    SCORE_QUANTILES, quantiles or [None] * len(SCORE_QUANTILES)
+                )
+            },
+            max_score=max_score,
+            buckets=buckets,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/engagement/upvote-ratio", response_model=UpvoteRatioByTypeResponse)
+async def get_upvote_ratio_by_type(
+    subreddit: str = Query(..., description="Subreddit name"),
+    start_timestamp: int = Query(..., description="Start Unix timestamp"),
+    end_timestamp: int = Query(..., description="End Unix timestamp"),
+):
+    """Mean and median upvote ratio (and mean score) per post type."""
+    try:
+        result = await get_data_async(
+            "reddit",
+            SELECT_REDDIT_UPVOTE_RATIO_BY_TYPE,
+            (subreddit, start_timestamp, end_timestamp),
+            ttl=TTL_ACTIVITY,
+        )
+
+        data = [
+            UpvoteRatioByTypeData(
+                post_type=row[0],
+                posts=row[1],
+                avg_upvote_ratio=None if row[2] is None else round(row[2], 4),
+                median_upvote_ratio=None if row[3] is None else round(row[3], 4),
+                avg_score=None if row[4] is None else round(row[4], 2),
+            )
+            for row in result
+        ]
+
+        return UpvoteRatioByTypeResponse(
+            subreddit=subreddit,
+            start_date=_date_label(start_timestamp),
+            end_date=_date_label(end_timestamp),
+            data=data,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/engagement/comment-coverage", response_model=CommentCoverageResponse)
+async def get_comment_coverage(
+    subreddit: str = Query(..., description="Subreddit name"),
+    start_timestamp: int = Query(..., description="Start Unix timestamp"),
+    end_timestamp: int = Query(..., description="End Unix timestamp"),
+    top_n: int = Query(10, ge=0, le=100, description="Posts with the largest gaps"),
+):
+    """
+    Comment counts Reddit reported when the posts were crawled (num_comments)
+    against the comments the crawler actually stored for them.
+    """
+    params = (subreddit, start_timestamp, end_timestamp)
+    try:
+        totals = await get_data_async(
+            "reddit", SELECT_REDDIT_COMMENT_COVERAGE, params, ttl=TTL_ACTIVITY
+        )
+        gaps = await get_data_async(
+            "reddit",
+            SELECT_REDDIT_COMMENT_COVERAGE_GAPS,
+            (*params, top_n),
+            ttl=TTL_ACTIVITY,
+        )
+        posts, reported, observed, missing = totals[0]
+
+        return CommentCoverageResponse(
+            subreddit=subreddit,
+            start_date=_date_label(start_timestamp),
+            end_date=_date_label(end_timestamp),
+            posts=posts,
+            reported_comments=reported,
+            observed_comments=observed,
+            coverage=round(observed / reported, 4) if reported else None,
+            posts_missing_comments=missing,
+            largest_gaps=[
+                CommentCountGap(
+                    unique_name=row[0],
+                    reported_comments=row[1],
+                    observed_comments=row[2],
+                )
+                for row in gaps
+            ],
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # Parameters for the query (board_name, start_date, end_date repeated twice)
 
-        result = plsql.get_data_from(SELECT_REDDIT_SUMMARY_STATS, None)
-        plsql.close_connection()
+def _round(value, digits=2):
+    return None if value is None else round(value, digits)
+
+
+@router.get("/threads/structure", response_model=CommentTreeStructureResponse)
+async def get_comment_tree_structure(
+    start_timestamp: int = Query(..., description="Start Unix timestamp"),
+    end_timestamp: int = Query(..., description="End Unix timestamp"),
+    subreddit: Optional[str] = Query(None, description="Subreddit (default: all)"),
+):
+    """
+    Comment-tree depth, branching factor, time to first reply and reply
+    velocity per subreddit and post type, for posts created in the range.
+    Read from the summaries kept by the reddit_comment_trees job.
+    """
+    try:
+        result = await get_data_async(
+            "reddit",
+            SELECT_REDDIT_COMMENT_TREE_STRUCTURE,
+            (start_timestamp, end_timestamp, subreddit),
+            ttl=TTL_ACTIVITY,
+        )
+
+        data = [
+            CommentTreeStructureData(
+                subreddit=row[0],
+                post_type=row[1],
+                posts=row[2],
+                posts_with_comments=row[3],
+                comments=row[4],
+                avg_depth=_round(row[5]),
+                avg_max_depth=_round(row[6]),
+                max_depth=row[7],
+                branching_factor=_round(row[8]),
+                median_first_reply_seconds=_round(row[9], 1),
+                avg_replies_per_hour=_round(row[10]),
+            )
+            for row in result
+        ]
+
+        return CommentTreeStructureResponse(
+            subreddit=subreddit,
+            start_date=_date_label(start_timestamp),
+            end_date=_date_label(end_timestamp),
+            data=data,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _epoch(timestamp):
+    # comments.created_timestamp is UTC without a time zone
+    return timestamp.replace(tzinfo=timezone.utc).timestamp()
+
+
+@router.get("/threads/{post_id}", response_model=CommentTreeResponse)
+async def get_comment_tree(post_id: str):
+    """One post's comment-tree summary and the comments at each depth."""
+    try:
+        result = await get_data_async("reddit", SELECT_REDDIT_COMMENT_TREE, (post_id,))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if not result:
+        raise HTTPException(status_code=404, detail="No comments placed for this post")
+
+    # row: post_id, subreddit, post_type, created_at, comments, top level,
+    # orphans, max depth, depth sum, comments with replies, first/last comment
+    row = result[0]
+    created_at, comments, orphans = row[3], row[4], row[6]
+    first_comment_time, last_comment_time = row[10], row[11]
+    try:
+        levels = await get_data_async(
+            "reddit", SELECT_REDDIT_COMMENT_TREE_LEVELS, (post_id,)
+        )
+
+        first_reply_seconds = replies_per_hour = None
+        if created_at is not None and first_comment_time is not None:
+            first_reply_seconds = max(_epoch(first_comment_time) - created_at, 0)
+            span = max(_epoch(last_comment_time) - created_at, 60)
+            replies_per_hour = round(comments * 3600 / span, 2)
+        # The post is the parent of the top-level comments
+        parents = row[9] + (row[5] > 0)
+
+        return CommentTreeResponse(
+            post_id=post_id,
+            subreddit=row[1],
+            post_type=row[2],
+            comments=comments,
+            top_level_comments=row[5],
+            orphan_comments=orphans,
+            max_depth=row[7],
+            avg_depth=round(row[8] / comments, 2) if comments else None,
+            branching_factor=(
+                round((comments - orphans) / parents, 2) if parents else None
+            ),
+            first_reply_seconds=first_reply_seconds,
+            replies_per_hour=replies_per_hour,
+            first_comment_time=first_comment_time,
+            last_comment_time=last_comment_time,
+            levels=[
+                CommentTreeLevel(depth=row[0], comments=row[1], with_replies=row[2])
+                for row in levels
+            ],
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/activity/heatmap", response_model=ActivityHeatmapResponse)
+async def get_activity_heatmap(
+    subreddit: str = Query(..., description="Subreddit name"),
+    start_date: str = Query(..., description="Start date in YYYY-MM-DD format"),
+    end_date: str = Query(..., description="End date in YYYY-MM-DD format"),
+):
+    """
+    Posts per day x hour x post type over a date range, as a dense matrix.
+    """
+    start_ts, end_ts = heatmap_bounds(start_date, end_date)
+
+    try:
+        result = await get_data_async(
+            "reddit",
+            SELECT_REDDIT_ACTIVITY_HEATMAP,
+            (subreddit, start_ts, end_ts) * 2,
+            ttl=TTL_ACTIVITY,
+        )
+        return heatmap_response("reddit", subreddit, start_date, end_date, result)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def _approximate_summary_stats():
+    tables = await table_estimates("reddit", ("posts", "toxicity", "comments"))
+    if len(tables) < 3:
+        return None
+    # Subreddits are counted exactly from the daily rollup
+    result = await get_data_async(
+        "reddit", SELECT_REDDIT_SUBREDDIT_COUNT, None, ttl=TTL_SUMMARY
+    )
+    subreddits = result[0][0]
+
+    posts, toxicity, comments = tables["posts"], tables["toxicity"], tables["comments"]
+    return SummaryStats(
+        total_posts=posts[0],
+        unique_subreddit=subreddits,
+        total_toxicity=toxicity[0],
+        total_comments=comments[0],
+        approximate=True,
+        error_bound=error_bound(posts, toxicity, comments),
+    )
+
+
+@router.get("/stats/summary", response_model=SummaryStats)
+async def get_summary_stats(
+    approx: bool = Query(
+        False, description="Estimate the counts from planner statistics"
+    ),
+):
+    """
+    Get summary statistics: total posts, unique subreddits, total toxicity and
+    total comments. With approx=true the row counts are planner estimates
+    (see error_bound) and subreddits are counted from the daily rollup.
+    """
+    try:
+        if approx:
+            stats = await _approximate_summary_stats()
+            if stats is not None:
+                return stats
+
+        result = await get_data_async(
+            "reddit", SELECT_REDDIT_SUMMARY_STATS, None, ttl=TTL_SUMMARY
+        )
         # print(result)
         if result and len(result) > 0:
             row = result[0]
@@ -176,57 +521,57 @@ async def get_summary_stats():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Subreddits charted when the request doesn't name any
+DEFAULT_DAILY_COUNT_SUBREDDITS = ["ArtificialInteligence", "geopolitics", "technology"]
+MAX_DAILY_COUNT_SUBREDDITS = 100
+
+
 @router.get("/posts/daily-counts", response_model=DailyPostCountsResponse)
 async def get_daily_post_counts(
     start_date: Optional[str] = Query(
         "2025-11-01", description="Start date in YYYY-MM-DD format"
     ),
     end_date: Optional[str] = Query(None, description="End date in YYYY-MM-DD format"),
+    subreddits: Optional[List[str]] = Query(
+        None,
+        description="Subreddits to count (repeatable; default: "
+        + ", ".join(DEFAULT_DAILY_COUNT_SUBREDDITS)
+        + ")",
+    ),
 ):
     """
     Get daily post counts by subreddit with optional date filtering.
-    Returns counts of posts grouped by subreddit and date.
+    Returns counts of posts grouped by subreddit and date, read from the
+    reddit_posts_daily rollup.
 
     Args:
         start_date: Optional start date filter (YYYY-MM-DD)
         end_date: Optional end date filter (YYYY-MM-DD)
+        subreddits: Optional list of subreddits
 
     Returns:
         List of daily post counts with subreddit_name, date, and counts
     """
-    try:
-        # Build dynamic date filter
-        date_filter = ""
-        params = []
-
-        if start_date:
-            # Validate date format
-            try:
-                datetime.strptime(start_date, "%Y-%m-%d")
-                date_filter += " AND DATE(TO_TIMESTAMP(created_at)) >= %s"
-                params.append(start_date)
-            except ValueError:
-                raise HTTPException(
-                    status_code=400, detail="Invalid start_date format. Use YYYY-MM-DD"
-                )
-
-        if end_date:
-            # Validate date format
-            try:
-                datetime.strptime(end_date, "%Y-%m-%d")
-                date_filter += " AND DATE(TO_TIMESTAMP(created_at)) <= %s"
-                params.append(end_date)
-            except ValueError:
-                raise HTTPException(
-                    status_code=400, detail="Invalid end_date format. Use YYYY-MM-DD"
-                )
+    subreddits = list(dict.fromkeys(subreddits or DEFAULT_DAILY_COUNT_SUBREDDITS))
+    if len(subreddits) > MAX_DAILY_COUNT_SUBREDDITS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_DAILY_COUNT_SUBREDDITS} subreddits per request",
+        )
 
-        # Build final query
-        query = SELECT_DAILY_POST_COUNTS_BY_SUBREDDIT.format(date_filter=date_filter)
+    try:
+        start = parse_date(start_date) if start_date else None
+        end = parse_date(end_date) if end_date else None
+    except ValueError:
+        raise HTTPException(
+            status_code=400, detail="Invalid date format. Use YYYY-MM-DD"
+        )
 
-        plsql = PLSQL(REDDIT_DATABASE_URL)
-        result = plsql.get_data_from(query, tuple(params))
-        plsql.close_connection()
+    try:
+        params = (subreddits, start, end) * 2
+        result = await get_data_async(
+            "reddit", SELECT_DAILY_POST_COUNTS_BY_SUBREDDIT, params, ttl=TTL_ACTIVITY
+        )
 
         # Group data by date
         date_groups = {}
@@ -255,25 +600,10 @@ async def get_daily_post_counts(
 
 
 @router.get("/subreddit/top-subscribers", response_model=List[SubScribers])
-async def get_top_subscribers():
+async def get_top_subscribers(request: Request):
+    """Subreddits with the most subscribers, served from the in-memory catalog."""
     try:
-        plsql = PLSQL(REDDIT_DATABASE_URL)
-        result = plsql.get_data_from(SELECT_NUMBER_OF_SUBSCRIBERS, None)
-        plsql.close_connection()
-        if len(result) > 0:
-            final_result = []
-            for subreddit_name, subscribers in result:
-                if subreddit_name.lower().startswith("r/"):
-                    subreddit_name = subreddit_name[2:]
-                elif subreddit_name.lower().startswith("/r/"):
-                    subreddit_name = subreddit_name[3:]
-                subreddit_name = subreddit_name[0].upper() + subreddit_name[1:]
-                final_result.append(
-                    SubScribers(subreddit_name=subreddit_name, subscribers=subscribers)
-                )
-            return final_result
-        else:
-            return SubScribers(subreddit_name=0, subscribers=0)
+        return conditional_response(request, await catalog.get(TOP_SUBSCRIBERS_CATALOG))
     except HTTPException:
         raise
     except Exception as e:
@@ -0,0 +1,186 @@
+import logging
+import os
+import time
+import uuid
+from pathlib import Path
+
+from app.utils.cache import cache_key, get_or_load
+from app.utils.db_pool import DATABASES
+from app.utils.logger import Logger
+from app.utils.metrics import count_query_error, observe_acquire, observe_query
+from app.utils.singleflight import query_flight
+from dotenv import load_dotenv
+from psycopg_pool import AsyncConnectionPool
+
+load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+
+logger = Logger("logs").get_logger()
+
+STREAM_BATCH_SIZE = int(os.getenv("DB_STREAM_BATCH_SIZE", "2000"))
+
+
+class AsyncPLSQL:
+    """
+    Async counterpart of PLSQL backed by a psycopg 3 AsyncConnectionPool.
+
+    Queries keep the same ``%s`` placeholders as the psycopg2 layer, so the
+    constants in ``app.constants`` can be passed through unchanged. While a
+    query waits on PostgreSQL the event loop is free to serve other requests.
+
+    Usage:
+        >>> db = AsyncPLSQL("chan", CHAN_DATABASE_URL)
+        >>> await db.open()
+        >>> rows = await db.get_data_from(SELECT_ALL_BOARDS)
+    """
+
+    def __init__(
+        self,
+        name,
+        database_url,
+        min_size: int = 1,
+        max_size: int = 10,
+        timeout: float = 30.0,
+    ):
+        self.name = name
+        self.pool = AsyncConnectionPool(
+            database_url,
+            min_size=min_size,
+            max_size=max_size,
+            timeout=timeout,
+            open=False,
+            check=AsyncConnectionPool.check_connection,
+            # Read-only dashboard queries: skip the BEGIN/COMMIT round trips
+            kwargs={"autocommit": True},
+            name=f"{name}-async",
+        )
+
+    async def open(self):
+        await self.pool.open()
+
+    async def close(self):
+        await self.pool.close()
+
+    def connection(self):
+        return self.pool.connection()
+
+    async def get_data_from(self, query, params=None):
+        try:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Fetching data from PostgreSQL database...")
+                logger.debug("Select query: %s", query)
+                logger.debug("Select params: %s", params)
+
+            start = time.perf_counter()
+            async with self.pool.connection() as conn:
+                acquired = time.perf_counter()
+                observe_acquire(self.name, acquired - start)
+                async with conn.cursor() as cur:
+                    await cur.execute(query, params)
+                    records = await cur.fetchall()
+                observe_query(
+                    self.name, query, time.perf_counter() - acquired, len(records)
+                )
+            logger.debug("Fetched %d records", len(records))
+            return records
+        except Exception as e:
+            count_query_error(self.name, query)
+            logger.error("PostgreSQL database error: %s", e)
+            raise
+
+    async def iter_data_from(self, query, params=None, batch_size=None):
+        """
+        Yield rows one at a time through a server-side cursor.
+
+        Only ``batch_size`` rows are held client-side at any moment, so memory
+        stays flat no matter how many rows the query returns.
+        """
+        batch_size = batch_size or STREAM_BATCH_SIZE
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Streaming data from PostgreSQL database...")
+            logger.debug("Select query: %s", query)
+            logger.debug("Select params: %s, batch size: %d", params, batch_size)
+
+        start = time.perf_counter()
+        rows = 0
+        try:
+            async with self.pool.connection() as conn:
+                acquired = time.perf_counter()
+                observe_acquire(self.name, acquired - start)
+                # Named cursors only live inside a transaction
+                async with conn.transaction():
+                    async with conn.cursor(name=f"stream_{uuid.uuid4().hex}") as cur:
+                        cur.itersize = batch_size
+                        await cur.execute(query, params)
+                        async for row in cur:
+                            rows += 1
+                            yield row
+                observe_query(self.name, query, time.perf_counter() - acquired, rows)
+        except Exception:
+            count_query_error(self.name, query)
+            raise
+
+    def stats(self):
+        return self.pool.get_stats()
+
+
+_databases = {}
+
+
+async def init_async_pools():
+    """Open one async pool per configured database. Called from the app lifespan."""
+    min_size = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+    max_size = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+    timeout = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+    for name, env_var in DATABASES.items():
+        database_url = os.getenv(env_var)
+        if not database_url or name in _databases:
+            continue
+
+        logger.info(f"Opening '{name}' async connection pool ({min_size}-{max_size})")
+        db = AsyncPLSQL(
+            name, database_url, min_size=min_size, max_size=max_size, timeout=timeout
+        )
+        await db.open()
+        _databases[name] = db
+
+
+async def close_async_pools():
+    for name, db in list(_databases.items()):
+        logger.info(f"Closing '{name}' async connection pool")
+        await db.close()
+        del _databases[name]
+
+
+def get_async_db(name) -> AsyncPLSQL:
+    db = _databases.get(name)
+    if db is None:
+        raise RuntimeError(f"Async pool for database '{name}' is not initialised")
+    return db
+
+
+async def get_data_async(database, query, params=None, ttl=None):
+    """
+    Run a query on the named database's async pool.
+
+    Identical queries already in flight are coalesced into one round trip.
+    When ``ttl`` is given the result is also served from / stored in the
+    query cache under ``(database, query, params)`` for ``ttl`` seconds.
+    """
+    db = get_async_db(database)
+
+    async def load():
+        return tuple(await db.get_data_from(query, params))
+
+    if not ttl:
+        return list(await query_flight.do(cache_key(database, query, params), load))
+
+    return list(await get_or_load(database, query, params, ttl, load))
+
+
+def stream_data_async(database, query, params=None, batch_size=None):
+    return get_async_db(database).iter_data_from(query, params, batch_size)
+
+
+def async_pool_stats():
+    return {name: db.stats() for name, db in _databases.items()}
@@ -0,0 +1,183 @@
+import abc
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from app.utils.logger import Logger
+from app.utils.singleflight import query_flight
+from dotenv import load_dotenv
+
+load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+
+logger = Logger("logs").get_logger()
+
+# TTLs (seconds) by query family. The underlying tables only change when the
+# crawler ingests, so even the short ones absorb repeated dashboard loads.
+TTL_CATALOG = int(os.getenv("CACHE_TTL_CATALOG", "3600"))  # boards, subreddits
+TTL_SUMMARY = int(os.getenv("CACHE_TTL_SUMMARY", "300"))  # full-table aggregates
+TTL_ACTIVITY = int(os.getenv("CACHE_TTL_ACTIVITY", "120"))  # date-range queries
+
+
+class CacheBackend(abc.ABC):
+    """
+    Interface for query result caches.
+
+    Keys are ``(databases, query, params)`` tuples where ``databases`` is a
+    tuple of logical database names, so entries can be invalidated per
+    database after an ingest.
+    """
+
+    @abc.abstractmethod
+    def get(self, key):
+        """Return ``(True, value)`` on a hit and ``(False, None)`` on a miss."""
+
+    @abc.abstractmethod
+    def set(self, key, value, ttl):
+        """Store ``value`` for ``ttl`` seconds."""
+
+    @abc.abstractmethod
+    def invalidate(self, database=None):
+        """Drop every entry (or every entry touching ``database``); return the count."""
+
+    @abc.abstractmethod
+    def stats(self):
+        """Hit/miss counters and size, for the admin endpoint."""
+
+
+class MemoryCache(CacheBackend):
+    """In-process TTL cache with LRU eviction once ``max_entries`` is reached."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return False, None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, database=None):
+        with self._lock:
+            if database is None:
+                removed = len(self._entries)
+                self._entries.clear()
+            else:
+                keys = [key for key in self._entries if database in key[0]]
+                for key in keys:
+                    del self._entries[key]
+                removed = len(keys)
+        logger.info(f"Invalidated {removed} cache entries (database={database})")
+        return removed
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": "memory",
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class NullCache(CacheBackend):
+    """Backend used when caching is disabled: every lookup misses."""
+
+    def get(self, key):
+        return False, None
+
+    def set(self, key, value, ttl):
+        pass
+
+    def invalidate(self, database=None):
+        return 0
+
+    def stats(self):
+        return {"backend": "none"}
+
+
+def _create_cache():
+    backend = os.getenv("CACHE_BACKEND", "memory").lower()
+    if backend == "none":
+        return NullCache()
+    return MemoryCache(max_entries=int(os.getenv("CACHE_MAX_ENTRIES", "1024")))
+
+
+_cache = _create_cache()
+
+
+def get_cache() -> CacheBackend:
+    return _cache
+
+
+def set_cache(backend: CacheBackend):
+    """Swap in another backend (e.g. a shared one for multi-worker deployments)."""
+    global _cache
+    _cache = backend
+
+
+def freeze(value):
+    """Turn query params into something hashable (lists become tuples)."""
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, freeze(v)) for k, v in value.items()))
+    return value
+
+
+def cache_key(databases, query, params=None):
+    if isinstance(databases, str):
+        databases = (databases,)
+    return (tuple(databases), query, freeze(params))
+
+
+async def get_or_load(databases, query, params, ttl, loader):
+    """
+    Return the cached value for the key, or await ``loader()`` and cache it.
+
+    Concurrent misses on the same key are coalesced, so only one caller runs
+    ``loader`` and the rest share its result.
+    """
+    key = cache_key(databases, query, params)
+    hit, value = _cache.get(key)
+    if hit:
+        return value
+
+    async def load_and_store():
+        value = await loader()
+        _cache.set(key, value, ttl)
+        return value
+
+    return await query_flight.do(key, load_and_store)
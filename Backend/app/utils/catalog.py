@@ -0,0 +1,179 @@
+import asyncio
+import functools
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from pathlib import Path
+
+from app.utils.logger import Logger
+from app.utils.singleflight import SingleFlight
+from dotenv import load_dotenv
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+
+load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+
+logger = Logger("logs").get_logger()
+
+CATALOG_REFRESH_SECONDS = float(os.getenv("CATALOG_REFRESH_SECONDS", "900"))
+
+
+class CatalogEntry:
+    __slots__ = ("payload", "body", "etag", "last_modified", "loaded_at")
+
+    def __init__(self, payload, body, etag, last_modified, loaded_at):
+        self.payload = payload
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.loaded_at = loaded_at
+
+
+class Catalog:
+    """
+    In-memory store for near-static lookup lists (boards, subreddits,
+    subscriber counts) behind the dashboard's dropdowns.
+
+    Each entry keeps its payload, the rendered JSON body, an ETag hashed
+    from that body and the time the content last changed, so conditional
+    requests are answered with a 304 without touching the database. Entries
+    load on first use, reload on a schedule (``refresh``) and reload on the
+    next request after ``invalidate``. A reload that returns the same content
+    keeps the entry's ETag and Last-Modified.
+
+    Usage:
+        >>> catalog.register("chan_boards", "chan", load_boards)
+        >>> entry = await catalog.get("chan_boards")
+        >>> return conditional_response(request, entry)
+    """
+
+    def __init__(self):
+        self._loaders = {}
+        self._entries = {}
+        self._stale = set()
+        self._flight = SingleFlight()
+
+    def register(self, name, database, loader):
+        """``loader()`` is awaited to build the payload; ``database`` scopes invalidation."""
+        self._loaders[name] = (database, loader)
+
+    async def get(self, name):
+        entry = self._entries.get(name)
+        if entry is None or name in self._stale:
+            entry = await self._flight.do(name, functools.partial(self._load, name))
+        return entry
+
+    async def _load(self, name):
+        _, loader = self._loaders[name]
+        payload = jsonable_encoder(await loader())
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+        previous = self._entries.get(name)
+        if previous is not None and previous.etag == etag:
+            last_modified = previous.last_modified
+        else:
+            # HTTP dates have second precision
+            last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+
+        entry = CatalogEntry(payload, body, etag, last_modified, time.time())
+        self._entries[name] = entry
+        self._stale.discard(name)
+        return entry
+
+    def _names(self, database=None):
+        return [
+            name
+            for name, (db, _) in self._loaders.items()
+            if database is None or db == database
+        ]
+
+    async def refresh(self, database=None):
+        """Reload the loaded entries (of ``database``); keep an entry if its reload fails."""
+        refreshed = []
+        for name in self._names(database):
+            if name not in self._entries:
+                continue
+            try:
+                await self._flight.do(name, functools.partial(self._load, name))
+                refreshed.append(name)
+            except Exception as e:
+                logger.exception("Catalog refresh of %s failed: %s", name, e)
+        return refreshed
+
+    def invalidate(self, database=None):
+        """Mark entries (of ``database``) stale so the next request reloads them."""
+        names = [name for name in self._names(database) if name in self._entries]
+        self._stale.update(names)
+        return len(names)
+
+    def stats(self):
+        return {
+            name: {
+                "etag": entry.etag,
+                "last_modified": entry.last_modified.isoformat(),
+                "loaded_at": datetime.fromtimestamp(
+                    entry.loaded_at, timezone.utc
+                ).isoformat(),
+                "stale": name in self._stale,
+                "bytes": len(entry.body),
+            }
+            for name, entry in self._entries.items()
+        }
+
+
+catalog = Catalog()
+
+
+def _not_modified(request, entry):
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or entry.etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return entry.last_modified <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def conditional_response(request, entry):
+    """
+    Serve a catalog entry with ETag/Last-Modified validators, or a bodiless
+    304 when the client's copy is current. Without a request (in-process
+    callers such as the dashboard) the payload is returned as is.
+    """
+    if request is None:
+        return entry.payload
+
+    headers = {
+        "ETag": entry.etag,
+        "Last-Modified": format_datetime(entry.last_modified, usegmt=True),
+        # Cache, but revalidate on every use
+        "Cache-Control": "no-cache",
+    }
+    if _not_modified(request, entry):
+        return Response(status_code=304, headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
+
+
+async def _refresh_loop(interval):
+    while True:
+        await asyncio.sleep(interval)
+        await catalog.refresh()
+
+
+def start_catalog_refresh():
+    """Schedule the periodic catalog reload on the running event loop (lifespan)."""
+    if CATALOG_REFRESH_SECONDS <= 0:
+        logger.info("Scheduled catalog refresh disabled")
+        return None
+    return asyncio.create_task(
+        _refresh_loop(CATALOG_REFRESH_SECONDS), name="catalog-refresh"
+    )
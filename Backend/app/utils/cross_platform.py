@@ -0,0 +1,55 @@
+import asyncio
+import os
+
+LEG_TIMEOUT = float(os.getenv("COMPARISON_LEG_TIMEOUT", "20"))
+
+
+class LegTimeoutError(TimeoutError):
+    """Raised when one platform's leg of a comparison outlives its timeout."""
+
+    def __init__(self, leg, timeout):
+        super().__init__(f"'{leg}' query timed out after {timeout:g}s")
+        self.leg = leg
+        self.timeout = timeout
+
+
+async def _run_leg(name, awaitable, timeout):
+    try:
+        async with asyncio.timeout(timeout) as deadline:
+            return await awaitable
+    except TimeoutError:
+        if deadline.expired():
+            raise LegTimeoutError(name, timeout) from None
+        raise
+
+
+async def run_legs(legs, timeout=None):
+    """
+    Run the per-platform legs of a comparison concurrently.
+
+    ``legs`` maps a leg name ("chan", "reddit") to an awaitable. Each leg runs
+    on its own pool under its own timeout, so the comparison costs
+    max(chan, reddit) instead of the sum. If any leg fails or times out the
+    others are cancelled and the error is raised.
+
+    Usage:
+        >>> results = await run_legs({
+        ...     "chan": get_data_async("chan", SELECT_BOARD_COUNT),
+        ...     "reddit": get_data_async("reddit", SELECT_SUBREDDIT_COUNT),
+        ... })
+        >>> results["chan"], results["reddit"]
+    """
+    timeout = LEG_TIMEOUT if timeout is None else timeout
+    tasks = {
+        name: asyncio.ensure_future(_run_leg(name, awaitable, timeout))
+        for name, awaitable in legs.items()
+    }
+    try:
+        results = await asyncio.gather(*tasks.values())
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        # Let the cancelled legs unwind before the caller moves on
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        raise
+    return dict(zip(tasks, results))
@@ -0,0 +1,46 @@
+from datetime import date, datetime, timezone
+
+from fastapi import HTTPException
+
+SECONDS_PER_DAY = 86400
+
+
+def parse_date(value) -> date:
+    """Accept a ``date`` or a ``YYYY-MM-DD`` string; raise ValueError otherwise."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def epoch(day) -> int:
+    """Unix timestamp of midnight UTC on ``day``."""
+    return int(
+        datetime.combine(parse_date(day), datetime.min.time(), timezone.utc).timestamp()
+    )
+
+
+def day_bounds(start_date, end_date=None):
+    """
+    Half-open ``[start, end)`` epoch bounds (UTC) covering every day from
+    ``start_date`` through ``end_date`` inclusive (just ``start_date`` when no
+    end is given).
+
+    Queries compare the raw epoch column against these bounds, e.g.
+    ``post_time >= %s AND post_time < %s``, so an index on the column can
+    serve the range instead of evaluating ``to_timestamp()`` per row.
+    """
+    start = epoch(start_date)
+    end = epoch(end_date if end_date is not None else start_date) + SECONDS_PER_DAY
+    return start, end
+
+
+def day_bounds_or_400(start_date, end_date=None):
+    """``day_bounds`` for request parameters: bad dates become a 400."""
+    try:
+        return day_bounds(start_date, end_date)
+    except ValueError:
+        raise HTTPException(
+            status_code=400, detail="Invalid date format. Use YYYY-MM-DD"
+        )
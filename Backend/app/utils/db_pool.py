@@ -0,0 +1,241 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import psycopg2
+from app.utils.logger import Logger
+from app.utils.metrics import observe_acquire
+from dotenv import load_dotenv
+from psycopg2 import extensions
+from psycopg2.pool import ThreadedConnectionPool
+
+load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+
+logger = Logger("logs").get_logger()
+
+# Logical database name -> environment variable holding its DSN
+DATABASES = {
+    "chan": "CHAN_DATABASE_URL",
+    "reddit": "REDDIT_DATABASE_URL",
+}
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection could be checked out within the pool timeout."""
+
+
+class ConnectionPool:
+    """
+    Thread-safe psycopg2 connection pool for a single database.
+
+    Checkouts block (up to ``timeout`` seconds) while all ``max_size``
+    connections are in use instead of failing immediately, connections idle
+    for longer than ``check_idle`` seconds are pinged before being handed out,
+    and checkout/wait counters are kept for the health endpoint.
+
+    Usage:
+        >>> pool = ConnectionPool("chan", CHAN_DATABASE_URL)
+        >>> with pool.connection() as conn:
+        ...     with conn.cursor() as cur:
+        ...         cur.execute("SELECT 1")
+    """
+
+    def __init__(
+        self,
+        name,
+        database_url,
+        min_size: int = 1,
+        max_size: int = 10,
+        timeout: float = 30.0,
+        check_idle: float = 30.0,
+    ):
+        self.name = name
+        self.database_url = database_url
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.check_idle = check_idle
+
+        self._pool = ThreadedConnectionPool(min_size, max_size, dsn=database_url)
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._last_used = {}
+
+        self.checkouts = 0
+        self.in_use = 0
+        self.timeouts = 0
+        self.failed_health_checks = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def getconn(self):
+        start = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self.timeouts += 1
+            raise PoolTimeout(
+                f"Timed out after {self.timeout}s waiting for a '{self.name}' connection"
+            )
+        waited = time.perf_counter() - start
+
+        try:
+            conn = self._pool.getconn()
+            if not self._is_healthy(conn):
+                with self._lock:
+                    self.failed_health_checks += 1
+                logger.warning("Discarding broken '%s' pool connection", self.name)
+                self._pool.putconn(conn, close=True)
+                conn = self._pool.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+        observe_acquire(self.name, waited)
+        return conn
+
+    def putconn(self, conn):
+        close = bool(conn.closed)
+        if not close:
+            try:
+                # Never hand out a connection with an open (or failed) transaction
+                if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                close = True
+
+        with self._lock:
+            self.in_use -= 1
+            if close:
+                self._last_used.pop(id(conn), None)
+            else:
+                self._last_used[id(conn)] = time.monotonic()
+
+        try:
+            self._pool.putconn(conn, close=close)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        conn = self.getconn()
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    def _is_healthy(self, conn):
+        if conn.closed:
+            return False
+
+        last_used = self._last_used.get(id(conn))
+        if last_used is not None and time.monotonic() - last_used < self.check_idle:
+            return True
+
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def health_check(self):
+        """Round-trip a trivial query through the pool."""
+        try:
+            with self.connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT 1")
+            return True
+        except Exception as e:
+            logger.error(f"Health check failed for '{self.name}' pool: {e}")
+            return False
+
+    def stats(self):
+        with self._lock:
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "in_use": self.in_use,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "failed_health_checks": self.failed_health_checks,
+                "avg_wait_ms": round(
+                    self.total_wait / self.checkouts * 1000 if self.checkouts else 0.0,
+                    3,
+                ),
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+            }
+
+    def close(self):
+        self._pool.closeall()
+
+
+_pools = {}
+
+
+def init_pools():
+    """Create one pool per configured database. Called from the app lifespan."""
+    min_size = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+    max_size = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+    timeout = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    check_idle = float(os.getenv("DB_POOL_CHECK_IDLE", "30"))
+
+    for name, env_var in DATABASES.items():
+        database_url = os.getenv(env_var)
+        if not database_url:
+            logger.warning(f"{env_var} is not set, skipping '{name}' pool")
+            continue
+        if name in _pools:
+            continue
+
+        logger.info(f"Creating '{name}' connection pool ({min_size}-{max_size})")
+        _pools[name] = ConnectionPool(
+            name,
+            database_url,
+            min_size=min_size,
+            max_size=max_size,
+            timeout=timeout,
+            check_idle=check_idle,
+        )
+
+
+def close_pools():
+    for name, pool in list(_pools.items()):
+        logger.info(f"Closing '{name}' connection pool")
+        pool.close()
+        del _pools[name]
+
+
+def get_pool(name):
+    return _pools.get(name)
+
+
+def pool_for_url(database_url):
+    for pool in _pools.values():
+        if pool.database_url == database_url:
+            return pool
+    return None
+
+
+def database_name(database_url):
+    """Map a DSN back to its logical database name (chan/reddit)."""
+    for name, env_var in DATABASES.items():
+        if os.getenv(env_var) == database_url:
+            return name
+    return database_url
+
+
+def pool_stats(check: bool = False):
+    stats = {}
+    for name, pool in _pools.items():
+        stats[name] = pool.stats()
+        if check:
+            stats[name]["healthy"] = pool.health_check()
+    return stats
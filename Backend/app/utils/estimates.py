@@ -0,0 +1,43 @@
+from app.utils.async_plsql import get_data_async
+
+# Planner statistics for the given tables: the row estimate from the last
+# VACUUM/ANALYZE and how many rows were written since, i.e. how stale the
+# statistics are. reltuples is -1 until a table is analyzed.
+SELECT_TABLE_ESTIMATES = """
+SELECT
+    c.relname,
+    c.reltuples::bigint AS estimate,
+    COALESCE(s.n_mod_since_analyze, 0) AS modified
+FROM pg_class c
+JOIN pg_namespace n ON n.oid = c.relnamespace
+LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+WHERE c.relkind = 'r'
+    AND c.relname = ANY(%s)
+    AND n.nspname = ANY(current_schemas(false))
+"""
+
+
+async def table_estimates(database, tables):
+    """
+    Return ``{table: (estimate, modified)}`` from catalog statistics, where
+    ``modified`` is the number of rows written since the last ANALYZE. Tables
+    that were never analyzed are left out.
+    """
+    rows = await get_data_async(database, SELECT_TABLE_ESTIMATES, (list(tables),))
+    return {
+        name: (estimate, modified) for name, estimate, modified in rows if estimate >= 0
+    }
+
+
+def error_bound(*estimates):
+    """
+    Relative error bound of row counts taken from ``(estimate, modified)``
+    pairs: every row inserted or deleted since the statistics were gathered
+    is also counted in ``modified``, so a table's row count is within
+    ``modified`` of its estimate. Returns the largest ``modified / estimate``.
+    The bound holds for the row counts only (reltuples as of the last
+    VACUUM/ANALYZE); distinct-value estimates have none.
+    """
+    return round(
+        max(modified / max(estimate, 1) for estimate, modified in estimates), 4
+    )
@@ -0,0 +1,196 @@
+import os
+from datetime import date, timedelta
+from pathlib import Path
+from typing import List
+
+from app.constants.queries import SELECT_CHAN_EVENT_TIMELINE
+from app.constants.reddit_queries import SELECT_REDDIT_EVENT_TIMELINE
+from app.models.events import Event
+from app.utils.async_plsql import get_data_async
+from app.utils.cache import TTL_ACTIVITY
+from app.utils.dates import SECONDS_PER_DAY, epoch
+from app.utils.keywords import keyword_regex
+from dotenv import load_dotenv
+from pydantic import TypeAdapter
+
+load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+
+# Optional JSON list of extra events, same fields as app.models.events.Event
+EVENTS_FILE = os.getenv("EVENTS_FILE", "")
+
+CLOUDFLARE_KEYWORDS = [
+    "cloudflare",
+    "cloud flare",
+    "cf outage",
+    "cloudflare down",
+    "cloudflare outage",
+    "dns issue",
+    "cloudflare dns",
+    "cloudflare error",
+    "cloudflare not working",
+    "gateway timeout",
+    "5xx",
+    "error 500",
+    "error 520",
+    "error 522",
+    # Added keywords
+    "cloudflare service disruption",
+    "cloudflare status",
+    "cloudflare network issue",
+    "cloudflare connectivity issue",
+    "cloudflare routing issue",
+    "cloudflare incident",
+    "cloudflare downtime",
+    "cloudflare problems",
+    "cloudflare malfunction",
+    "cloudflare crash",
+    # DNS-related
+    "cloudflare dns outage",
+    "cloudflare dns down",
+    "cloudflare dns failure",
+    "cloudflare dns not responding",
+    "dns resolving issue",
+    "dns resolution failure",
+    "dns lookup failed",
+    "dns unavailable",
+    "dns propagation issue",
+    # Errors
+    "cloudflare 5xx",
+    "cloudflare 500 error",
+    "cloudflare 502 bad gateway",
+    "cloudflare 503 service unavailable",
+    "cloudflare 504 gateway timeout",
+    "cloudflare 524 timeout",
+    "cloudflare 523 origin unreachable",
+    "cloudflare 521 web server down",
+    "origin server timeout",
+    "server unreachable",
+    # Performance & security issues
+    "cloudflare rate limit",
+    "cloudflare firewall error",
+    "cloudflare ssl issue",
+    "ssl handshake failed",
+    "tls handshake failure",
+    "connection timed out",
+    "connection reset",
+    "network congestion cloudflare",
+    "ddos protection triggered",
+    "cdn outage",
+    "edge server issue",
+    # Cloudflare services outages
+    "cloudflare api down",
+    "cloudflare workers issue",
+    "cloudflare workers outage",
+    "cloudflare pages outage",
+    "cloudflare r2 outage",
+    "cloudflare zero trust issue",
+    "cloudflare tunnel down",
+    "cloudflare warp not working",
+    # User search phrases
+    "why is cloudflare down",
+    "cloudflare issues today",
+    "cloudflare outage today",
+    "sites down cloudflare",
+    "website not loading cloudflare",
+    "cannot connect via cloudflare",
+    "websites timing out cf",
+]
+
+BUILTIN_EVENTS = [
+    Event(
+        id="cloudflare-outage-2025-11-18",
+        name="Cloudflare outage",
+        event_date=date(2025, 11, 18),
+        keywords=CLOUDFLARE_KEYWORDS,
+    ),
+]
+
+DEFAULT_EVENT = BUILTIN_EVENTS[0].id
+
+# platform -> sources the event matcher walks, one job (and watermark) each
+EVENT_SOURCES = {
+    "chan": ("chan",),
+    "reddit": ("reddit_posts", "reddit_comments"),
+}
+
+
+def load_events(path=EVENTS_FILE):
+    """Built-in events plus those in ``path``; a file entry overrides a built-in id."""
+    events = {event.id: event for event in BUILTIN_EVENTS}
+    if path:
+        adapter = TypeAdapter(List[Event])
+        for event in adapter.validate_json(Path(path).read_bytes()):
+            events[event.id] = event
+    return events
+
+
+EVENTS = load_events()
+
+
+def event_job_name(event, source):
+    return f"event_{event.id}_{source}"
+
+
+def event_span(event):
+    """Half-open epoch bounds of the days the matcher precomputes for ``event``."""
+    window = timedelta(days=event.window_days)
+    return (
+        epoch(event.event_date - window),
+        epoch(event.event_date + window) + SECONDS_PER_DAY,
+    )
+
+
+async def event_timeline(event, database, community, start_ts, end_ts):
+    """
+    ``(day, count)`` rows of posts mentioning ``event`` on one platform in
+    ``[start_ts, end_ts)``, from the matcher's counts plus the rows ingested
+    since its last run. ``community`` narrows it to one board/subreddit.
+    """
+    regex = keyword_regex(event.keywords)
+    community_params = (community,) if community else ()
+
+    if database == "chan":
+        sql = SELECT_CHAN_EVENT_TIMELINE.format(
+            rollup_filter=" AND community = %s" if community else "",
+            tail_filter=" AND p.board_name = %s" if community else "",
+        )
+        params = (
+            event_job_name(event, "chan"),
+            start_ts,
+            end_ts,
+            event.id,
+            start_ts,
+            end_ts,
+            *community_params,
+            start_ts,
+            end_ts,
+            *community_params,
+            regex,
+            regex,
+        )
+    else:
+        sql = SELECT_REDDIT_EVENT_TIMELINE.format(
+            rollup_filter=" AND community = %s" if community else "",
+            post_filter=" AND p.subreddit = %s" if community else "",
+            comment_filter=" AND c.subreddit = %s" if community else "",
+        )
+        params = (
+            event_job_name(event, "reddit_posts"),
+            event_job_name(event, "reddit_comments"),
+            start_ts,
+            end_ts,
+            event.id,
+            start_ts,
+            end_ts,
+            *community_params,
+            start_ts,
+            end_ts,
+            *community_params,
+            regex,
+            start_ts,
+            end_ts,
+            *community_params,
+            regex,
+        )
+
+    return await get_data_async(database, sql, params, ttl=TTL_ACTIVITY)
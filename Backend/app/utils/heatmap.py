@@ -0,0 +1,86 @@
+from datetime import timedelta
+
+import numpy as np
+from app.models.activity import ActivityHeatmapResponse
+from app.utils.dates import SECONDS_PER_DAY, day_bounds_or_400, parse_date
+from fastapi import HTTPException
+
+# Axis order for post types; labels outside it are appended alphabetically
+POST_TYPES = ("Question", "News", "Meme", "Opinion")
+
+# Upper bound on the range a single heatmap request may span
+MAX_HEATMAP_DAYS = 366
+
+
+def heatmap_days(start_date, end_date):
+    """ISO dates from ``start_date`` through ``end_date`` inclusive."""
+    start, end = parse_date(start_date), parse_date(end_date)
+    return [
+        (start + timedelta(days=i)).isoformat() for i in range((end - start).days + 1)
+    ]
+
+
+def activity_heatmap(rows, start_epoch, num_days):
+    """
+    Shape ``(hour_start, post_type, count)`` rows into a dense
+    ``num_days x 24 x len(post_types)`` count matrix.
+
+    ``hour_start`` is an epoch aligned to the hour; rows outside the range
+    are ignored. Returns ``(post_types, matrix)``.
+    """
+    if rows:
+        hour_starts, labels, counts = zip(*rows)
+    else:
+        hour_starts, labels, counts = (), (), ()
+
+    extra = sorted(set(labels) - set(POST_TYPES))
+    post_types = list(POST_TYPES) + extra
+    matrix = np.zeros((num_days, 24, len(post_types)), dtype=np.int64)
+    if not rows:
+        return post_types, matrix
+
+    offsets = np.asarray(hour_starts, dtype=np.int64) - start_epoch
+    day_idx = offsets // SECONDS_PER_DAY
+    hour_idx = (offsets % SECONDS_PER_DAY) // 3600
+
+    # Map each distinct label once, then broadcast back over the rows
+    distinct, inverse = np.unique(np.asarray(labels, dtype=str), return_inverse=True)
+    positions = np.array([post_types.index(label) for label in distinct])
+    type_idx = positions[inverse]
+
+    in_range = (day_idx >= 0) & (day_idx < num_days)
+    np.add.at(
+        matrix,
+        (day_idx[in_range], hour_idx[in_range], type_idx[in_range]),
+        np.asarray(counts, dtype=np.int64)[in_range],
+    )
+    return post_types, matrix
+
+
+def heatmap_bounds(start_date, end_date):
+    """Validate a heatmap range; return its ``(start, end)`` epoch bounds."""
+    start, end = day_bounds_or_400(start_date, end_date)
+    num_days = (end - start) // SECONDS_PER_DAY
+    if not 0 < num_days <= MAX_HEATMAP_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"end_date must be on or after start_date and within {MAX_HEATMAP_DAYS} days",
+        )
+    return start, end
+
+
+def heatmap_response(platform, community, start_date, end_date, rows):
+    start, end = day_bounds_or_400(start_date, end_date)
+    days = heatmap_days(start_date, end_date)
+    post_types, matrix = activity_heatmap(rows, start, len(days))
+    return ActivityHeatmapResponse(
+        platform=platform,
+        community=community,
+        start_date=days[0],
+        end_date=days[-1],
+        days=days,
+        hours=list(range(24)),
+        post_types=post_types,
+        counts=matrix.tolist(),
+        total=int(matrix.sum()),
+    )
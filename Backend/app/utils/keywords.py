@@ -0,0 +1,95 @@
+import re
+
+# Characters with a special meaning in PostgreSQL regular expressions (ARE)
+_ARE_SPECIAL = re.compile(r"([\\.^$|?*+()\[\]{}])")
+
+
+def minimal_keywords(keywords):
+    """
+    Lower-cased ``keywords`` without duplicates and without any keyword that
+    contains another one ("cloudflare down" is implied by "cloudflare").
+    Substring matching gives the same rows with far fewer alternatives.
+    """
+    lowered = list(dict.fromkeys(keyword.lower() for keyword in keywords))
+    return [
+        keyword
+        for keyword in lowered
+        if not any(other != keyword and other in keyword for other in lowered)
+    ]
+
+
+def like_patterns(keywords):
+    """``%keyword%`` patterns for ``LOWER(column) LIKE ANY(%s)``."""
+    return [f"%{keyword}%" for keyword in minimal_keywords(keywords)]
+
+
+def keyword_regex(keywords):
+    """
+    One lower-case regex alternation matching any of ``keywords`` as a
+    substring, for ``LOWER(column) ~ %s``.
+
+    Same matches as ``like_patterns``, but a single regex lets pg_trgm pick
+    candidate rows from a trigram GIN index instead of scanning every row.
+    """
+    return "|".join(
+        _ARE_SPECIAL.sub(r"\\\1", keyword) for keyword in minimal_keywords(keywords)
+    )
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton answering "does this text contain any of the
+    keywords?" in a single pass over the text, however many keywords there
+    are. Matching is case-insensitive substring matching, the same as
+    ``like_patterns`` and ``keyword_regex``.
+
+    Usage:
+        >>> automaton = KeywordAutomaton(["cloudflare", "cdn outage"])
+        >>> automaton.search("Is Cloudflare down again?")
+        True
+    """
+
+    def __init__(self, keywords):
+        self.goto = [{}]
+        self.fail = [0]
+        self.terminal = [False]
+
+        for keyword in minimal_keywords(keywords):
+            state = 0
+            for char in keyword:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][char] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.terminal.append(False)
+                state = next_state
+            self.terminal[state] = True
+
+        # Breadth-first so a state's failure link is final before its children
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for char, child in self.goto[state].items():
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                self.terminal[child] = (
+                    self.terminal[child] or self.terminal[self.fail[child]]
+                )
+                queue.append(child)
+
+    def search(self, text):
+        """True if ``text`` contains any keyword."""
+        if not text:
+            return False
+        goto, fail, terminal = self.goto, self.fail, self.terminal
+        state = 0
+        for char in text.lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if terminal[state]:
+                return True
+        return False
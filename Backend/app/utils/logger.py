@@ -1,8 +1,61 @@
+import atexit
+import json
 import logging
 import os
-from logging.handlers import TimedRotatingFileHandler
+import queue
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
 from dotenv import load_dotenv
 
+# Read the environment once at import instead of on every Logger(...)
+load_dotenv()
+
+# LogRecord attributes that are not user-supplied ``extra`` fields
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+# One background listener per sink ("stream" or a log file path)
+_listeners = {}
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line, including ``extra`` fields."""
+
+    def format(self, record):
+        payload = {
+            "time": self.formatTime(record),
+            "name": record.name,
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class _LazyQueueHandler(QueueHandler):
+    """
+    QueueHandler that enqueues the record untouched.
+
+    The stock ``prepare`` formats the message on the calling thread, which is
+    exactly the work we want off the event loop; the listener thread formats
+    it instead. The queue is in-process, so nothing needs to be picklable.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def stop_log_listeners():
+    """Flush and stop the background logging threads (called on shutdown)."""
+    for listener in list(_listeners.values()):
+        listener.stop()
+    _listeners.clear()
+
+
+atexit.register(stop_log_listeners)
+
 
 class Logger:
     """
@@ -13,6 +66,9 @@ class Logger:
         - LOG_LEVEL: The logging level (e.g., DEBUG, INFO, WARNING, ERROR, CRITICAL). Default is INFO.
         - LOG_MODE: Determines the output mode ("FILE" or "STREAM"). Default is STREAM.
         - CHAN_LOG_FILE: File path for the log file if LOG_MODE is FILE. Default is '4chan_crawler.log'.
+        - LOG_ASYNC: When "true", records are handed to a queue and written by a
+          background thread so request handlers never block on log I/O. Default is false.
+        - LOG_FORMAT: "text" or "json" (one structured object per line). Default is text.
 
     Usage:
         >>> logger= Logger("my_logger")
@@ -21,7 +77,6 @@ class Logger:
     """
 
     def __init__(self, name, file_name: str = ""):
-        load_dotenv()
         self.file_name = file_name
         self.logger = self._set_config(name)
 
@@ -33,11 +88,15 @@ class Logger:
         numeric_level = getattr(logging, log_level_str, logging.INFO)
         logger.setLevel(numeric_level)
 
-        formatter = logging.Formatter(
-            "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-        )
+        if os.getenv("LOG_FORMAT", "text").lower() == "json":
+            formatter = JsonFormatter()
+        else:
+            formatter = logging.Formatter(
+                "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+            )
 
         log_mode = os.getenv("LOG_MODE", "STREAM").upper()
+        log_async = os.getenv("LOG_ASYNC", "false").lower() == "true"
 
         if not logger.handlers:  # Prevent duplicate handlers
             if log_mode == "FILE":
@@ -52,23 +111,43 @@ class Logger:
                 if log_dir:
                     os.makedirs(log_dir, exist_ok=True)
 
-                # Use TimedRotatingFileHandler to avoid Windows file locking issues
-                fh = TimedRotatingFileHandler(
-                    log_file,
-                    when="midnight",
-                    interval=1,
-                    backupCount=7,
-                    encoding="utf-8",
-                    delay=True,  # Delays opening the file until first write
-                )
-                fh.setFormatter(formatter)
-                logger.addHandler(fh)
+                sink = log_file
+
+                def build_handler():
+                    # Use TimedRotatingFileHandler to avoid Windows file locking issues
+                    return TimedRotatingFileHandler(
+                        log_file,
+                        when="midnight",
+                        interval=1,
+                        backupCount=7,
+                        encoding="utf-8",
+                        delay=True,  # Delays opening the file until first write
+                    )
             else:
-                handler = logging.StreamHandler()
+                sink = "stream"
+
+                def build_handler():
+                    return logging.StreamHandler()
+
+            if log_async:
+                logger.addHandler(self._queue_handler(sink, build_handler, formatter))
+            else:
+                handler = build_handler()
                 handler.setFormatter(formatter)
                 logger.addHandler(handler)
 
         return logger
 
+    @staticmethod
+    def _queue_handler(sink, build_handler, formatter):
+        listener = _listeners.get(sink)
+        if listener is None:
+            handler = build_handler()
+            handler.setFormatter(formatter)
+            listener = QueueListener(queue.SimpleQueue(), handler)
+            listener.start()
+            _listeners[sink] = listener
+        return _LazyQueueHandler(listener.queue)
+
     def get_logger(self):
         return self.logger
@@ -0,0 +1,400 @@
+import contextvars
+import threading
+import time
+from collections import defaultdict
+
+from app.constants import queries, reddit_queries
+from app.utils.cache import get_cache
+from app.utils.singleflight import query_flight
+from fastapi.responses import JSONResponse
+from starlette.datastructures import MutableHeaders
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+ROW_BUCKETS = (1, 10, 100, 1_000, 10_000, 100_000, 1_000_000)
+
+EXPOSITION_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] += amount
+
+    def collect(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} counter",
+        ]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}{labels} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets) + (float("inf"),)
+        # key -> [bucket counts..., sum, count]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def collect(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            for key, series in sorted(self._values.items()):
+                for bound, count in zip(self.buckets, series):
+                    labels = _format_labels(
+                        self.labelnames, key, ("le", _format_value(float(bound)))
+                    )
+                    lines.append(f"{self.name}_bucket{labels} {count}")
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {_format_value(series[-2])}")
+                lines.append(f"{self.name}_count{labels} {series[-1]}")
+        return lines
+
+
+class Registry:
+    """Holds metrics plus collectors that report gauges computed at scrape time."""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        """``collector()`` returns ``[(name, type, help, [(labels_dict, value)])]``."""
+        self._collectors.append(collector)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.collect())
+        for collector in self._collectors:
+            for name, kind, documentation, samples in collector():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    rendered = _format_labels(labels.keys(), labels.values())
+                    lines.append(f"{name}{rendered} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+QUERY_DURATION = registry.register(
+    Histogram(
+        "db_query_duration_seconds",
+        "Time spent executing and fetching a query.",
+        ("database", "query"),
+    )
+)
+QUERY_ROWS = registry.register(
+    Histogram(
+        "db_query_rows",
+        "Rows returned per query.",
+        ("database", "query"),
+        buckets=ROW_BUCKETS,
+    )
+)
+QUERY_ERRORS = registry.register(
+    Counter("db_query_errors_total", "Queries that raised.", ("database", "query"))
+)
+POOL_ACQUIRE = registry.register(
+    Histogram(
+        "db_pool_acquire_seconds",
+        "Time spent waiting for a pooled connection.",
+        ("database",),
+    )
+)
+REQUEST_DURATION = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "End-to-end request latency per route.",
+        ("method", "route", "status"),
+    )
+)
+REQUEST_ERRORS = registry.register(
+    Counter(
+        "http_request_errors_total",
+        "Requests answered with a 5xx or that raised.",
+        ("method", "route"),
+    )
+)
+SERIALIZATION_DURATION = registry.register(
+    Histogram(
+        "http_response_serialization_seconds",
+        "Time spent rendering response bodies to JSON.",
+        ("route",),
+    )
+)
+WIDGET_DURATION = registry.register(
+    Histogram(
+        "dashboard_widget_duration_seconds",
+        "Latency per dashboard widget, labelled with the route it runs.",
+        ("page", "widget", "route", "status"),
+    )
+)
+WIDGET_ERRORS = registry.register(
+    Counter(
+        "dashboard_widget_errors_total",
+        "Dashboard widgets answered with a 5xx or that timed out.",
+        ("page", "widget", "route"),
+    )
+)
+
+
+# Query names: SQL text -> constant name in app.constants, so metrics are
+# labelled SELECT_DAILY_ACTIVITY rather than by raw SQL. Templates filled in
+# with str.format are matched on the text before their first placeholder.
+_QUERY_NAMES = {
+    value.partition("{")[0]: name
+    for module in (queries, reddit_queries)
+    for name, value in vars(module).items()
+    if name.isupper() and isinstance(value, str)
+}
+_resolved_names = {}
+
+
+def query_name(sql):
+    name = _resolved_names.get(sql)
+    if name is not None:
+        return name
+
+    name = _QUERY_NAMES.get(sql)
+    if name is None:
+        # Routes extend some constants with extra filters; use the longest
+        # constant the SQL starts with, else lump it in with ad-hoc queries.
+        matches = [
+            (len(text), n) for text, n in _QUERY_NAMES.items() if sql.startswith(text)
+        ]
+        name = max(matches)[1] if matches else "adhoc"
+
+    if len(_resolved_names) < 1024:
+        _resolved_names[sql] = name
+    return name
+
+
+class RequestTimings:
+    """Per-request accumulators surfaced in the Server-Timing header."""
+
+    __slots__ = ("db", "acquire", "serialize", "queries")
+
+    def __init__(self):
+        self.db = 0.0
+        self.acquire = 0.0
+        self.serialize = 0.0
+        self.queries = 0
+
+    def header(self, total):
+        return ", ".join(
+            [
+                f'db;dur={self.db * 1000:.2f};desc="{self.queries} queries"',
+                f"acquire;dur={self.acquire * 1000:.2f}",
+                f"serialize;dur={self.serialize * 1000:.2f}",
+                f"total;dur={total * 1000:.2f}",
+            ]
+        )
+
+
+_current_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+def observe_acquire(database, seconds):
+    POOL_ACQUIRE.observe(seconds, database=database)
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.acquire += seconds
+
+
+def observe_query(database, sql, seconds, rows):
+    name = query_name(sql)
+    QUERY_DURATION.observe(seconds, database=database, query=name)
+    QUERY_ROWS.observe(rows, database=database, query=name)
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.db += seconds
+        timings.queries += 1
+
+
+def count_query_error(database, sql):
+    QUERY_ERRORS.inc(database=database, query=query_name(sql))
+
+
+def observe_widget(page, widget, route, status_code, seconds):
+    """Record a dashboard widget run against the route it wraps."""
+    WIDGET_DURATION.observe(
+        seconds, page=page, widget=widget, route=route, status=str(status_code)
+    )
+    if status_code >= 500:
+        WIDGET_ERRORS.inc(page=page, widget=widget, route=route)
+
+
+class TimedJSONResponse(JSONResponse):
+    """JSONResponse that records how long rendering the body took."""
+
+    def render(self, content):
+        start = time.perf_counter()
+        body = super().render(content)
+        timings = _current_timings.get()
+        if timings is not None:
+            timings.serialize += time.perf_counter() - start
+        return body
+
+
+def _route_template(scope):
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording per-route latency/error metrics and adding a
+    ``Server-Timing`` header with the request's DB, pool and render time.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current_timings.set(timings)
+        start = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing", timings.header(time.perf_counter() - start)
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_timings.reset(token)
+            route = _route_template(scope)
+            method = scope["method"]
+            REQUEST_DURATION.observe(
+                time.perf_counter() - start,
+                method=method,
+                route=route,
+                status=str(status["code"]),
+            )
+            SERIALIZATION_DURATION.observe(timings.serialize, route=route)
+            if status["code"] >= 500:
+                REQUEST_ERRORS.inc(method=method, route=route)
+
+
+def _runtime_collector():
+    # Imported here: the data layer itself reports into this module
+    from app.utils.async_plsql import async_pool_stats
+
+    cache = get_cache().stats()
+    flight = query_flight.stats()
+    pools = async_pool_stats()
+    return [
+        (
+            "query_cache_hits_total",
+            "counter",
+            "Query cache hits.",
+            [({}, cache.get("hits", 0))],
+        ),
+        (
+            "query_cache_misses_total",
+            "counter",
+            "Query cache misses.",
+            [({}, cache.get("misses", 0))],
+        ),
+        (
+            "query_cache_entries",
+            "gauge",
+            "Entries currently cached.",
+            [({}, cache.get("entries", 0))],
+        ),
+        (
+            "db_queries_coalesced_total",
+            "counter",
+            "Queries served by joining an identical in-flight query.",
+            [({}, flight["coalesced"])],
+        ),
+        (
+            "db_pool_size",
+            "gauge",
+            "Open connections per async pool.",
+            [({"database": n}, p.get("pool_size", 0)) for n, p in pools.items()],
+        ),
+        (
+            "db_pool_available",
+            "gauge",
+            "Idle connections per async pool.",
+            [({"database": n}, p.get("pool_available", 0)) for n, p in pools.items()],
+        ),
+        (
+            "db_pool_requests_waiting",
+            "gauge",
+            "Requests queued for a connection per async pool.",
+            [({"database": n}, p.get("requests_waiting", 0)) for n, p in pools.items()],
+        ),
+    ]
+
+
+registry.add_collector(_runtime_collector)
+
+
+def render_metrics():
+    return registry.render()
@@ -1,46 +1,96 @@
+import logging
+import os
+import time
+import uuid
 from pathlib import Path
 
 import psycopg2
+from app.utils.cache import cache_key, get_cache
+from app.utils.db_pool import database_name, pool_for_url
 from app.utils.logger import Logger
+from app.utils.metrics import count_query_error, observe_query
 from dotenv import load_dotenv
 
 load_dotenv(Path(__file__).resolve().parent.parent / ".env")
 
 logger = Logger("logs").get_logger()
 
+STREAM_BATCH_SIZE = int(os.getenv("DB_STREAM_BATCH_SIZE", "2000"))
+
 
 class PLSQL:
     def __init__(self, database_url):
-        logger.info("Connecting to PostgreSQL database...")
-        logger.debug(f"DATABASE_URL: {database_url}")
-        self.conn = psycopg2.connect(dsn=database_url)
+        # Borrow from the lifespan-managed pool when one exists for this
+        # database, otherwise fall back to a dedicated connection.
+        self.pool = pool_for_url(database_url)
+        self.database = self.pool.name if self.pool is not None else "direct"
+        if self.pool is not None:
+            self.conn = self.pool.getconn()
+        else:
+            logger.info("Connecting to PostgreSQL database...")
+            logger.debug("DATABASE_URL: %s", database_url)
+            self.conn = psycopg2.connect(dsn=database_url)
         self.cur = self.conn.cursor()
 
     def get_data_from(self, query, params=None):
         try:
-            logger.info("Fetching data from PostgreSQL database...")
-            logger.debug(f"Select query: {query}")
-            if params:
-                logger.debug(f"Select params: {params}")
-            else:
-                logger.debug("Select params: None")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Fetching data from PostgreSQL database...")
+                logger.debug("Select query: %s", query)
+                logger.debug("Select params: %s", params or None)
 
+            start = time.perf_counter()
             self.cur.execute(query, params)
             records = self.cur.fetchall()
-            logger.debug(f"Fetched {len(records)} records")
+            observe_query(
+                self.database, query, time.perf_counter() - start, len(records)
+            )
+            logger.debug("Fetched %d records", len(records))
             return records
         except Exception as e:
-            logger.error(f"PostgreSQL database error: {e}")
+            count_query_error(self.database, query)
+            logger.error("PostgreSQL database error: %s", e)
             raise
 
+    def iter_data_from(self, query, params=None, batch_size=None):
+        """Yield rows through a server-side cursor, ``batch_size`` rows per round trip."""
+        batch_size = batch_size or STREAM_BATCH_SIZE
+        logger.debug("Streaming data from PostgreSQL database...")
+        logger.debug("Select query: %s", query)
+
+        with self.conn.cursor(name=f"stream_{uuid.uuid4().hex}") as cur:
+            cur.itersize = batch_size
+            cur.execute(query, params)
+            yield from cur
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close_connection()
+
     def close_connection(self):
         self.cur.close()
-        self.conn.close()
-        logger.info("PostgreSQL connection closed.")
+        if self.pool is not None:
+            self.pool.putconn(self.conn)
+        else:
+            self.conn.close()
+            logger.info("PostgreSQL connection closed.")
+
 
+def get_data_db(database_url, query, param=None, ttl=None):
+    if ttl:
+        key = cache_key(database_name(database_url), query, param)
+        hit, value = get_cache().get(key)
+        if hit:
+            return list(value)
 
-def get_data_db(database_url, query, param=None):
     plsql = PLSQL(database_url)
-    result = plsql.get_data_from(query, param)
-    plsql.close_connection()
+    try:
+        result = plsql.get_data_from(query, param)
+    finally:
+        plsql.close_connection()
+
+    if ttl:
+        get_cache().set(key, tuple(result), ttl)
     return result
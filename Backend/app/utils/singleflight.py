@@ -0,0 +1,46 @@
+import asyncio
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key into a single execution.
+
+    While a call for ``key`` is in flight, later callers await the same task
+    instead of starting their own, so a burst of identical dashboard requests
+    costs one query. The shared task is shielded: a leader whose request gets
+    cancelled does not cancel the query for the callers still waiting on it.
+
+    Usage:
+        >>> flight = SingleFlight()
+        >>> rows = await flight.do(key, lambda: db.get_data_from(query, params))
+    """
+
+    def __init__(self):
+        self._in_flight = {}
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key, fn):
+        self.calls += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.coalesced += 1
+
+        return await asyncio.shield(task)
+
+    def stats(self):
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight),
+        }
+
+
+query_flight = SingleFlight()
@@ -0,0 +1,31 @@
+from fastapi.responses import StreamingResponse
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Query parameter shared by the list endpoints: ?format=json|ndjson
+FORMAT_PATTERN = "^(json|ndjson)$"
+
+
+def ndjson_response(rows, to_item, chunk_size: int = 500):
+    """
+    Stream ``rows`` (an async iterator of DB rows) as newline-delimited JSON.
+
+    ``to_item`` maps a row to a Pydantic model, or returns None to skip it.
+    Lines are flushed ``chunk_size`` at a time to keep the number of socket
+    writes down without buffering the whole result.
+    """
+
+    async def body():
+        lines = []
+        async for row in rows:
+            item = to_item(row)
+            if item is None:
+                continue
+            lines.append(item.model_dump_json())
+            if len(lines) >= chunk_size:
+                yield "\n".join(lines) + "\n"
+                lines = []
+        if lines:
+            yield "\n".join(lines) + "\n"
+
+    return StreamingResponse(body(), media_type=NDJSON_MEDIA_TYPE)
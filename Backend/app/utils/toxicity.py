@@ -0,0 +1,80 @@
+from app.constants.queries import (
+    SELECT_BOARD_TOXICITY_STATS,
+    TOXICITY_ATTRIBUTES,
+    TOXICITY_QUANTILES,
+)
+from app.constants.reddit_queries import SELECT_SUBREDDIT_TOXICITY_STATS
+from app.models.comparison_response import (
+    AttributeDistribution,
+    ForumToxicityDistribution,
+)
+from app.utils.async_plsql import get_data_async
+from app.utils.cache import TTL_SUMMARY
+
+# database -> (distribution query, forum column, platform label)
+_SOURCES = {
+    "chan": (SELECT_BOARD_TOXICITY_STATS, "board_name", "4chan"),
+    "reddit": (SELECT_SUBREDDIT_TOXICITY_STATS, "subreddit", "reddit"),
+}
+
+QUANTILE_LABELS = tuple(f"p{round(q * 100):g}" for q in TOXICITY_QUANTILES)
+
+
+def toxicity_filters(forum_column, forums=None, start_ts=None, end_ts=None):
+    """
+    Optional forum and ``[start_ts, end_ts)`` scored_at conditions for the
+    distribution queries. Returns the SQL fragment and its params.
+    """
+    filters, params = "", []
+
+    if forums:
+        filters += f" AND {forum_column} = ANY(%s)"
+        params.append(list(forums))
+
+    if start_ts is not None:
+        filters += " AND scored_at >= TO_TIMESTAMP(%s)"
+        params.append(start_ts)
+
+    if end_ts is not None:
+        filters += " AND scored_at < TO_TIMESTAMP(%s)"
+        params.append(end_ts)
+
+    return filters, params
+
+
+def _distribution(row, platform):
+    # row: forum, scored posts, then (mean, count, quantiles) per attribute
+    attributes = {}
+    for i, attribute in enumerate(TOXICITY_ATTRIBUTES):
+        mean, count, quantiles = row[2 + 3 * i : 5 + 3 * i]
+        quantiles = quantiles or [None] * len(QUANTILE_LABELS)
+        attributes[attribute] = AttributeDistribution(
+            mean=None if mean is None else round(mean, 4),
+            count=count,
+            quantiles={
+                label: None if value is None else round(value, 4)
+                for label, value in zip(QUANTILE_LABELS, quantiles)
+            },
+        )
+
+    return ForumToxicityDistribution(
+        forum_name=row[0],
+        platform=platform,
+        scored_posts=row[1],
+        attributes=attributes,
+    )
+
+
+async def toxicity_distribution(database, forums=None, start_ts=None, end_ts=None):
+    """
+    Mean, scored count and quantiles of every toxicity attribute per forum.
+
+    Aggregation happens in PostgreSQL, so the response holds one row per
+    forum regardless of how many posts have been scored.
+    """
+    query, forum_column, platform = _SOURCES[database]
+    filters, params = toxicity_filters(forum_column, forums, start_ts, end_ts)
+    rows = await get_data_async(
+        database, query.format(filters=filters), tuple(params), ttl=TTL_SUMMARY
+    )
+    return [_distribution(row, platform) for row in rows]
@@ -0,0 +1,161 @@
+"""
+Compare the two event-timeline keyword matching strategies on a synthetic
+corpus: ``LOWER(...) LIKE ANY(patterns)`` (sequential scan) against
+``LOWER(...) ~ regex`` served by pg_trgm GIN indexes.
+
+Everything lives in temporary tables, so any PostgreSQL database where the
+pg_trgm extension is installed (or can be created) will do:
+
+    python -m benchmarks.event_matching                      # CHAN_DATABASE_URL
+    python -m benchmarks.event_matching --rows 1000000 --runs 5
+    BENCHMARK_DATABASE_URL=postgresql://... python -m benchmarks.event_matching
+"""
+
+import argparse
+import os
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import psycopg
+from app.utils.events import CLOUDFLARE_KEYWORDS
+from app.utils.keywords import keyword_regex, like_patterns
+from dotenv import load_dotenv
+
+load_dotenv(Path(__file__).resolve().parent.parent / "app" / ".env")
+
+CREATE_TABLE = """
+CREATE TEMP TABLE bench_posts (
+    subject TEXT,
+    comment TEXT,
+    created_at TIMESTAMP NOT NULL
+)
+"""
+
+CREATE_INDEXES = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX bench_posts_created_idx ON bench_posts (created_at)",
+    """
+    CREATE INDEX bench_posts_subject_trgm_idx ON bench_posts
+    USING gin (LOWER(COALESCE(subject, '')) gin_trgm_ops)
+    """,
+    """
+    CREATE INDEX bench_posts_comment_trgm_idx ON bench_posts
+    USING gin (LOWER(COALESCE(comment, '')) gin_trgm_ops)
+    """,
+    "ANALYZE bench_posts",
+]
+
+# Same shape as the event_counts CTE of SELECT_CHAN_EVENT_RELATED_ALL
+COUNT_TEMPLATE = """
+SELECT DATE(created_at) AS day, COUNT(*)
+FROM bench_posts
+WHERE created_at >= TO_TIMESTAMP(%s)
+  AND created_at < TO_TIMESTAMP(%s)
+  AND (
+        LOWER(COALESCE(subject, '')) {match}
+        OR LOWER(COALESCE(comment, '')) {match}
+      )
+GROUP BY DATE(created_at)
+ORDER BY day
+"""
+
+VARIANTS = {
+    "like_any": COUNT_TEMPLATE.format(match="LIKE ANY(%s)"),
+    "trigram_regex": COUNT_TEMPLATE.format(match="~ %s"),
+}
+
+WORDS = (
+    "the thread anon image board news post reply bump sage kek based "
+    "server network outage status update website down again today error "
+    "cloud service provider users report issue fixed slow loading page "
+    "game market stock election weather music movie food travel science"
+).split()
+
+
+def corpus(rows, days, hit_rate, seed):
+    """Yield (subject, comment, created_at) rows; ~hit_rate of them mention a keyword."""
+    rng = random.Random(seed)
+    end = datetime.now(timezone.utc).replace(tzinfo=None)
+    start = end - timedelta(days=days)
+    span = (end - start).total_seconds()
+
+    for _ in range(rows):
+        words = rng.choices(WORDS, k=rng.randint(8, 60))
+        if rng.random() < hit_rate:
+            words.insert(rng.randrange(len(words)), rng.choice(CLOUDFLARE_KEYWORDS))
+        subject = " ".join(rng.choices(WORDS, k=4)) if rng.random() < 0.2 else None
+        created_at = start + timedelta(seconds=rng.random() * span)
+        yield subject, " ".join(words).capitalize(), created_at
+
+
+def load(conn, rows, days, hit_rate, seed):
+    conn.execute(CREATE_TABLE)
+    with conn.cursor().copy(
+        "COPY bench_posts (subject, comment, created_at) FROM STDIN"
+    ) as copy:
+        for row in corpus(rows, days, hit_rate, seed):
+            copy.write_row(row)
+    for statement in CREATE_INDEXES:
+        conn.execute(statement)
+
+
+def time_variant(conn, name, params, runs):
+    timings, result = [], None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = conn.execute(VARIANTS[name], params).fetchall()
+        timings.append(time.perf_counter() - start)
+    plan = conn.execute("EXPLAIN " + VARIANTS[name], params).fetchall()
+    uses_trigram = any("trgm" in line[0] for line in plan)
+    return statistics.median(timings), result, uses_trigram
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--days", type=int, default=180, help="corpus time span")
+    parser.add_argument("--hit-rate", type=float, default=0.002)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--windows", type=int, nargs="+", default=[7, 30, 90, 180], help="days"
+    )
+    args = parser.parse_args()
+
+    database_url = os.getenv("BENCHMARK_DATABASE_URL") or os.getenv("CHAN_DATABASE_URL")
+    if not database_url:
+        parser.error("set BENCHMARK_DATABASE_URL or CHAN_DATABASE_URL")
+
+    regex = keyword_regex(CLOUDFLARE_KEYWORDS)
+    patterns = like_patterns(CLOUDFLARE_KEYWORDS)
+
+    with psycopg.connect(database_url, autocommit=True) as conn:
+        start = time.perf_counter()
+        load(conn, args.rows, args.days, args.hit_rate, args.seed)
+        print(f"loaded {args.rows} rows in {time.perf_counter() - start:.1f}s")
+        print(f"{'window':>8} {'like_any':>12} {'trigram_regex':>14} {'speedup':>8}")
+
+        end_ts = int(time.time()) + 1
+        for window in args.windows:
+            start_ts = end_ts - window * 86400
+            like_time, like_rows, _ = time_variant(
+                conn, "like_any", (start_ts, end_ts, patterns, patterns), args.runs
+            )
+            trgm_time, trgm_rows, indexed = time_variant(
+                conn, "trigram_regex", (start_ts, end_ts, regex, regex), args.runs
+            )
+            if like_rows != trgm_rows:
+                raise SystemExit(f"variants disagree for a {window} day window")
+
+            print(
+                f"{window:>7}d {like_time * 1000:>10.1f}ms {trgm_time * 1000:>12.1f}ms"
+                f" {like_time / trgm_time:>7.1f}x"
+                + ("" if indexed else "  (trigram index not used)")
+            )
+
+
+if __name__ == "__main__":
+    main()
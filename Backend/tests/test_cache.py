@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+from app.utils import cache
+from app.utils.cache import MemoryCache, cache_key, freeze, get_or_load
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Frozen ``time.monotonic`` the tests move forward by hand."""
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def memory_cache(monkeypatch):
+    backend = MemoryCache(max_entries=8)
+    monkeypatch.setattr(cache, "_cache", backend)
+    return backend
+
+
+def test_entry_is_served_until_its_ttl(clock):
+    backend = MemoryCache()
+    backend.set("key", "value", ttl=10)
+
+    clock[0] += 9.9
+    assert backend.get("key") == (True, "value")
+
+    clock[0] += 0.1
+    assert backend.get("key") == (False, None)
+    assert backend.stats()["expirations"] == 1
+    assert backend.stats()["entries"] == 0
+
+
+def test_set_replaces_value_and_ttl(clock):
+    backend = MemoryCache()
+    backend.set("key", "old", ttl=5)
+    clock[0] += 4
+    backend.set("key", "new", ttl=5)
+
+    clock[0] += 4
+    assert backend.get("key") == (True, "new")
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    backend = MemoryCache(max_entries=2)
+    backend.set("a", 1, ttl=60)
+    backend.set("b", 2, ttl=60)
+    # A lookup makes "a" the most recently used, so "b" goes first
+    assert backend.get("a") == (True, 1)
+    backend.set("c", 3, ttl=60)
+
+    assert backend.get("b") == (False, None)
+    assert backend.get("a") == (True, 1)
+    assert backend.get("c") == (True, 3)
+    assert backend.stats()["evictions"] == 1
+
+
+def test_hit_ratio_counts_lookups(clock):
+    backend = MemoryCache()
+    backend.set("key", "value", ttl=60)
+    backend.get("key")
+    backend.get("key")
+    backend.get("missing")
+
+    stats = backend.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+    assert stats["hit_ratio"] == round(2 / 3, 4)
+
+
+def test_invalidate_one_database_keeps_the_others(clock):
+    backend = MemoryCache()
+    backend.set(cache_key("chan", "q1"), 1, ttl=60)
+    backend.set(cache_key("reddit", "q2"), 2, ttl=60)
+    backend.set(cache_key(("chan", "reddit"), "q3"), 3, ttl=60)
+
+    assert backend.invalidate("chan") == 2
+    assert backend.get(cache_key("reddit", "q2")) == (True, 2)
+    assert backend.get(cache_key("chan", "q1")) == (False, None)
+    assert backend.get(cache_key(("chan", "reddit"), "q3")) == (False, None)
+
+
+def test_invalidate_everything(clock):
+    backend = MemoryCache()
+    backend.set(cache_key("chan", "q1"), 1, ttl=60)
+    backend.set(cache_key("reddit", "q2"), 2, ttl=60)
+
+    assert backend.invalidate() == 2
+    assert backend.stats()["entries"] == 0
+
+
+def test_cache_key_is_hashable_for_list_params():
+    key = cache_key("chan", "q", (["pol", "g"], {"b": [1], "a": 2}))
+    assert key == (("chan",), "q", (("pol", "g"), (("a", 2), ("b", (1,)))))
+    assert hash(key) == hash(
+        cache_key(["chan"], "q", (("pol", "g"), {"a": 2, "b": (1,)}))
+    )
+    assert freeze([1, [2, 3]]) == (1, (2, 3))
+
+
+def test_get_or_load_calls_the_loader_once_per_ttl(clock, memory_cache):
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        return len(calls)
+
+    async def load():
+        return await get_or_load("chan", "q", ("pol",), 60, loader)
+
+    assert asyncio.run(load()) == 1
+    assert asyncio.run(load()) == 1
+    clock[0] += 60
+    assert asyncio.run(load()) == 2
+    assert len(calls) == 2
@@ -0,0 +1,110 @@
+from app.jobs.comment_trees import comment_key, parent_key, place_comments
+
+
+def nodes_by_key(nodes):
+    return {node[0]: node for node in nodes}
+
+
+def test_keys_drop_the_fullname_prefix():
+    assert comment_key("t1_abc") == "abc"
+    assert parent_key("t1_abc") == "abc"
+    assert parent_key("t3_post") is None
+    assert parent_key(None) is None
+
+
+def test_batch_builds_a_tree_in_any_order():
+    # The reply comes before its parent in the batch
+    comments = {
+        "c": ("p1", "b", 30),
+        "a": ("p1", None, 10),
+        "b": ("p1", "a", 20),
+    }
+    nodes, child_updates, trees, adoptions = place_comments(comments, {})
+
+    nodes = nodes_by_key(nodes)
+    assert nodes["a"] == ("a", "p1", None, 1, 1, False, 10)
+    assert nodes["b"] == ("b", "p1", "a", 2, 1, False, 20)
+    assert nodes["c"] == ("c", "p1", "b", 3, 0, False, 30)
+    assert child_updates == []
+    assert adoptions == []
+    # comments, top level, orphans, max depth, depth sum, with replies, first, last
+    assert trees == [("p1", 3, 1, 0, 3, 6, 2, 10, 30)]
+
+
+def test_reply_to_a_stored_comment():
+    known = {"a": (1, 0), "b": (2, 4)}
+    comments = {"x": ("p1", "a", 50), "y": ("p1", "b", 60), "z": ("p1", "b", 70)}
+    nodes, child_updates, trees, _ = place_comments(comments, known)
+
+    assert {key: node[3] for key, node in nodes_by_key(nodes).items()} == {
+        "x": 2,
+        "y": 3,
+        "z": 3,
+    }
+    assert sorted(child_updates) == [(1, "a"), (2, "b")]
+    # Only "a" becomes a parent; "b" already had replies
+    assert trees == [("p1", 3, 0, 0, 3, 8, 1, 50, 70)]
+
+
+def test_already_placed_comments_are_skipped():
+    nodes, child_updates, trees, _ = place_comments(
+        {"a": ("p1", None, 10)}, {"a": (1, 0)}
+    )
+    assert (nodes, child_updates, trees) == ([], [], [])
+
+
+def test_comment_without_its_parent_is_an_orphan_at_depth_two():
+    comments = {"x": ("p1", "missing", 40), "y": ("p1", "x", 45)}
+    nodes, _, trees, _ = place_comments(comments, {})
+
+    nodes = nodes_by_key(nodes)
+    assert nodes["x"] == ("x", "p1", "missing", 2, 1, True, 40)
+    assert nodes["y"] == ("y", "p1", "x", 3, 0, False, 45)
+    assert trees == [("p1", 2, 0, 1, 3, 5, 1, 40, 45)]
+
+
+def test_reply_cycle_does_not_loop():
+    comments = {"a": ("p1", "b", 1), "b": ("p1", "a", 2)}
+    nodes, _, trees, _ = place_comments(comments, {})
+    assert len(nodes) == 2
+    assert trees[0][3] == 1  # one of the two is flagged as the orphan
+
+
+def test_parent_arriving_adopts_its_stored_orphans():
+    # "x" was stored as an orphan at depth 2 before its parent "p" was crawled
+    comments = {"p": ("p1", None, 5)}
+    orphans_of = {"p": [("x", "p1", 2)]}
+    nodes, child_updates, trees, adoptions = place_comments(comments, {}, orphans_of)
+
+    assert nodes == [("p", "p1", None, 1, 1, False, 5)]
+    assert child_updates == []
+    # Depth 2 was already right under a top-level parent
+    assert adoptions == [("x", 0)]
+    # One fewer orphan, and "p" now has a reply
+    assert trees == [("p1", 1, 1, -1, 1, 1, 1, 5, 5)]
+
+
+def test_adopted_orphans_move_by_the_parent_depth():
+    # "p" replies to a stored depth-3 comment, so it lands at depth 4
+    known = {"q": (3, 1)}
+    comments = {"p": ("p1", "q", 5), "r": ("p1", "p", 6)}
+    orphans_of = {"p": [("x", "p1", 2), ("y", "p1", 2)]}
+    nodes, child_updates, trees, adoptions = place_comments(comments, known, orphans_of)
+
+    assert nodes_by_key(nodes)["p"] == ("p", "p1", "q", 4, 3, False, 5)
+    assert child_updates == [(1, "q")]
+    assert adoptions == [("x", 3), ("y", 3)]
+    # "p" counts once as a parent, whether the new reply or an orphan came first
+    assert trees == [("p1", 2, 0, -2, 5, 9, 1, 5, 6)]
+
+
+def test_orphans_can_be_adopted_across_posts_in_one_batch():
+    comments = {"p": ("p1", None, 5), "s": ("p2", None, 7)}
+    orphans_of = {"p": [("x", "p1", 2)], "s": [("y", "p2", 2)]}
+    _, _, trees, adoptions = place_comments(comments, {}, orphans_of)
+
+    assert adoptions == [("x", 0), ("y", 0)]
+    assert sorted(trees) == [
+        ("p1", 1, 1, -1, 1, 1, 1, 5, 5),
+        ("p2", 1, 1, -1, 1, 1, 1, 7, 7),
+    ]
@@ -0,0 +1,45 @@
+from datetime import date, datetime, timezone
+
+import pytest
+from app.utils.dates import SECONDS_PER_DAY, day_bounds, day_bounds_or_400, epoch
+from fastapi import HTTPException
+
+
+def test_single_day_covers_midnight_to_midnight_utc():
+    start, end = day_bounds("2024-03-01")
+    assert start == int(datetime(2024, 3, 1, tzinfo=timezone.utc).timestamp())
+    assert end - start == SECONDS_PER_DAY
+
+
+def test_end_date_is_inclusive():
+    start, end = day_bounds("2024-02-28", "2024-03-01")
+    # 2024 is a leap year: Feb 28, Feb 29 and Mar 1
+    assert end - start == 3 * SECONDS_PER_DAY
+    assert end == epoch("2024-03-02")
+
+
+def test_bounds_are_half_open():
+    start, end = day_bounds("2024-03-01")
+    last_second = int(datetime(2024, 3, 1, 23, 59, 59, tzinfo=timezone.utc).timestamp())
+    next_midnight = int(datetime(2024, 3, 2, tzinfo=timezone.utc).timestamp())
+    assert start <= last_second < end
+    assert not next_midnight < end
+
+
+def test_accepts_dates_and_datetimes():
+    assert day_bounds(date(2024, 3, 1)) == day_bounds("2024-03-01")
+    assert day_bounds(datetime(2024, 3, 1, 18, 30)) == day_bounds("2024-03-01")
+
+
+def test_end_before_start_gives_an_empty_range():
+    start, end = day_bounds("2024-03-05", "2024-03-01")
+    assert end <= start
+
+
+@pytest.mark.parametrize("value", ["2024-13-01", "03/01/2024", "yesterday"])
+def test_invalid_date_raises(value):
+    with pytest.raises(ValueError):
+        day_bounds(value)
+    with pytest.raises(HTTPException) as excinfo:
+        day_bounds_or_400(value)
+    assert excinfo.value.status_code == 400
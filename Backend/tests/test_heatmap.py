@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+from app.utils.dates import SECONDS_PER_DAY, epoch
+from app.utils.heatmap import (
+    MAX_HEATMAP_DAYS,
+    POST_TYPES,
+    activity_heatmap,
+    heatmap_bounds,
+    heatmap_days,
+    heatmap_response,
+)
+from fastapi import HTTPException
+
+START = epoch("2024-03-01")
+
+
+def hour(day, hour_of_day):
+    return START + day * SECONDS_PER_DAY + hour_of_day * 3600
+
+
+def test_rows_land_in_their_day_hour_and_type():
+    rows = [
+        (hour(0, 0), "Question", 3),
+        (hour(1, 23), "Meme", 2),
+        (hour(1, 5), "News", 1),
+    ]
+    post_types, matrix = activity_heatmap(rows, START, 2)
+
+    assert post_types == list(POST_TYPES)
+    assert matrix.shape == (2, 24, len(POST_TYPES))
+    assert matrix[0, 0, post_types.index("Question")] == 3
+    assert matrix[1, 23, post_types.index("Meme")] == 2
+    assert matrix[1, 5, post_types.index("News")] == 1
+    assert matrix.sum() == 6
+
+
+def test_repeated_cells_are_summed():
+    rows = [(hour(0, 4), "Opinion", 2), (hour(0, 4), "Opinion", 5)]
+    post_types, matrix = activity_heatmap(rows, START, 1)
+    assert matrix[0, 4, post_types.index("Opinion")] == 7
+
+
+def test_unknown_types_are_appended_alphabetically():
+    rows = [(hour(0, 1), "Zine", 1), (hour(0, 2), "Art", 1), (hour(0, 3), "Meme", 1)]
+    post_types, matrix = activity_heatmap(rows, START, 1)
+
+    assert post_types == [*POST_TYPES, "Art", "Zine"]
+    assert matrix[0, 1, post_types.index("Zine")] == 1
+    assert matrix[0, 2, post_types.index("Art")] == 1
+
+
+def test_rows_outside_the_range_are_ignored():
+    rows = [
+        (hour(-1, 23), "Meme", 4),
+        (hour(2, 0), "Meme", 4),
+        (hour(1, 12), "Meme", 1),
+    ]
+    _, matrix = activity_heatmap(rows, START, 2)
+    assert matrix.sum() == 1
+
+
+def test_no_rows_gives_a_zero_matrix():
+    post_types, matrix = activity_heatmap([], START, 3)
+    assert post_types == list(POST_TYPES)
+    assert matrix.shape == (3, 24, len(POST_TYPES))
+    assert not matrix.any()
+    assert matrix.dtype == np.int64
+
+
+def test_heatmap_days_are_inclusive():
+    assert heatmap_days("2024-02-28", "2024-03-01") == [
+        "2024-02-28",
+        "2024-02-29",
+        "2024-03-01",
+    ]
+
+
+def test_heatmap_bounds_limits_the_range():
+    start, end = heatmap_bounds("2024-03-01", "2024-03-07")
+    assert (end - start) // SECONDS_PER_DAY == 7
+
+    with pytest.raises(HTTPException):
+        heatmap_bounds("2024-03-07", "2024-03-01")
+    # 2024 is a leap year, so it spans exactly MAX_HEATMAP_DAYS
+    start, end = heatmap_bounds("2024-01-01", "2024-12-31")
+    assert (end - start) // SECONDS_PER_DAY == MAX_HEATMAP_DAYS
+    with pytest.raises(HTTPException):
+        heatmap_bounds("2024-01-01", "2025-01-01")
+
+
+def test_heatmap_response_totals():
+    rows = [(hour(0, 9), "News", 2), (hour(1, 9), "News", 3)]
+    response = heatmap_response("reddit", "python", "2024-03-01", "2024-03-02", rows)
+
+    assert response.days == ["2024-03-01", "2024-03-02"]
+    assert response.hours == list(range(24))
+    assert response.total == 5
+    assert response.counts[1][9][response.post_types.index("News")] == 3
@@ -0,0 +1,92 @@
+import random
+import re
+
+import pytest
+from app.utils.keywords import (
+    KeywordAutomaton,
+    keyword_regex,
+    like_patterns,
+    minimal_keywords,
+)
+
+
+def test_minimal_keywords_drops_duplicates_and_implied_keywords():
+    keywords = ["Cloudflare", "cloudflare down", "CLOUDFLARE", "cdn outage", "outage"]
+    assert minimal_keywords(keywords) == ["cloudflare", "outage"]
+
+
+def test_minimal_keywords_keeps_order_and_unrelated_keywords():
+    assert minimal_keywords(["vote", "ballot", "election"]) == [
+        "vote",
+        "ballot",
+        "election",
+    ]
+
+
+def test_like_patterns_wrap_the_minimal_keywords():
+    assert like_patterns(["Outage", "major outage", "AWS"]) == ["%outage%", "%aws%"]
+
+
+def test_keyword_regex_escapes_special_characters():
+    pattern = keyword_regex(["c++", "node.js", "(beta)", "a|b"])
+    assert pattern == r"c\+\+|node\.js|\(beta\)|a\|b"
+    assert re.search(pattern, "learning c++ today")
+    assert re.search(pattern, "node.js release")
+    assert not re.search(pattern, "nodexjs")
+    assert not re.search(pattern, "a or b")
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "cloudflare is down",
+        "CLOUDFLARE DOWN AGAIN",
+        "major outage at aws",
+        "nothing happened",
+        "",
+    ],
+)
+def test_regex_matches_like_the_full_keyword_list(text):
+    keywords = ["Cloudflare", "cloudflare down", "AWS outage", "outage"]
+    expected = any(keyword.lower() in text.lower() for keyword in keywords)
+    assert bool(re.search(keyword_regex(keywords), text.lower())) == expected
+
+
+def test_automaton_matches_case_insensitive_substrings():
+    automaton = KeywordAutomaton(["cloudflare", "cdn outage"])
+    assert automaton.search("Is Cloudflare down again?")
+    assert automaton.search("big CDN OUTAGE today")
+    assert not automaton.search("cdn is fine")
+    assert not automaton.search("")
+    assert not automaton.search(None)
+
+
+def test_automaton_follows_failure_links():
+    # "bc" ends inside the "abcd" branch and is only seen through its failure link
+    assert KeywordAutomaton(["abcd", "bc"]).search("xabcx")
+    # A dead end resumes from the longest suffix: "sh" falls back to "h" for "his"
+    automaton = KeywordAutomaton(["hers", "she", "his"])
+    assert automaton.search("hhers")
+    assert automaton.search("shis")
+    assert not automaton.search("hes")
+
+
+def test_automaton_agrees_with_the_regex():
+    rng = random.Random(7)
+    alphabet = "ab c."
+    for _ in range(200):
+        keywords = [
+            "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4)))
+            for _ in range(rng.randint(1, 5))
+        ]
+        keywords = [keyword for keyword in keywords if keyword.strip()] or ["a"]
+        automaton = KeywordAutomaton(keywords)
+        pattern = re.compile(keyword_regex(keywords))
+        for _ in range(20):
+            text = "".join(
+                rng.choice(alphabet + "AB") for _ in range(rng.randint(0, 12))
+            )
+            assert automaton.search(text) == bool(pattern.search(text.lower())), (
+                keywords,
+                text,
+            )
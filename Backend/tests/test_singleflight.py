@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+from app.utils.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    async def query():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return ["row"]
+
+    async def burst():
+        return await asyncio.gather(*(flight.do("key", query) for _ in range(5)))
+
+    assert asyncio.run(burst()) == [["row"]] * 5
+    assert len(calls) == 1
+    assert flight.stats() == {
+        "calls": 5,
+        "executions": 1,
+        "coalesced": 4,
+        "in_flight": 0,
+    }
+
+
+def test_different_keys_run_separately():
+    flight = SingleFlight()
+
+    async def burst():
+        return await asyncio.gather(
+            flight.do("a", lambda: asyncio.sleep(0.01, result="a")),
+            flight.do("b", lambda: asyncio.sleep(0.01, result="b")),
+        )
+
+    assert asyncio.run(burst()) == ["a", "b"]
+    assert flight.stats()["executions"] == 2
+
+
+def test_finished_call_is_not_reused():
+    flight = SingleFlight()
+    calls = []
+
+    async def query():
+        calls.append(1)
+        return len(calls)
+
+    async def twice():
+        first = await flight.do("key", query)
+        second = await flight.do("key", query)
+        return first, second
+
+    assert asyncio.run(twice()) == (1, 2)
+    assert flight.stats()["coalesced"] == 0
+
+
+def test_error_reaches_every_waiter_and_is_not_cached():
+    flight = SingleFlight()
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise ValueError("query failed")
+
+    async def burst():
+        return await asyncio.gather(
+            *(flight.do("key", failing) for _ in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(burst())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_cancelled_leader_does_not_cancel_the_shared_call():
+    flight = SingleFlight()
+
+    async def query():
+        await asyncio.sleep(0.02)
+        return "rows"
+
+    async def scenario():
+        leader = asyncio.ensure_future(flight.do("key", query))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("key", query))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(scenario()) == "rows"
+    assert flight.stats()["executions"] == 1